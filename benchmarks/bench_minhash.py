@@ -0,0 +1,102 @@
+"""
+Benchmark of MinHash-LSH near-duplicate detection at bank scale
+
+Generates N synthetic search terms (5M by default), computes their MinHash
+signatures into a signature store, writes and reloads its sidecar file, and
+finds near-duplicate pairs among the distinct texts with banded LSH, as
+KeywordBank.find_fuzzy_duplicates(algorithm='minhash') does. LSH recall is
+measured by comparing a random sample of texts with all the others.
+
+Usage:
+    python benchmarks/bench_minhash.py [--keywords 5m] [--threshold 0.8] [--recall 0.95]
+                                       [--sample 200] [--min-recall 0.9] [--json out.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from kwbank.minhash import MinHashLSH, MinHashStore, measure_recall, numpy_module  # noqa: E402
+from kwbank.text_utils import TextNormalizer  # noqa: E402
+from synthetic import SearchTermGenerator, iter_sizes  # noqa: E402
+
+
+def timed(label, results, key, func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    results[key] = round(time.perf_counter() - start, 2)
+    print(f"{label:<34} {results[key]:8.2f}s")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--keywords', default='5m', help='Keywords to generate (e.g. 100k, 5m)')
+    parser.add_argument('--threshold', type=float, default=0.8, help='Estimated similarity threshold')
+    parser.add_argument('--recall', type=float, default=0.95, help='Target LSH recall at the threshold')
+    parser.add_argument('--sample', type=int, default=200, help='Texts compared with all others to measure recall')
+    parser.add_argument('--min-recall', type=float, default=0.9, help='Fail if the measured recall is lower')
+    parser.add_argument('--json', help='Write results to a JSON file')
+    args = parser.parse_args()
+
+    count = next(iter_sizes(args.keywords))
+    results = {'keywords': count, 'threshold': args.threshold, 'numpy': numpy_module() is not None}
+    print(f"{count:,} keywords, threshold {args.threshold}, NumPy: {'yes' if results['numpy'] else 'no'}")
+
+    def generate():
+        generator = SearchTermGenerator(seed=42)
+        texts = [generator.term() for _ in range(count)]
+        return texts, [TextNormalizer.normalize_basic(text) for text in texts]
+
+    texts, normalized = timed('generate terms', results, 'generate_s', generate)
+
+    workdir = tempfile.mkdtemp(prefix='kwbank_minhash_')
+    try:
+        path = os.path.join(workdir, 'keyword_bank.json.minhash')
+        store = MinHashStore(path)
+        items = list(zip(range(1, count + 1), normalized))
+        timed('signatures (all keywords)', results, 'signatures_s', store.sync, items)
+        timed('write sidecar', results, 'sidecar_write_s', store.save)
+        results['sidecar_mb'] = round(os.path.getsize(path) / 1e6, 1)
+        store = timed('load sidecar', results, 'sidecar_load_s', MinHashStore, path)
+        timed('sync unchanged bank', results, 'sync_unchanged_s', store.sync, items)
+
+        # Keywords repeating an earlier text are paired with it without LSH
+        first = {}
+        unique = [first.setdefault(text, row) for row, text in enumerate(texts) if text not in first]
+        results['distinct_texts'] = len(unique)
+        signatures = timed('select distinct texts', results, 'select_s', store.signatures.take, unique)
+        lsh = MinHashLSH(args.threshold, recall=args.recall)
+        pairs = timed(f'LSH ({lsh.bands} bands x {lsh.rows} rows)', results, 'lsh_s', lsh.pairs, signatures)
+        results['candidates'] = lsh.candidates
+        results['pairs'] = len(pairs)
+        print(f"  {len(unique):,} distinct texts, {lsh.candidates:,} candidates, {len(pairs):,} pairs")
+        results['total_s'] = round(results['signatures_s'] + results['select_s'] + results['lsh_s'], 2)
+        print(f"{'signatures + LSH':<34} {results['total_s']:8.2f}s")
+
+        measured = timed('measure recall', results, 'measure_s',
+                         measure_recall, signatures, pairs, args.threshold, args.sample)
+        results['sample_recall'] = measured
+        print(f"  recall for {measured['sample']:,} sampled texts: {measured['recall']:.2%} "
+              f"({measured['found']:,}/{measured['pairs']:,} brute-force pairs)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if measured['recall'] < args.min_recall:
+        print(f"FAIL: recall {measured['recall']:.2%} below {args.min_recall:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
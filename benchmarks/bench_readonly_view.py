@@ -0,0 +1,145 @@
+"""
+Benchmark of reporting commands on a large .kwb snapshot bank
+
+Writes a synthetic snapshot with N keywords (5M by default) directly from
+columns, then runs read-only kwbank commands against it in fresh processes
+and reports wall time and peak RSS of each. With the memory-mapped view,
+stats should stay well under a second and far below the memory the full
+bank would need.
+
+Usage:
+    python benchmarks/bench_readonly_view.py [--keywords 5000000] [--max-stats-s 1.0] [--json out.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from kwbank.snapshot import write_columns  # noqa: E402
+
+BRANDS = ['Nike', 'Adidas', 'Puma', 'Reebok', 'Asics']
+WORDS = ['running', 'shoes', 'trail', 'men', 'women', 'kids', 'sale', 'red',
+         'blue', 'lightweight', 'waterproof', 'best', 'cheap', 'size', 'wide']
+MATCH_TYPES = ['exact', 'phrase', 'broad']
+INTENTS = ['awareness', 'consideration', 'conversion', 'unknown']
+
+COMMANDS = [
+    ['stats'],
+    ['list-keywords'],
+    ['list-keywords', '--brand', 'Puma'],
+    ['list-mappings', '--asin', 'B000000001'],
+]
+
+
+def build_snapshot(path, count):
+    text = [f"{WORDS[i % 15]} {WORDS[(i >> 4) % 15]} {WORDS[(i >> 8) % 15]} {i}" for i in range(count)]
+    columns = {
+        'text': text,
+        'brand': [BRANDS[i % len(BRANDS)] for i in range(count)],
+        'match_type': [MATCH_TYPES[i % 3] for i in range(count)],
+        'keyword_type': ['negative' if i % 10 == 0 else 'positive' for i in range(count)],
+        'normalized_text': text,
+        'intent': [INTENTS[i % 4] for i in range(count)],
+        'suggested_bid': [0.5 + (i % 100) / 100 for i in range(count)],
+        'tags': [''] * count,
+        'notes': [''] * count,
+        'owner': [''] * count,
+        'status': ['active'] * count,
+        'source': ['bench'] * count,
+        'created_at': ['2024-01-01T00:00:00'] * count,
+        'keyword_id': list(range(1, count + 1)),
+    }
+    meta = {
+        'brands': [], 'products': [], 'naming_rules': [], 'campaigns': [],
+        'mappings': [{'asin': 'B000000001', 'keyword': text[i], 'keyword_id': i + 1,
+                      'campaign_id': '', 'ad_group': '', 'bid_override': None, 'notes': '',
+                      'created_at': '2024-01-01T00:00:00'} for i in range(100)],
+        'next_keyword_id': count + 1,
+        # Aggregate counters, as KeywordBank persists them on save
+        'keyword_counts': [list(key) + [n] for key, n in Counter(zip(
+            columns['brand'], columns['keyword_type'], columns['match_type'],
+            columns['intent'], columns['status'])).items()],
+    }
+    write_columns(path, meta, columns, count)
+
+
+def run_command(args, storage_path, workdir):
+    """Run a command in a fresh process, returning (seconds, peak RSS in MB)"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.join(ROOT, 'src'), env.get('PYTHONPATH')]))
+    env['KWBANK_STORAGE'] = storage_path
+    env['KWBANK_NO_DAEMON'] = '1'
+    # The runner reports its own peak RSS. VmHWM is used where available:
+    # ru_maxrss can carry over the (large) high-water mark of this process
+    runner = (
+        "import resource, sys, time\n"
+        "from kwbank.cli import main\n"
+        "start = time.perf_counter()\n"
+        "try:\n"
+        "    main(args=sys.argv[1:], prog_name='kwbank', standalone_mode=False)\n"
+        "finally:\n"
+        "    elapsed = time.perf_counter() - start\n"
+        "    try:\n"
+        "        rss = next(int(l.split()[1]) for l in open('/proc/self/status') if l.startswith('VmHWM'))\n"
+        "    except OSError:\n"
+        "        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "        rss = rss // 1024 if sys.platform == 'darwin' else rss\n"
+        "    sys.stderr.write(f'{elapsed} {rss}\\n')\n"
+    )
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', runner] + args, cwd=workdir, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Command failed: {args}\n{proc.stderr[-2000:]}")
+    _, rss_kb = proc.stderr.strip().splitlines()[-1].split()
+    rss_mb = int(rss_kb) / 1024
+    return wall, rss_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--keywords', type=int, default=5_000_000, help='Keywords in the synthetic bank')
+    parser.add_argument('--max-stats-s', type=float, default=1.0, help='Fail if stats takes longer')
+    parser.add_argument('--json', help='Write results to a JSON file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='kwbank_view_')
+    storage_path = os.path.join(workdir, 'keyword_bank.kwb')
+    results = {'keywords': args.keywords, 'commands': {}}
+    try:
+        print(f"Writing a {args.keywords:,} keyword snapshot...")
+        start = time.perf_counter()
+        build_snapshot(storage_path, args.keywords)
+        results['build_s'] = round(time.perf_counter() - start, 1)
+        results['file_mb'] = round(os.path.getsize(storage_path) / 1e6, 1)
+        print(f"  {results['file_mb']} MB in {results['build_s']}s")
+
+        for command in COMMANDS:
+            wall, rss_mb = run_command(command, storage_path, workdir)
+            name = 'kwbank ' + ' '.join(command)
+            results['commands'][name] = {'wall_s': round(wall, 3), 'peak_rss_mb': round(rss_mb, 1)}
+            print(f"{name:<40} {wall:7.3f}s  {rss_mb:8.1f} MB peak RSS")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    stats_s = results['commands'].get('kwbank stats', {}).get('wall_s', 0)
+    if stats_s > args.max_stats_s:
+        print(f"FAIL: kwbank stats took {stats_s}s (budget {args.max_stats_s}s)")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Cold-start benchmark for the kwbank CLI
+
+Runs trivial commands in fresh interpreters with ``python -X importtime``,
+reports wall time and the cumulative import time of ``kwbank.cli``, and
+fails when a command pulls in modules it doesn't need or exceeds its
+time budget.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--max-import-ms 150] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Command -> modules that must not be imported to run it
+COMMANDS = {
+    'kwbank --help': (
+        ['--help'],
+        ['pandas', 'numpy', 'kwbank.keyword_bank', 'kwbank.models', 'kwbank.amazon_exporter',
+         'kwbank.campaign_generator', 'kwbank.audit_logger', 'concurrent.futures'],
+    ),
+    'kwbank test-naming-pattern': (
+        ['test-naming-pattern', '{BrandPrefix}_{ASIN}_{Goal}_{MatchType}_{Date:yyyyMMdd}'],
+        ['pandas', 'numpy', 'kwbank.keyword_bank', 'kwbank.amazon_exporter',
+         'kwbank.audit_logger', 'concurrent.futures'],
+    ),
+}
+
+RUNNER = "import sys; from kwbank.cli import main; sys.argv = ['kwbank'] + sys.argv[1:]; main()"
+
+
+def run_once(args):
+    """Run a command once, returning (wall_ms, cli_import_ms, imported_modules)"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.join(ROOT, 'src'), env.get('PYTHONPATH')]))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', RUNNER] + args,
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"Command failed: {args}\n{proc.stderr[-2000:]}")
+
+    modules = set()
+    cli_import_ms = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue  # Header line
+        name = name.strip()
+        modules.add(name)
+        if name == 'kwbank.cli':
+            cli_import_ms = int(cumulative) / 1000
+    return wall_ms, cli_import_ms, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='Runs per command (first run warms the bytecode cache)')
+    parser.add_argument('--max-import-ms', type=float, default=150.0,
+                        help='Budget for the median cumulative import time of kwbank.cli')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    results = {}
+    failures = []
+    for label, (cmd_args, forbidden) in COMMANDS.items():
+        run_once(cmd_args)  # Warm-up
+        walls, imports, modules = [], [], set()
+        for _ in range(args.runs):
+            wall_ms, cli_import_ms, imported = run_once(cmd_args)
+            walls.append(wall_ms)
+            imports.append(cli_import_ms)
+            modules |= imported
+
+        unwanted = sorted(m for m in modules if any(m == f or m.startswith(f + '.') for f in forbidden))
+        result = {
+            'wall_ms_median': round(statistics.median(walls), 2),
+            'wall_ms_min': round(min(walls), 2),
+            'cli_import_ms_median': round(statistics.median(imports), 2),
+            'modules_imported': len(modules),
+            'unwanted_modules': unwanted,
+        }
+        results[label] = result
+
+        print(f"{label}")
+        print(f"  wall:   median {result['wall_ms_median']:.1f} ms, min {result['wall_ms_min']:.1f} ms")
+        print(f"  import: kwbank.cli {result['cli_import_ms_median']:.1f} ms ({len(modules)} modules)")
+        if unwanted:
+            failures.append(f"{label} imports {', '.join(unwanted)}")
+        if result['cli_import_ms_median'] > args.max_import_ms:
+            failures.append(f"{label} kwbank.cli import {result['cli_import_ms_median']:.1f} ms "
+                            f"> {args.max_import_ms:.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
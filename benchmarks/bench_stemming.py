@@ -0,0 +1,109 @@
+"""
+Benchmark of the kwbank.stemming stemmers in words per second
+
+For each language, stems a stream of N words (default 1M) drawn from a
+search-term vocabulary: once with the bare stemming rules, as every call
+to an unmemoized stemmer would, and once through Stemmer.stem_many() with
+its per-word cache, as variant deduplication does. English words come from
+synthetic search terms (see synthetic.py) and are also stemmed with the
+suffix list TextNormalizer.stem_simple used before kwbank.stemming, for
+comparison.
+
+Usage:
+    python benchmarks/bench_stemming.py [--words 1m] [--languages en,de,fr,es] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from kwbank.stemming import LANGUAGE_STEMMERS, Stemmer  # noqa: E402
+from synthetic import SearchTermGenerator, iter_sizes  # noqa: E402
+
+VOCABULARIES = {
+    'de': 'laufschuhe laufschuh schuhe schuh herren damen kinder kindern sportschuhe turnschuhe '
+          'wasserdichte wasserdicht jacke jacken rucksack rucksäcke socken hosen hose größe größten '
+          'günstige günstiger günstigsten leichte leichter schwarze schwarzer weiße weißen bequeme '
+          'atmungsaktive wanderschuhe hausschuhe sandalen stiefel stiefeln trainingsanzug',
+    'fr': 'chaussures chaussure course homme hommes femme femmes enfants sportive sportives sportif '
+          'noire noires blanche blanches légère légères légers imperméable imperméables veste vestes '
+          'chaussettes sac sacs randonnée baskets confortable confortables premières premier '
+          'naturelle naturels chevaux bateaux heureuse heureux pantalon pantalons taille',
+    'es': 'zapatillas zapatilla zapatos zapato hombre hombres mujer mujeres niños niñas deportivas '
+          'deportivo deportivos negras negro blancas blanco ligeras ligero impermeables chaqueta '
+          'chaquetas calcetines mochila mochilas luces meses correr running sandalias botas '
+          'cómodas cómodo talla tallas pantalones pantalón',
+}
+
+
+def legacy_stem(word):
+    """TextNormalizer.stem_simple before kwbank.stemming"""
+    suffixes = ['ing', 'ed', 'es', 's', 'ly', 'er', 'est']
+    word = word.lower()
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) > len(suffix) + 2:
+            return word[:-len(suffix)]
+    return word
+
+
+def word_stream(language, count, seed):
+    if language == 'en':
+        generator = SearchTermGenerator(seed=seed)
+        words = []
+        while len(words) < count:
+            words.extend(generator.term().lower().split())
+        return words[:count]
+    vocabulary = VOCABULARIES[language].split()
+    rnd = random.Random(seed)
+    return [rnd.choice(vocabulary) for _ in range(count)]
+
+
+def words_per_second(func, words):
+    start = time.perf_counter()
+    func(words)
+    return len(words) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--words', default='1m', help='Words stemmed per language (e.g. 100k, 1m)')
+    parser.add_argument('--languages', default='en,de,fr,es', help='Comma-separated language codes')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Write results to a JSON file')
+    args = parser.parse_args()
+
+    count = next(iter_sizes(args.words))
+    results = {'words': count, 'languages': {}}
+    print(f"{count:,} words per language\n")
+    print(f"{'language':<10} {'distinct':>9} {'stems':>7} {'rules w/s':>12} {'stem_many w/s':>14}")
+    for language in args.languages.split(','):
+        words = word_stream(language, count, args.seed)
+        rules = LANGUAGE_STEMMERS[language]
+        result = {
+            'distinct_words': len(set(words)),
+            'distinct_stems': len({rules(word) for word in set(words)}),
+            'rules_wps': round(words_per_second(lambda ws: [rules(w) for w in ws], words)),
+            'stem_many_wps': round(words_per_second(Stemmer(language).stem_many, words)),
+        }
+        if language == 'en':
+            result['legacy_wps'] = round(words_per_second(lambda ws: [legacy_stem(w) for w in ws], words))
+            result['legacy_distinct_stems'] = len({legacy_stem(word) for word in set(words)})
+        results['languages'][language] = result
+        print(f"{language:<10} {result['distinct_words']:>9,} {result['distinct_stems']:>7,} "
+              f"{result['rules_wps']:>12,} {result['stem_many_wps']:>14,}")
+        if language == 'en':
+            print(f"{'  legacy':<10} {'':>9} {result['legacy_distinct_stems']:>7,} {result['legacy_wps']:>12,}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Load/save throughput benchmark for the keyword bank storage file
+
+Builds a synthetic bank, then saves and loads it with every available JSON
+codec backend (see kwbank.codec) and as a columnar .kwb snapshot, and
+reports records/sec. The legacy baseline (stdlib json with indent=2 and
+eager timestamp parsing) is measured too for comparison.
+
+Usage:
+    python benchmarks/bench_storage.py [--keywords 1000000] [--runs 1] [--json out.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from kwbank import codec  # noqa: E402
+from kwbank.keyword_bank import KeywordBank  # noqa: E402
+from kwbank.models import Keyword, KeywordType, MatchType, KeywordIntent  # noqa: E402
+
+BRANDS = ['Nike', 'Adidas', 'Puma', 'Reebok', 'Asics']
+WORDS = ['running', 'shoes', 'trail', 'men', 'women', 'kids', 'sale', 'red',
+         'blue', 'lightweight', 'waterproof', 'best', 'cheap', 'size', 'wide']
+
+
+def build_keywords(count):
+    match_types = list(MatchType)
+    intents = list(KeywordIntent)
+    created_at = datetime(2024, 1, 1)
+    keywords = []
+    for i in range(count):
+        words = [WORDS[(i >> shift) % len(WORDS)] for shift in (0, 4, 8)]
+        keywords.append(Keyword(
+            text=f"{' '.join(words)} {i}",
+            brand=BRANDS[i % len(BRANDS)],
+            match_type=match_types[i % len(match_types)],
+            keyword_type=KeywordType.NEGATIVE if i % 10 == 0 else KeywordType.POSITIVE,
+            intent=intents[i % len(intents)],
+            suggested_bid=round(0.5 + (i % 100) / 100, 2),
+            created_at=created_at,
+            keyword_id=i + 1
+        ))
+    return keywords
+
+
+def timed(func, runs):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_backend(path, keywords, runs):
+    bank = KeywordBank(path)
+    bank.keywords = keywords
+    bank._index_keyword_ids()
+
+    def save():
+        bank.save()
+
+    def load():
+        KeywordBank(path)
+
+    def load_and_touch():
+        for keyword in KeywordBank(path).keywords:
+            keyword.created_at
+
+    save_s = timed(save, runs)
+    load_s = timed(load, runs)
+    touch_s = timed(load_and_touch, runs)
+    return {
+        'file_mb': round(os.path.getsize(path) / 1e6, 1),
+        'save_s': round(save_s, 3),
+        'load_s': round(load_s, 3),
+        'load_parse_dates_s': round(touch_s, 3),
+        'save_records_per_s': int(len(keywords) / save_s),
+        'load_records_per_s': int(len(keywords) / load_s),
+    }
+
+
+def bench_legacy(path, keywords, runs):
+    """Indented stdlib json, Enum constructors and eager fromisoformat"""
+    def save():
+        with open(path, 'w') as f:
+            json.dump({'keywords': [k.to_dict() for k in keywords]}, f, indent=2)
+
+    def load():
+        with open(path) as f:
+            data = json.load(f)
+        [
+            Keyword(
+                text=k['text'], brand=k['brand'],
+                match_type=MatchType(k['match_type']),
+                keyword_type=KeywordType(k['keyword_type']),
+                normalized_text=k['normalized_text'],
+                intent=KeywordIntent(k['intent']),
+                suggested_bid=k['suggested_bid'],
+                created_at=datetime.fromisoformat(k['created_at']),
+                keyword_id=k['keyword_id']
+            ) for k in data['keywords']
+        ]
+
+    save_s = timed(save, runs)
+    load_s = timed(load, runs)
+    return {
+        'file_mb': round(os.path.getsize(path) / 1e6, 1),
+        'save_s': round(save_s, 3),
+        'load_s': round(load_s, 3),
+        'save_records_per_s': int(len(keywords) / save_s),
+        'load_records_per_s': int(len(keywords) / load_s),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--keywords', type=int, default=1_000_000, help='Keywords in the synthetic bank')
+    parser.add_argument('--runs', type=int, default=1, help='Runs per measurement (best is reported)')
+    parser.add_argument('--no-legacy', action='store_true', help='Skip the legacy baseline')
+    parser.add_argument('--json', help='Write results to a JSON file')
+    args = parser.parse_args()
+
+    print(f"Building {args.keywords:,} keywords...")
+    keywords = build_keywords(args.keywords)
+    workdir = tempfile.mkdtemp(prefix='kwbank_bench_')
+    results = {'keywords': args.keywords, 'backends': {}}
+    try:
+        if not args.no_legacy:
+            results['legacy'] = bench_legacy(os.path.join(workdir, 'legacy.json'), keywords, args.runs)
+        for name in codec.available_backends():
+            codec.set_backend(name)
+            results['backends'][name] = bench_backend(
+                os.path.join(workdir, f"{name}.json"), keywords, args.runs
+            )
+        results['backends']['kwb'] = bench_backend(
+            os.path.join(workdir, 'snapshot.kwb'), keywords, args.runs
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    rows = ([('legacy', results['legacy'])] if 'legacy' in results else []) + list(results['backends'].items())
+    print(f"{'codec':<10}{'file MB':>9}{'save s':>9}{'save rec/s':>13}{'load s':>9}{'load rec/s':>13}")
+    for name, r in rows:
+        print(f"{name:<10}{r['file_mb']:>9}{r['save_s']:>9}{r['save_records_per_s']:>13,}"
+              f"{r['load_s']:>9}{r['load_records_per_s']:>13,}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
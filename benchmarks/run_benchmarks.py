@@ -0,0 +1,463 @@
+"""
+Benchmark suite for the kwbank hot paths
+
+Generates synthetic banks (see synthetic.py) at each requested scale and
+times bank load/save, import_keywords_enhanced, find_fuzzy_duplicates,
+find_variant_duplicates, detect_conflicts, AmazonBulkExporter.export_campaigns
+and the python-nlp /dedupe endpoint. Each benchmark is run several times
+and summarized as min/median/mean/stdev/IQR, and the peak of Python
+allocations during one extra run is measured with tracemalloc. Results are
+written as JSON, and two result files can be compared to spot regressions.
+
+Pairwise paths (fuzzy dedupe, /dedupe) are quadratic, so they run on a
+fixed-size sample of the bank (--pair-sample) and enhanced import adds a
+small batch (--import-batch) to the full bank; benchmarks over their
+--max-scale limit are reported as skipped unless --no-limits is given.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--scales 10k,100k,1m] [--only load_json,detect_conflicts]
+                                        [--repeat 5] [--json results.json] [--baseline old.json]
+    python benchmarks/run_benchmarks.py --compare old.json new.json [--threshold 0.1]
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from kwbank import codec  # noqa: E402
+from kwbank.amazon_exporter import AmazonBulkExporter  # noqa: E402
+from kwbank.keyword_bank import KeywordBank  # noqa: E402
+from synthetic import build_bank, generate_campaigns, generate_keywords, iter_sizes  # noqa: E402
+
+SCHEMA_VERSION = 1
+
+# name -> (function, max scale run by default or None, description)
+BENCHMARKS = {}
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark that can't run in this environment"""
+
+
+def benchmark(name, max_scale=None):
+    """
+    Register a benchmark
+
+    func(ctx) returns (run, items) or (setup, run, items, teardown): setup
+    runs untimed before every run, teardown once at the end. items is the
+    work size used for throughput.
+    """
+    def register(func):
+        BENCHMARKS[name] = (func, max_scale, (func.__doc__ or '').strip())
+        return func
+    return register
+
+
+class Context:
+    """Synthetic bank of one scale, shared by the benchmarks"""
+
+    def __init__(self, scale, workdir, args):
+        self.scale = scale
+        self.workdir = workdir
+        self.args = args
+        self.json_path = os.path.join(workdir, 'keyword_bank.json')
+        self.kwb_path = os.path.join(workdir, 'keyword_bank.kwb')
+        self._bank = None
+
+    @property
+    def bank(self):
+        """Bank loaded from the JSON file, built on first use"""
+        if self._bank is None:
+            self._bank = build_bank(self.json_path, self.scale, self.args.seed)
+        return self._bank
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def sample_bank(self, size):
+        """In-memory bank holding the first `size` keywords of the largest brand"""
+        counts = self.bank.count_keywords('brand')
+        (brand,) = max(counts, key=counts.get)
+        bank = KeywordBank(self.path(f"sample_{size}.json"))
+        bank.keywords = self.bank.get_keywords_by_brand(brand)[:size]
+        bank._index_keyword_ids()
+        return bank, brand
+
+
+@benchmark('save_json')
+def bench_save_json(ctx):
+    """KeywordBank.save() to JSON"""
+    bank = ctx.bank
+    return bank.save, ctx.scale
+
+
+@benchmark('load_json')
+def bench_load_json(ctx):
+    """KeywordBank._load() from JSON"""
+    ctx.bank
+    return (lambda: KeywordBank(ctx.json_path)), ctx.scale
+
+
+@benchmark('save_kwb')
+def bench_save_kwb(ctx):
+    """KeywordBank.save_as() to a .kwb snapshot"""
+    return (lambda: ctx.bank.save_as(ctx.kwb_path)), ctx.scale
+
+
+@benchmark('load_kwb')
+def bench_load_kwb(ctx):
+    """KeywordBank._load() from a .kwb snapshot"""
+    if not os.path.exists(ctx.kwb_path):
+        ctx.bank.save_as(ctx.kwb_path)
+    return (lambda: KeywordBank(ctx.kwb_path)), ctx.scale
+
+
+@benchmark('detect_conflicts', max_scale=100_000)
+def bench_detect_conflicts(ctx):
+    """KeywordBank.detect_conflicts() over the whole bank (quadratic in conflicts)"""
+    return ctx.bank.detect_conflicts, ctx.scale
+
+
+@benchmark('import_keywords_enhanced', max_scale=100_000)
+def bench_import_enhanced(ctx):
+    """KeywordBank.import_keywords_enhanced() of a new batch into the bank"""
+    bank = ctx.bank
+    base = list(bank.keywords)
+    batch_size = ctx.args.import_batch
+    state = {}
+
+    def setup():
+        bank.keywords = list(base)
+        bank._index_keyword_ids()
+        bank._dedupe_index = None
+        bank.refresh_keyword_counts()
+        # Regenerated each run: the import normalizes and enhances in place
+        state['batch'] = generate_keywords(batch_size, seed=ctx.args.seed + 1, start_id=0)
+
+    def run():
+        bank.import_keywords_enhanced(state['batch'])
+
+    def teardown():
+        bank.keywords = base
+        bank._index_keyword_ids()
+        bank._dedupe_index = None
+        bank.refresh_keyword_counts()
+
+    return setup, run, batch_size, teardown
+
+
+@benchmark('find_fuzzy_duplicates')
+def bench_fuzzy(ctx):
+    """KeywordBank.find_fuzzy_duplicates() on a one-brand sample (quadratic)"""
+    bank, brand = ctx.sample_bank(ctx.args.pair_sample)
+    return (lambda: bank.find_fuzzy_duplicates(brand)), len(bank.keywords)
+
+
+@benchmark('find_fuzzy_duplicates_indexed', max_scale=10_000)
+def bench_fuzzy_indexed(ctx):
+    """find_fuzzy_duplicates(algorithm='jaccard_char') over every keyword, via the shingle index"""
+    bank = ctx.bank
+    return (lambda: bank.find_fuzzy_duplicates(threshold=0.8, algorithm='jaccard_char')), ctx.scale
+
+
+@benchmark('find_fuzzy_duplicates_by_brand', max_scale=10_000)
+def bench_fuzzy_by_brand(ctx):
+    """find_fuzzy_duplicates_by_brand(algorithm='jaccard_char'), (brand, type) partitions in a process pool"""
+    bank = ctx.bank
+    return (lambda: bank.find_fuzzy_duplicates_by_brand(threshold=0.8, algorithm='jaccard_char')), ctx.scale
+
+
+@benchmark('find_variant_duplicates')
+def bench_variants(ctx):
+    """KeywordBank.find_variant_duplicates() over every keyword, stem cache cleared per run"""
+    from kwbank.stemming import get_stemmer
+    return get_stemmer('en').clear_cache, ctx.bank.find_variant_duplicates, ctx.scale, None
+
+
+@benchmark('export_campaigns')
+def bench_export(ctx):
+    """AmazonBulkExporter.export_campaigns() of campaigns holding every keyword"""
+    campaigns = generate_campaigns(ctx.bank.keywords)
+    output = ctx.path('export.csv')
+    return (lambda: AmazonBulkExporter.export_campaigns(campaigns, output)), ctx.scale
+
+
+def _load_nlp_service():
+    """Import python-nlp's app.main, or return the reason it can't be"""
+    service_dir = os.path.join(ROOT, 'python-nlp')
+    if service_dir not in sys.path:
+        sys.path.insert(0, service_dir)
+    try:
+        return importlib.import_module('app.main'), None
+    except ImportError as e:
+        return None, f"python-nlp dependencies not installed ({e.name})"
+
+
+@benchmark('nlp_dedupe')
+def bench_nlp_dedupe(ctx):
+    """python-nlp /dedupe handler on a one-brand sample (quadratic, caches cleared per run)"""
+    service, reason = _load_nlp_service()
+    if service is None:
+        raise SkipBenchmark(reason)
+    bank, _ = ctx.sample_bank(ctx.args.pair_sample)
+    request = service.DedupeRequest(keywords=[
+        service.KeywordItem(id=str(k.keyword_id), text=k.text, normalized_text=k.normalized_text)
+        for k in bank.keywords
+    ])
+    return service.cache.clear, (lambda: service.deduplicate_keywords(request)), len(bank.keywords), None
+
+
+def summarize(times, items):
+    """Timing statistics of a list of run durations"""
+    ordered = sorted(times)
+    if len(ordered) >= 4:
+        quartiles = statistics.quantiles(ordered, n=4)
+        iqr = quartiles[2] - quartiles[0]
+    else:
+        iqr = ordered[-1] - ordered[0]
+    median = statistics.median(ordered)
+    return {
+        'n': items,
+        'runs': len(times),
+        'min_s': round(ordered[0], 6),
+        'median_s': round(median, 6),
+        'mean_s': round(statistics.fmean(ordered), 6),
+        'stdev_s': round(statistics.stdev(ordered), 6) if len(ordered) > 1 else 0.0,
+        'iqr_s': round(iqr, 6),
+        'items_per_s': round(items / median, 1) if median else None,
+        'times_s': [round(t, 6) for t in times],
+    }
+
+
+def measure(spec, args):
+    """Run one benchmark: warm-up, timed runs, then one run under tracemalloc"""
+    if len(spec) == 2:
+        run, items = spec
+        setup = teardown = None
+    else:
+        setup, run, items, teardown = spec
+
+    def once():
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        return time.perf_counter() - start
+
+    try:
+        for _ in range(args.warmup):
+            once()
+        times = []
+        started = time.perf_counter()
+        while len(times) < args.repeat:
+            times.append(once())
+            # Slow benchmarks stop early once the minimum number of runs is in
+            if len(times) >= args.min_runs and time.perf_counter() - started > args.budget:
+                break
+        result = summarize(times, items)
+
+        if not args.no_memory:
+            if setup:
+                setup()
+            gc.collect()
+            tracemalloc.start()
+            try:
+                run()
+                result['peak_alloc_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+            finally:
+                tracemalloc.stop()
+    finally:
+        if teardown:
+            teardown()
+    return result
+
+
+def environment(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'json_codec': codec.BACKEND,
+        'git_commit': commit,
+    }
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+    except (OSError, StopIteration):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return (rss / 1024 / 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def scale_label(scale):
+    if scale >= 1_000_000 and scale % 1_000_000 == 0:
+        return f"{scale // 1_000_000}m"
+    if scale >= 1_000 and scale % 1_000 == 0:
+        return f"{scale // 1_000}k"
+    return str(scale)
+
+
+def run_suite(args):
+    names = list(BENCHMARKS)
+    if args.only:
+        names = [n.strip() for n in args.only.split(',')]
+        unknown = [n for n in names if n not in BENCHMARKS]
+        if unknown:
+            sys.exit(f"Unknown benchmark(s): {', '.join(unknown)}. Available: {', '.join(BENCHMARKS)}")
+
+    results = {
+        'schema': SCHEMA_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(args),
+        'config': {
+            'seed': args.seed, 'repeat': args.repeat, 'min_runs': args.min_runs,
+            'warmup': args.warmup, 'budget_s': args.budget,
+            'pair_sample': args.pair_sample, 'import_batch': args.import_batch,
+        },
+        'results': {},
+    }
+    for scale in iter_sizes(args.scales):
+        label = scale_label(scale)
+        scale_results = results['results'][label] = {}
+        workdir = tempfile.mkdtemp(prefix=f'kwbank_bench_{label}_')
+        print(f"\n== {scale:,} keywords ==")
+        try:
+            ctx = Context(scale, workdir, args)
+            start = time.perf_counter()
+            ctx.bank
+            print(f"  (generated bank in {time.perf_counter() - start:.1f}s)")
+            for name in names:
+                func, max_scale, _ = BENCHMARKS[name]
+                if max_scale is not None and scale > max_scale and not args.no_limits:
+                    scale_results[name] = {'skipped': f"above --max-scale {max_scale:,} (use --no-limits)"}
+                    print(f"  {name:<26} skipped: above {max_scale:,} keywords")
+                    continue
+                try:
+                    result = measure(func(ctx), args)
+                except SkipBenchmark as e:
+                    scale_results[name] = {'skipped': str(e)}
+                    print(f"  {name:<26} skipped: {e}")
+                    continue
+                scale_results[name] = result
+                memory = f"{result['peak_alloc_mb']:>9.1f} MB" if 'peak_alloc_mb' in result else ''
+                print(f"  {name:<26} n={result['n']:<9,} median {result['median_s']:9.4f}s "
+                      f"± {result['iqr_s']:.4f} (IQR, {result['runs']} runs){memory}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    results['environment']['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return results
+
+
+def compare(baseline, current, threshold):
+    """
+    Print median changes between two result files
+    Returns the regressions: slower by more than threshold, with the
+    fastest current run still slower than the baseline median (noise guard)
+    """
+    regressions = []
+    for key in ('python', 'machine', 'cpu_count', 'json_codec'):
+        old_value = baseline.get('environment', {}).get(key)
+        new_value = current.get('environment', {}).get(key)
+        if old_value != new_value:
+            print(f"Note: {key} differs ({old_value} -> {new_value}); timings may not be comparable")
+    print(f"{'benchmark':<28}{'scale':>7}{'baseline s':>13}{'current s':>13}{'change':>9}")
+    for label, benchmarks in current.get('results', {}).items():
+        for name, result in benchmarks.items():
+            old = baseline.get('results', {}).get(label, {}).get(name)
+            if not old or 'median_s' not in old or 'median_s' not in result:
+                continue
+            if old.get('n') != result.get('n'):
+                print(f"{name:<28}{label:>7}  (work size changed: {old.get('n')} -> {result.get('n')})")
+                continue
+            change = result['median_s'] / old['median_s'] - 1 if old['median_s'] else 0.0
+            flag = ''
+            if change > threshold and result['min_s'] > old['median_s']:
+                flag = '  REGRESSION'
+                regressions.append((name, label, change))
+            elif change < -threshold and result['median_s'] < old['min_s']:
+                flag = '  faster'
+            print(f"{name:<28}{label:>7}{old['median_s']:>13.4f}{result['median_s']:>13.4f}"
+                  f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='10k,100k,1m', help='Bank sizes, e.g. 10k,100k,1m')
+    parser.add_argument('--only', help='Comma-separated benchmarks to run (default: all)')
+    parser.add_argument('--list', action='store_true', help='List the benchmarks and exit')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark')
+    parser.add_argument('--min-runs', type=int, default=3, help='Runs kept even when over --budget')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed runs before timing')
+    parser.add_argument('--budget', type=float, default=30.0,
+                        help='Seconds after which a benchmark stops repeating (past --min-runs)')
+    parser.add_argument('--pair-sample', type=int, default=500, help='Keywords in the quadratic benchmarks')
+    parser.add_argument('--import-batch', type=int, default=20, help='Keywords added by the enhanced import')
+    parser.add_argument('--no-limits', action='store_true', help='Run benchmarks above their max scale')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc peak measurement')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the synthetic banks')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare the results with an earlier results file')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Only compare two results files')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Median slowdown reported as regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with 1 on regressions')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (_, max_scale, description) in BENCHMARKS.items():
+            limit = f" (up to {max_scale:,} keywords)" if max_scale else ''
+            print(f"{name:<26} {description}{limit}")
+        return
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+    else:
+        current = run_suite(args)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(current, f, indent=2)
+            print(f"\nResults written to {args.json}")
+        if not args.baseline:
+            return
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print()
+    regressions = compare(baseline, current, args.threshold)
+    for name, label, change in regressions:
+        print(f"REGRESSION: {name} at {label} is {change:+.1%} slower")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Concurrency stress test for the keyword bank
+
+Starts N kwbank processes at once against one fresh data directory, each
+importing its own keyword file (with some keywords shared between files)
+and adding a brand. Afterwards the bank and audit trail must be valid
+JSON, contain every distinct keyword exactly once, every brand, and one
+audit entry per command.
+
+Usage:
+    python benchmarks/stress_concurrent_import.py [--workers 8] [--keywords 500] [--rounds 3]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Keywords every worker imports, to exercise deduplication across processes
+SHARED_KEYWORDS = 50
+
+
+def write_keyword_file(path, worker, count):
+    with open(path, 'w') as f:
+        f.write("keyword\n")
+        for i in range(SHARED_KEYWORDS):
+            f.write(f"shared keyword {i}\n")
+        for i in range(count):
+            f.write(f"worker {worker} keyword {i}\n")
+
+
+def run_round(workdir, workers, count):
+    """Run one round of concurrent commands, returning (seconds, failures, commands_run)"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.join(ROOT, 'src'), env.get('PYTHONPATH')]))
+    env['KWBANK_NO_DAEMON'] = '1'
+
+    procs = []
+    start = time.perf_counter()
+    for worker in range(workers):
+        csv_path = os.path.join(workdir, f"worker_{worker}.csv")
+        write_keyword_file(csv_path, worker, count)
+        commands = [
+            ['import-keywords', csv_path, '--brand', 'Stress', '--no-auto-detect-intent'],
+            ['add-brand', '--name', f"Brand{worker}", '--prefix', f"B{worker}"],
+        ]
+        for args in commands:
+            procs.append(subprocess.Popen(
+                [sys.executable, '-m', 'kwbank.cli'] + args,
+                cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+            ))
+
+    failures = []
+    for proc in procs:
+        _, stderr = proc.communicate()
+        if proc.returncode != 0:
+            failures.append(stderr.strip()[-500:])
+    return time.perf_counter() - start, failures, len(procs)
+
+
+def check(workdir, workers, count, commands_run):
+    """Validate the resulting files, returning a list of problems"""
+    problems = []
+    try:
+        with open(os.path.join(workdir, 'data', 'keyword_bank.json')) as f:
+            bank = json.load(f)
+        with open(os.path.join(workdir, 'data', 'audit_trail.json')) as f:
+            audit = json.load(f)
+    except (OSError, ValueError) as e:
+        return [f"unreadable data file: {e}"]
+
+    texts = [k['text'] for k in bank['keywords']]
+    expected = SHARED_KEYWORDS + workers * count
+    if len(texts) != expected:
+        problems.append(f"expected {expected} keywords, found {len(texts)}")
+    if len(set(texts)) != len(texts):
+        problems.append(f"{len(texts) - len(set(texts))} duplicate keywords stored")
+    ids = [k['keyword_id'] for k in bank['keywords']]
+    if len(set(ids)) != len(ids):
+        problems.append("keyword IDs are not unique")
+
+    brands = {b['name'] for b in bank['brands']}
+    missing = {f"Brand{w}" for w in range(workers)} - brands
+    if missing:
+        problems.append(f"missing brands: {sorted(missing)}")
+
+    if len(audit) != commands_run:
+        problems.append(f"expected {commands_run} audit entries, found {len(audit)}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent importers per round')
+    parser.add_argument('--keywords', type=int, default=500, help='Unique keywords per importer')
+    parser.add_argument('--rounds', type=int, default=3, help='Rounds, each on a fresh bank')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary data directories')
+    args = parser.parse_args()
+
+    ok = True
+    for round_no in range(1, args.rounds + 1):
+        workdir = tempfile.mkdtemp(prefix='kwbank_stress_')
+        try:
+            seconds, failures, commands_run = run_round(workdir, args.workers, args.keywords)
+            problems = [f"command failed: {f}" for f in failures]
+            if not failures:
+                problems += check(workdir, args.workers, args.keywords, commands_run)
+        finally:
+            if not args.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        status = 'OK' if not problems else 'FAIL'
+        print(f"Round {round_no}: {commands_run} processes in {seconds:.2f}s  {status}")
+        for problem in problems:
+            print(f"  - {problem}")
+        ok = ok and not problems
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""
+Synthetic keyword bank generator for benchmarks
+
+Generates search terms that look like Amazon search-term reports: a few
+head product terms account for most keywords (Zipf-distributed), terms are
+mostly two to four words with a long tail of longer ones, and a share of
+them are near-duplicates of earlier terms (typos, plurals, reordered or
+re-punctuated words) so that dedupe code has realistic work to do. About
+10% of keywords are negatives, some of which conflict with positives.
+
+Output is deterministic for a given seed.
+
+Usage:
+    python benchmarks/synthetic.py --keywords 100000 --output data/keyword_bank.json [--seed 42]
+"""
+import argparse
+import os
+import random
+import sys
+from bisect import bisect
+from datetime import datetime
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from kwbank.keyword_bank import KeywordBank  # noqa: E402
+from kwbank.models import (  # noqa: E402
+    AdGroup, Brand, Campaign, Keyword, KeywordType, MatchType
+)
+
+BRANDS = ['Nike', 'Adidas', 'Puma', 'Reebok', 'Asics', 'Brooks', 'Hoka', 'Saucony']
+
+# Product terms, most searched first
+PRODUCTS = [
+    'running shoes', 'sneakers', 'shoes', 'trail running shoes', 'socks', 'shorts',
+    'leggings', 'hoodie', 't shirt', 'joggers', 'sports bra', 'backpack', 'jacket',
+    'training shoes', 'walking shoes', 'slides', 'sandals', 'tennis shoes',
+    'basketball shoes', 'soccer cleats', 'track pants', 'windbreaker', 'gym bag',
+    'water bottle', 'cap', 'headband', 'compression socks', 'running vest',
+    'rain jacket', 'sweatpants', 'tank top', 'running belt', 'insoles', 'boots',
+    'hiking shoes', 'golf shoes', 'volleyball shoes', 'wristband', 'beanie', 'gloves',
+]
+AUDIENCES = ['men', 'women', 'mens', 'womens', 'kids', 'boys', 'girls', 'toddler', 'unisex']
+COLORS = ['black', 'white', 'red', 'blue', 'grey', 'pink', 'green', 'navy', 'beige',
+          'orange', 'purple', 'yellow', 'triple black', 'white and black']
+MODIFIERS = ['lightweight', 'waterproof', 'breathable', 'cushioned', 'wide', 'slip on',
+             'high top', 'low top', 'non slip', 'wide toe box', 'arch support', 'memory foam',
+             'vegan', 'leather', 'mesh', 'knit', 'zero drop', 'carbon plate', 'stability',
+             'neutral', 'minimalist', 'reflective', 'quick dry', 'thermal', 'seamless']
+USES = ['for running', 'for walking', 'for gym', 'for plantar fasciitis', 'for flat feet',
+        'for standing all day', 'for nurses', 'for travel', 'for marathon', 'for trail',
+        'for wide feet', 'for overpronation', 'for tennis', 'for hiking', 'for work']
+SIZES = [f"size {s}" for s in ('5', '6', '7', '7.5', '8', '8.5', '9', '9.5', '10', '10.5',
+                               '11', '12', '13', '14', 'xs', 's', 'm', 'l', 'xl', 'xxl')]
+CONVERSION = ['buy', 'cheap', 'sale', 'deal', 'discount', 'best price', 'clearance', 'on sale']
+CONSIDERATION = ['best', 'top rated', 'review', 'vs', 'comparison', 'most comfortable']
+AWARENESS = ['how to clean', 'what are', 'how to lace', 'how to choose', 'guide to']
+NEGATIVE_TERMS = ['free', 'used', 'repair', 'fake', 'replica', 'cheapest', 'diy', 'pattern',
+                  'coloring page', 'clipart', 'rental', 'job', 'salary', 'stock price',
+                  'return policy', 'customer service', 'coupon code']
+
+MATCH_TYPES = [(MatchType.EXACT, 0.5), (MatchType.PHRASE, 0.3), (MatchType.BROAD, 0.2)]
+
+
+def _zipf_weights(count: int, exponent: float = 1.1) -> List[float]:
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+class SearchTermGenerator:
+    """
+    Random Amazon-like search terms
+
+    Args:
+        seed: Random seed
+        variant_rate: Share of terms derived from an earlier term by a small edit
+    """
+
+    def __init__(self, seed: int = 42, variant_rate: float = 0.15):
+        self.random = random.Random(seed)
+        self.variant_rate = variant_rate
+        self._product_weights = _zipf_weights(len(PRODUCTS))
+        self._recent: List[str] = []
+
+    def _product(self) -> str:
+        weights = self._product_weights
+        return PRODUCTS[bisect(weights, self.random.random() * weights[-1])]
+
+    def _fresh(self, brand: Optional[str]) -> str:
+        rnd = self.random.random
+        choice = self.random.choice
+        words = []
+        roll = rnd()
+        if roll < 0.08:
+            words.append(choice(CONVERSION))
+        elif roll < 0.14:
+            words.append(choice(CONSIDERATION))
+        elif roll < 0.17:
+            words.append(choice(AWARENESS))
+        if brand and rnd() < 0.35:
+            words.append(brand.lower())
+        if rnd() < 0.2:
+            words.append(choice(COLORS))
+        # Geometric number of extra modifiers: most terms have none or one
+        while rnd() < 0.25 and len(words) < 5:
+            words.append(choice(MODIFIERS))
+        if rnd() < 0.3:
+            words.append(choice(AUDIENCES))
+        words.append(self._product())
+        if rnd() < 0.15:
+            words.append(choice(USES))
+        if rnd() < 0.1:
+            words.append(choice(SIZES))
+        if rnd() < 0.1:
+            # Long tail: model names and numbers
+            words.append(f"{choice('abcdefghjkmnprstvxz')}{self.random.randint(1, 9999)}")
+        return ' '.join(words)
+
+    def _variant(self, term: str) -> str:
+        """Near-duplicate of a term: typo, plural, reorder or punctuation"""
+        rnd = self.random
+        kind = rnd.randrange(5)
+        if kind == 0 and len(term) > 4:
+            # Typo: drop, double or swap a character
+            i = rnd.randrange(1, len(term) - 1)
+            edit = rnd.randrange(3)
+            if edit == 0:
+                return term[:i] + term[i + 1:]
+            if edit == 1:
+                return term[:i] + term[i] + term[i:]
+            return term[:i - 1] + term[i] + term[i - 1] + term[i + 1:]
+        if kind == 1:
+            return term[:-1] if term.endswith('s') else term + 's'
+        words = term.split()
+        if kind == 2 and len(words) > 1:
+            i = rnd.randrange(len(words) - 1)
+            words[i], words[i + 1] = words[i + 1], words[i]
+            return ' '.join(words)
+        if kind == 3:
+            return term.replace('mens', "men's").replace('womens', "women's").replace(' ', '-', 1)
+        return term.title() if rnd.random() < 0.5 else term.upper()
+
+    def term(self, brand: Optional[str] = None) -> str:
+        """Generate one search term"""
+        if self._recent and self.random.random() < self.variant_rate:
+            return self._variant(self.random.choice(self._recent))
+        term = self._fresh(brand)
+        if len(self._recent) < 5000:
+            self._recent.append(term)
+        else:
+            self._recent[self.random.randrange(5000)] = term
+        return term
+
+    def negative_term(self) -> str:
+        """Generate a negative keyword"""
+        if self._recent and self.random.random() < 0.05:
+            # Conflicts with a positive keyword
+            return self.random.choice(self._recent)
+        choice = self.random.choice
+        words = [choice(NEGATIVE_TERMS)]
+        if self.random.random() < 0.3:
+            words.append(choice(COLORS + AUDIENCES + MODIFIERS))
+        if self.random.random() < 0.8:
+            words.append(self._product())
+        if self.random.random() < 0.3:
+            words.append(choice(SIZES + USES))
+        return ' '.join(words)
+
+
+def generate_keywords(count: int, seed: int = 42, brands: Optional[List[str]] = None,
+                      negative_rate: float = 0.1, variant_rate: float = 0.15,
+                      unique: bool = True, start_id: int = 1) -> List[Keyword]:
+    """
+    Generate keywords with realistic search terms
+
+    With unique, no two keywords share a dedupe key (normalized text, type,
+    brand), as in a bank filled by the importers. IDs are assigned from
+    start_id; pass start_id=0 for unsaved keywords.
+    """
+    brands = brands or BRANDS
+    generator = SearchTermGenerator(seed, variant_rate)
+    rnd = generator.random
+    brand_weights = _zipf_weights(len(brands), 0.8)
+    match_weights = list(accumulate(w for _, w in MATCH_TYPES))
+    created_at = datetime(2024, 1, 1)
+    seen = set()
+    keywords = []
+    attempts = 0
+    while len(keywords) < count:
+        attempts += 1
+        if attempts > count * 20 + 1000:
+            raise RuntimeError(f"Could only generate {len(keywords)} unique keywords")
+        brand = brands[bisect(brand_weights, rnd.random() * brand_weights[-1])]
+        if rnd.random() < negative_rate:
+            keyword_type, text = KeywordType.NEGATIVE, generator.negative_term()
+        else:
+            keyword_type, text = KeywordType.POSITIVE, generator.term(brand)
+        keyword = Keyword(
+            text=text,
+            brand=brand,
+            match_type=MATCH_TYPES[bisect(match_weights, rnd.random() * match_weights[-1])][0],
+            keyword_type=keyword_type,
+            created_at=created_at,
+        )
+        if unique:
+            key = (keyword.normalized_text, keyword_type, brand)
+            if key in seen:
+                continue
+            seen.add(key)
+        keyword.keyword_id = start_id + len(keywords) if start_id else 0
+        keywords.append(keyword)
+    return keywords
+
+
+def generate_brands(brands: Optional[List[str]] = None) -> List[Brand]:
+    """Brand records for the generated keywords"""
+    return [
+        Brand(brand_id=name.lower(), name=name, prefix=name[:3].upper(),
+              default_bid=round(0.5 + 0.1 * i, 2), created_at=datetime(2024, 1, 1))
+        for i, name in enumerate(brands or BRANDS)
+    ]
+
+
+def generate_campaigns(keywords: List[Keyword], keywords_per_ad_group: int = 50,
+                       ad_groups_per_campaign: int = 20) -> List[Campaign]:
+    """Campaigns grouping keywords by brand into ad groups with synthetic ASINs"""
+    by_brand: Dict[str, List[Keyword]] = {}
+    for keyword in keywords:
+        by_brand.setdefault(keyword.brand, []).append(keyword)
+
+    campaigns = []
+    asin = 0
+    for brand, brand_keywords in by_brand.items():
+        campaign = None
+        for start in range(0, len(brand_keywords), keywords_per_ad_group):
+            if campaign is None or len(campaign.ad_groups) >= ad_groups_per_campaign:
+                campaign = Campaign(name=f"{brand}_SP_{len(campaigns) + 1:05d}", brand=brand,
+                                    created_at=datetime(2024, 1, 1))
+                campaigns.append(campaign)
+            asin += 1
+            ad_group = AdGroup(name=f"AG_{asin:07d}", asin=f"B{asin:09d}")
+            for keyword in brand_keywords[start:start + keywords_per_ad_group]:
+                ad_group.add_keyword(keyword)
+            campaign.add_ad_group(ad_group)
+    return campaigns
+
+
+def iter_sizes(spec: str) -> Iterator[int]:
+    """Parse a size list like '10k,100k,1m'"""
+    for part in spec.split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        factor = {'k': 1_000, 'm': 1_000_000}.get(part[-1], 1)
+        yield int(float(part[:-1] if factor > 1 else part) * factor)
+
+
+def build_bank(path: str, count: int, seed: int = 42) -> KeywordBank:
+    """Write a bank with `count` generated keywords (and brands) to path"""
+    bank = KeywordBank(path)
+    bank.keywords = generate_keywords(count, seed)
+    bank.brands = generate_brands()
+    bank._index_keyword_ids()
+    # Persist the counters, as a bank saved by kwbank would
+    bank.refresh_keyword_counts()
+    bank.save()
+    return bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--keywords', default='100k', help='Number of keywords, e.g. 10k, 100k or 1m')
+    parser.add_argument('--output', required=True, help='Bank file to write (.json or .kwb)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    count = next(iter_sizes(args.keywords))
+    bank = build_bank(args.output, count, args.seed)
+    print(f"Wrote {bank.keyword_count:,} keywords to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
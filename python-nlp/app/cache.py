@@ -0,0 +1,300 @@
+"""
+Result caches for the NLP service
+
+Re-imports of the same reports resubmit mostly identical keyword sets, so
+the service caches both pairwise similarity scores, keyed by (algorithm,
+text1, text2), and whole dedupe results, keyed by a hash of the request
+content. Caches are LRU-evicted within a memory budget; dedupe results can
+also be written through to a SQLite file so they survive restarts.
+
+Configuration (environment variables):
+    NLP_CACHE_MAX_MB: memory for dedupe results (default 256, 0 disables)
+    NLP_PAIR_CACHE_MAX_MB: memory for pairwise scores (default 128, 0 disables)
+    NLP_CACHE_DIR: directory of the on-disk result store (default: none)
+    NLP_CACHE_DISK_MAX_MB: size budget of the on-disk store (default 1024)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from . import metrics
+
+CACHE_REQUESTS = metrics.registry.counter(
+    'nlp_cache_requests_total', 'Cache lookups by result (hit, disk_hit, miss)', ('cache', 'result'))
+CACHE_EVICTIONS = metrics.registry.counter(
+    'nlp_cache_evictions_total', 'Entries evicted to stay within the memory budget', ('cache',))
+CACHE_ENTRIES = metrics.registry.gauge(
+    'nlp_cache_entries', 'Entries held in memory', ('cache',))
+CACHE_BYTES = metrics.registry.gauge(
+    'nlp_cache_bytes', 'Estimated memory used by cached entries', ('cache',))
+
+# Approximate per-entry overhead of the key tuple, value and dict node
+ENTRY_OVERHEAD = 200
+
+_MISSING = object()
+
+
+def _env_mb(name: str, default: float) -> int:
+    return int(float(os.environ.get(name, default)) * 1024 * 1024)
+
+
+class DiskStore:
+    """
+    SQLite-backed key/value store for JSON values
+
+    Entries not read for the longest time are pruned when the stored values
+    exceed max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return _MISSING
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        payload = json.dumps(value, separators=(',', ':'))
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time())
+            )
+            self._size += len(payload) - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._prune()
+
+    def _prune(self):
+        """Delete least recently read entries down to 90% of the budget"""
+        target = self.max_bytes * 0.9
+        rows = self._db.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._size <= target:
+                break
+            doomed.append((key,))
+            self._size -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {'path': self.path, 'entries': entries, 'bytes': self._size, 'max_bytes': self.max_bytes}
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by an estimated memory size
+
+    Args:
+        name: Cache name used in metrics
+        max_bytes: Memory budget; 0 disables the cache
+        disk: Optional store that entries are written through to and read
+            back from after eviction or a restart (keys must be strings)
+        sizeof: Function estimating the size of a (key, value) entry
+    """
+
+    def __init__(self, name: str, max_bytes: int, disk: Optional[DiskStore] = None,
+                 sizeof: Optional[Callable[[Hashable, Any], int]] = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self._sizeof = sizeof or self._estimate
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is not None:
+            CACHE_REQUESTS.inc(cache=self.name, result='hit')
+            return entry[0]
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not _MISSING:
+                self.disk_hits += 1
+                CACHE_REQUESTS.inc(cache=self.name, result='disk_hit')
+                self._store(key, value, self._sizeof(key, value))
+                return value
+        self.misses += 1
+        CACHE_REQUESTS.inc(cache=self.name, result='miss')
+        return default
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None):
+        if not self.enabled:
+            return
+        self._store(key, value, size if size is not None else self._sizeof(key, value))
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def get_many(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        """
+        Look up many keys under one lock acquisition (memory only)
+        Used by hot loops, where locking per key would cost a good part of
+        the computation being cached
+        """
+        if not self.enabled or not keys:
+            return {}
+        found = {}
+        with self._lock:
+            entries = self._entries
+            for key in keys:
+                entry = entries.get(key)
+                if entry is not None:
+                    entries.move_to_end(key)
+                    found[key] = entry[0]
+            hits = len(found)
+            misses = len(keys) - hits
+            self.hits += hits
+            self.misses += misses
+        if hits:
+            CACHE_REQUESTS.inc(hits, cache=self.name, result='hit')
+        if misses:
+            CACHE_REQUESTS.inc(misses, cache=self.name, result='miss')
+        return found
+
+    def put_many(self, items: Iterable[Tuple[Hashable, Any]]):
+        """Store many entries (memory only) under one lock acquisition"""
+        if not self.enabled:
+            return
+        sizeof = self._sizeof
+        with self._lock:
+            for key, value in items:
+                self._insert(key, value, sizeof(key, value))
+            self._evict()
+
+    def _store(self, key: Hashable, value: Any, size: int):
+        with self._lock:
+            self._insert(key, value, size)
+            self._evict()
+
+    def _insert(self, key: Hashable, value: Any, size: int):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+
+    def _evict(self):
+        evicted = 0
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            evicted += 1
+        if evicted:
+            CACHE_EVICTIONS.inc(evicted, cache=self.name)
+        CACHE_ENTRIES.set(len(self._entries), cache=self.name)
+        CACHE_BYTES.set(self._bytes, cache=self.name)
+
+    @staticmethod
+    def _estimate(key: Hashable, value: Any) -> int:
+        """Rough memory size of an entry"""
+        size = ENTRY_OVERHEAD
+        for part in (key if isinstance(key, tuple) else (key,)):
+            if isinstance(part, str):
+                size += len(part) + 49
+        if isinstance(value, (list, dict, str)):
+            size += len(json.dumps(value, separators=(',', ':')))
+        return size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._evict()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        stats = {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else None,
+        }
+        if self.disk is not None:
+            stats['disk'] = self.disk.stats()
+        return stats
+
+
+def request_key(*parts: Any, texts: Iterable[str]) -> str:
+    """Content hash of a request: its parameters plus its texts, in order"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(parts).encode('utf-8'))
+    for text in texts:
+        digest.update(b'\x00')
+        digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _disk_store() -> Optional[DiskStore]:
+    directory = os.environ.get('NLP_CACHE_DIR')
+    if not directory:
+        return None
+    return DiskStore(os.path.join(directory, 'dedupe_results.sqlite3'), _env_mb('NLP_CACHE_DISK_MAX_MB', 1024))
+
+
+def _pair_size(key: tuple, value: float) -> int:
+    return ENTRY_OVERHEAD + len(key[1]) + len(key[2])
+
+
+# Whole dedupe results, keyed by request_key()
+results = LRUCache('dedupe_results', _env_mb('NLP_CACHE_MAX_MB', 256), _disk_store())
+# Pairwise similarity scores, keyed by pair_key()
+pairs = LRUCache('pair_scores', _env_mb('NLP_PAIR_CACHE_MAX_MB', 128), sizeof=_pair_size)
+
+
+def pair_key(algorithm: str, text1: str, text2: str) -> tuple:
+    """Key of a pairwise score, ordered since both supported similarities are symmetric"""
+    return (algorithm, text1, text2) if text1 <= text2 else (algorithm, text2, text1)
+
+
+def stats() -> Dict[str, Any]:
+    return {'dedupe_results': results.stats(), 'pair_scores': pairs.stats()}
+
+
+def clear():
+    results.clear()
+    pairs.clear()
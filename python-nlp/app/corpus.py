@@ -0,0 +1,181 @@
+"""
+Resident per-brand keyword corpora
+
+Each brand's keywords are kept in memory with a character trigram index, so
+a new import can be deduplicated against the existing bank without sending
+the whole bank: only keywords sharing enough trigrams with a batch keyword
+are scored, which keeps the cost of a query proportional to the batch.
+
+Candidates are found with prefix filtering: a keyword sharing at least
+`min_overlap` of a query's trigrams must share one of its rarest
+(1 - min_overlap) trigrams, so only those posting lists are read.
+"""
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import metrics
+
+CORPUS_KEYWORDS = metrics.registry.gauge(
+    'nlp_corpus_keywords', 'Keywords held in resident corpora', ('brand',))
+CORPUS_CANDIDATES = metrics.registry.counter(
+    'nlp_corpus_candidates_total', 'Corpus keywords considered by the trigram index before scoring')
+
+# Share of a query's trigrams a keyword must have to be scored
+DEFAULT_MIN_OVERLAP = 0.5
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a text, padded so short texts have some"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Corpus:
+    """
+    Keywords of one brand with their trigram index
+
+    Keywords are identified by the caller's ids; loading an id again
+    replaces its text.
+    """
+
+    def __init__(self, name: str = ''):
+        self.name = name
+        self._texts: Dict[str, str] = {}
+        self._index: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def upsert(self, items: Iterable[Tuple[str, str]]) -> Tuple[int, int]:
+        """
+        Add or update (id, normalized_text) pairs
+
+        Returns:
+            (added, updated) counts
+        """
+        added = updated = 0
+        with self._lock:
+            for keyword_id, text in items:
+                old = self._texts.get(keyword_id)
+                if old == text:
+                    continue
+                if old is None:
+                    added += 1
+                else:
+                    self._unindex(keyword_id, old)
+                    updated += 1
+                self._texts[keyword_id] = text
+                for gram in trigrams(text):
+                    self._index.setdefault(gram, set()).add(keyword_id)
+        self._update_gauge()
+        return added, updated
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Remove keywords by id, returning how many were present"""
+        removed = 0
+        with self._lock:
+            for keyword_id in ids:
+                text = self._texts.pop(keyword_id, None)
+                if text is not None:
+                    self._unindex(keyword_id, text)
+                    removed += 1
+        self._update_gauge()
+        return removed
+
+    def _unindex(self, keyword_id: str, text: str):
+        for gram in trigrams(text):
+            postings = self._index.get(gram)
+            if postings is not None:
+                postings.discard(keyword_id)
+                if not postings:
+                    del self._index[gram]
+
+    def _update_gauge(self):
+        if self.name:
+            CORPUS_KEYWORDS.set(len(self._texts), brand=self.name)
+
+    def candidates(self, text: str, min_overlap: float = DEFAULT_MIN_OVERLAP) -> Set[str]:
+        """Ids of keywords that may share min_overlap of the text's trigrams"""
+        grams = trigrams(text)
+        required = max(1, math.ceil(min_overlap * len(grams)))
+        with self._lock:
+            # Keywords sharing `required` of the grams share one of the rarest len - required + 1
+            postings = sorted((self._index.get(gram, ()) for gram in grams), key=len)
+            found: Set[str] = set()
+            for ids in postings[:len(grams) - required + 1]:
+                found.update(ids)
+        return found
+
+    def matches(self, text: str, similarity: Callable[[str, str], float], threshold: float,
+                min_overlap: float = DEFAULT_MIN_OVERLAP,
+                exclude: Optional[str] = None) -> Tuple[List[Tuple[str, str, float]], int]:
+        """
+        Keywords whose similarity to text is at least threshold
+
+        Returns:
+            ([(id, normalized_text, score), ...] best first, candidates scored)
+        """
+        candidate_ids = self.candidates(text, min_overlap)
+        candidate_ids.discard(exclude)
+        ids = list(candidate_ids)
+        with self._lock:
+            texts = [self._texts[keyword_id] for keyword_id in ids]
+        scores = [similarity(text, other) for other in texts]
+        found = [
+            (keyword_id, other, score)
+            for keyword_id, other, score in zip(ids, texts, scores)
+            if score >= threshold
+        ]
+        found.sort(key=lambda match: (-match[2], match[0]))
+        CORPUS_CANDIDATES.inc(len(ids))
+        return found, len(ids)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'keywords': len(self._texts),
+                'trigrams': len(self._index),
+                'postings': sum(len(ids) for ids in self._index.values()),
+            }
+
+
+class CorpusStore:
+    """Resident corpora by brand"""
+
+    def __init__(self):
+        self._corpora: Dict[str, Corpus] = {}
+        self._lock = threading.Lock()
+
+    def get(self, brand: str) -> Optional[Corpus]:
+        return self._corpora.get(brand)
+
+    def get_or_create(self, brand: str) -> Corpus:
+        with self._lock:
+            corpus = self._corpora.get(brand)
+            if corpus is None:
+                corpus = self._corpora[brand] = Corpus(brand)
+            return corpus
+
+    def replace(self, brand: str, items: Iterable[Tuple[str, str]]) -> Corpus:
+        """Build a new corpus for the brand and swap it in once complete"""
+        corpus = Corpus(brand)
+        corpus.upsert(items)
+        with self._lock:
+            self._corpora[brand] = corpus
+        return corpus
+
+    def drop(self, brand: str) -> bool:
+        with self._lock:
+            corpus = self._corpora.pop(brand, None)
+        if corpus is None:
+            return False
+        CORPUS_KEYWORDS.set(0, brand=brand)
+        return True
+
+    def brands(self) -> Dict[str, int]:
+        return {brand: len(corpus) for brand, corpus in sorted(self._corpora.items())}
+
+
+corpora = CorpusStore()
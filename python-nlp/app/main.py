@@ -1,13 +1,18 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import jellyfish
 
+from . import cache, metrics, similarity as token_similarity
+from .corpus import DEFAULT_MIN_OVERLAP, Corpus, corpora
+
 app = FastAPI(
     title="KWBank NLP Service",
     description="Natural Language Processing service for keyword deduplication and analysis",
     version="1.0.0"
 )
+app.add_middleware(metrics.MetricsMiddleware)
 
 class KeywordItem(BaseModel):
     id: str
@@ -28,6 +33,132 @@ class DedupeResponse(BaseModel):
     duplicate_groups: List[DuplicateGroup]
     total_keywords: int
     total_duplicates: int
+    cached: bool = False
+
+class CorpusKeywordsRequest(BaseModel):
+    keywords: List[KeywordItem]
+
+class CorpusRemoveRequest(BaseModel):
+    ids: List[str]
+
+class CorpusUpdateResponse(BaseModel):
+    brand: str
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    total_keywords: int
+
+class CorpusQueryRequest(BaseModel):
+    keywords: List[KeywordItem]
+    threshold: Optional[float] = 0.85
+    algorithm: Optional[str] = "jaro_winkler"
+    min_overlap: Optional[float] = DEFAULT_MIN_OVERLAP
+
+class KeywordMatch(BaseModel):
+    id: str
+    normalized_text: str
+    similarity: float
+
+class QueryResult(BaseModel):
+    keyword: KeywordItem
+    corpus_matches: List[KeywordMatch]
+    batch_matches: List[KeywordMatch]
+
+class CorpusQueryResponse(BaseModel):
+    results: List[QueryResult]
+    total_keywords: int
+    total_duplicates: int
+    corpus_keywords: int
+    comparisons: int
+
+def _levenshtein_similarity(text1: str, text2: str) -> float:
+    # Convert levenshtein distance to similarity
+    distance = jellyfish.levenshtein_distance(text1, text2)
+    max_len = max(len(text1), len(text2))
+    return 1 - (distance / max_len) if max_len > 0 else 0
+
+SIMILARITY_FUNCTIONS = {
+    "jaro_winkler": jellyfish.jaro_winkler_similarity,
+    "levenshtein": _levenshtein_similarity,
+    "token_set": token_similarity.token_set_ratio,
+    "jaccard": token_similarity.jaccard_similarity,
+    "jaccard_char": token_similarity.char_jaccard_similarity,
+    "minhash": token_similarity.minhash_similarity,
+}
+
+def _similarity_function(algorithm: str):
+    try:
+        return SIMILARITY_FUNCTIONS[algorithm]
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported algorithm: {algorithm}"
+        )
+
+def _row_scores(similarity, algorithm: str, text: str, others: List[str]) -> List[float]:
+    """
+    Scores of one text against others, served from the pair cache where possible.
+    
+    Looked up and stored once per row so the cache lock is not taken per pair.
+    """
+    if not cache.pairs.enabled:
+        return [similarity(text, other) for other in others]
+    keys = [cache.pair_key(algorithm, text, other) for other in others]
+    known = cache.pairs.get_many(keys)
+    scores = []
+    computed = []
+    for key, other in zip(keys, others):
+        score = known.get(key)
+        if score is None:
+            score = similarity(text, other)
+            computed.append((key, score))
+        scores.append(score)
+    cache.pairs.put_many(computed)
+    return scores
+
+def _find_duplicate_groups(texts: List[str], threshold: float, algorithm: str):
+    """
+    Greedy grouping of texts by similarity.
+    
+    Returns (groups, comparisons), where groups are
+    (representative position, [(duplicate position, score), ...]).
+    """
+    similarity = _similarity_function(algorithm)
+    groups = []
+    processed = set()
+    comparisons = 0
+    
+    # Token-based algorithms only score the texts found through their index
+    index = None
+    if algorithm in token_similarity.INDEXED_ALGORITHMS:
+        index = token_similarity.CandidateIndex(algorithm, threshold)
+        for j, text in enumerate(texts):
+            index.add(j, text)
+    
+    for i, text in enumerate(texts):
+        if i in processed:
+            continue
+        
+        if index is None:
+            candidates = [j for j in range(len(texts)) if j != i and j not in processed]
+        else:
+            candidates = sorted(j for j in index.candidates(text) if j != i and j not in processed)
+        comparisons += len(candidates)
+        scores = _row_scores(similarity, algorithm, text, [texts[j] for j in candidates])
+        
+        duplicates = []
+        for j, score in zip(candidates, scores):
+            # Identical texts are exact duplicates, not fuzzy ones (reordered
+            # words can still score 1.0 with the token-based algorithms)
+            if score >= threshold and texts[j] != text:
+                duplicates.append((j, score))
+                processed.add(j)
+        
+        if duplicates:
+            groups.append((i, duplicates))
+            processed.add(i)
+    
+    return groups, comparisons
 
 @app.get("/")
 def read_root():
@@ -41,6 +172,16 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Service metrics in the Prometheus text format.
+    
+    Async so that it runs on the event loop and can sample the thread pool
+    used by the sync endpoints.
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.post("/dedupe", response_model=DedupeResponse)
 def deduplicate_keywords(request: DedupeRequest):
     """
@@ -49,10 +190,21 @@ def deduplicate_keywords(request: DedupeRequest):
     Supported algorithms:
     - jaro_winkler: Jaro-Winkler similarity (default)
     - levenshtein: Levenshtein distance
+    - token_set: Levenshtein similarity of the sorted word sets (word order ignored)
+    - jaccard: Jaccard similarity of the word sets
+    - jaccard_char: Jaccard similarity of character 3-shingles
+    - minhash: MinHash estimate of the character 3-shingle Jaccard similarity
+    
+    The token-based algorithms only score keywords found through an inverted
+    word/shingle index or LSH buckets instead of every pair.
+    
+    Results are cached by request content (algorithm, threshold and the
+    normalized texts in request order).
     """
     keywords = request.keywords
     threshold = request.threshold
     algorithm = request.algorithm
+    metrics.DEDUPE_KEYWORDS.observe(len(keywords), endpoint="dedupe")
     
     if not keywords:
         return DedupeResponse(
@@ -61,60 +213,33 @@ def deduplicate_keywords(request: DedupeRequest):
             total_duplicates=0
         )
     
-    # Find duplicates using fuzzy matching
-    duplicate_groups = []
-    processed = set()
+    _similarity_function(algorithm)
+    texts = [kw.normalized_text for kw in keywords]
+    key = cache.request_key(algorithm, threshold, texts=texts)
+    groups = cache.results.get(key)
+    cached = groups is not None
     
-    for i, kw1 in enumerate(keywords):
-        if kw1.id in processed:
-            continue
-            
-        group_duplicates = []
-        scores = []
-        
-        for j, kw2 in enumerate(keywords):
-            if i == j or kw2.id in processed:
-                continue
-                
-            # Calculate similarity
-            if algorithm == "jaro_winkler":
-                similarity = jellyfish.jaro_winkler_similarity(
-                    kw1.normalized_text, 
-                    kw2.normalized_text
-                )
-            elif algorithm == "levenshtein":
-                # Convert levenshtein distance to similarity
-                distance = jellyfish.levenshtein_distance(
-                    kw1.normalized_text,
-                    kw2.normalized_text
-                )
-                max_len = max(len(kw1.normalized_text), len(kw2.normalized_text))
-                similarity = 1 - (distance / max_len) if max_len > 0 else 0
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported algorithm: {algorithm}"
-                )
-            
-            if similarity >= threshold and similarity < 1.0:
-                group_duplicates.append(kw2)
-                scores.append(similarity)
-                processed.add(kw2.id)
-        
-        if group_duplicates:
-            duplicate_groups.append(DuplicateGroup(
-                representative=kw1,
-                duplicates=group_duplicates,
-                similarity_scores=scores
-            ))
-            processed.add(kw1.id)
+    if not cached:
+        groups, comparisons = _find_duplicate_groups(texts, threshold, algorithm)
+        cache.results.put(key, groups)
+        metrics.COMPARISONS.inc(comparisons, endpoint="dedupe", algorithm=algorithm)
     
+    duplicate_groups = [
+        DuplicateGroup(
+            representative=keywords[i],
+            duplicates=[keywords[j] for j, _ in duplicates],
+            similarity_scores=[score for _, score in duplicates]
+        )
+        for i, duplicates in groups
+    ]
     total_duplicates = sum(len(group.duplicates) for group in duplicate_groups)
+    metrics.DUPLICATES.inc(total_duplicates, endpoint="dedupe")
     
     return DedupeResponse(
         duplicate_groups=duplicate_groups,
         total_keywords=len(keywords),
-        total_duplicates=total_duplicates
+        total_duplicates=total_duplicates,
+        cached=cached
     )
 
 @app.post("/similarity")
@@ -122,17 +247,13 @@ def calculate_similarity(text1: str, text2: str, algorithm: str = "jaro_winkler"
     """
     Calculate similarity score between two strings.
     """
-    if algorithm == "jaro_winkler":
-        score = jellyfish.jaro_winkler_similarity(text1, text2)
-    elif algorithm == "levenshtein":
-        distance = jellyfish.levenshtein_distance(text1, text2)
-        max_len = max(len(text1), len(text2))
-        score = 1 - (distance / max_len) if max_len > 0 else 0
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported algorithm: {algorithm}"
-        )
+    similarity = _similarity_function(algorithm)
+    key = cache.pair_key(algorithm, text1, text2)
+    score = cache.pairs.get(key)
+    if score is None:
+        score = similarity(text1, text2)
+        cache.pairs.put(key, score)
+        metrics.COMPARISONS.inc(endpoint="similarity", algorithm=algorithm)
     
     return {
         "text1": text1,
@@ -141,6 +262,121 @@ def calculate_similarity(text1: str, text2: str, algorithm: str = "jaro_winkler"
         "similarity": score
     }
 
+@app.get("/cache/stats")
+def cache_stats():
+    """Entries, memory use and hit rates of the result caches."""
+    return cache.stats()
+
+@app.delete("/cache")
+def clear_cache():
+    """Drop all cached results (including the on-disk store)."""
+    cache.clear()
+    return {"status": "cleared"}
+
+def _corpus_or_404(brand: str) -> Corpus:
+    corpus = corpora.get(brand)
+    if corpus is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No corpus loaded for brand: {brand}"
+        )
+    return corpus
+
+@app.get("/corpus")
+def list_corpora():
+    """Brands with a resident corpus and their keyword counts."""
+    return {"brands": corpora.brands()}
+
+@app.get("/corpus/{brand}")
+def corpus_stats(brand: str):
+    return {"brand": brand, **_corpus_or_404(brand).stats()}
+
+@app.put("/corpus/{brand}", response_model=CorpusUpdateResponse)
+def load_corpus(brand: str, request: CorpusKeywordsRequest):
+    """
+    Bulk-load a brand's keywords, replacing its corpus.
+    
+    The new corpus is indexed before it replaces the old one, so queries
+    keep being served during a reload.
+    """
+    corpus = corpora.replace(brand, ((kw.id, kw.normalized_text) for kw in request.keywords))
+    return CorpusUpdateResponse(brand=brand, added=len(corpus), total_keywords=len(corpus))
+
+@app.post("/corpus/{brand}/keywords", response_model=CorpusUpdateResponse)
+def upsert_corpus_keywords(brand: str, request: CorpusKeywordsRequest):
+    """Add keywords to a brand's corpus (creating it), or update their text by id."""
+    corpus = corpora.get_or_create(brand)
+    added, updated = corpus.upsert((kw.id, kw.normalized_text) for kw in request.keywords)
+    return CorpusUpdateResponse(brand=brand, added=added, updated=updated, total_keywords=len(corpus))
+
+@app.post("/corpus/{brand}/keywords/remove", response_model=CorpusUpdateResponse)
+def remove_corpus_keywords(brand: str, request: CorpusRemoveRequest):
+    corpus = _corpus_or_404(brand)
+    removed = corpus.remove(request.ids)
+    return CorpusUpdateResponse(brand=brand, removed=removed, total_keywords=len(corpus))
+
+@app.delete("/corpus/{brand}")
+def drop_corpus(brand: str):
+    if not corpora.drop(brand):
+        _corpus_or_404(brand)
+    return {"brand": brand, "status": "dropped"}
+
+@app.post("/corpus/{brand}/query", response_model=CorpusQueryResponse)
+def query_corpus(brand: str, request: CorpusQueryRequest):
+    """
+    Find duplicates of a batch of keywords in a brand's corpus and within the batch.
+    
+    Unlike /dedupe, exact matches (similarity 1.0) are reported too. Batch
+    matches list earlier keywords of the batch only, so the first of a set of
+    duplicates has none. Only keywords sharing at least min_overlap of a
+    keyword's character trigrams are scored; lower it for more recall at
+    the cost of more comparisons. The corpus is not modified.
+    """
+    corpus = _corpus_or_404(brand)
+    keywords = request.keywords
+    similarity = _similarity_function(request.algorithm)
+    metrics.DEDUPE_KEYWORDS.observe(len(keywords), endpoint="corpus_query")
+    
+    # Index the batch too, keyed by position, so within-batch matching isn't quadratic
+    batch = Corpus()
+    batch.upsert((str(i), kw.normalized_text) for i, kw in enumerate(keywords))
+    
+    results = []
+    comparisons = 0
+    for i, kw in enumerate(keywords):
+        corpus_matches, scored = corpus.matches(
+            kw.normalized_text, similarity, request.threshold, request.min_overlap
+        )
+        comparisons += scored
+        batch_found, scored = batch.matches(
+            kw.normalized_text, similarity, request.threshold, request.min_overlap, exclude=str(i)
+        )
+        comparisons += scored
+        batch_matches = [
+            KeywordMatch(id=keywords[int(j)].id, normalized_text=text, similarity=score)
+            for j, text, score in batch_found if int(j) < i
+        ]
+        if corpus_matches or batch_matches:
+            results.append(QueryResult(
+                keyword=kw,
+                corpus_matches=[
+                    KeywordMatch(id=keyword_id, normalized_text=text, similarity=score)
+                    for keyword_id, text, score in corpus_matches
+                ],
+                batch_matches=batch_matches
+            ))
+    
+    metrics.COMPARISONS.inc(comparisons, endpoint="corpus_query", algorithm=request.algorithm)
+    metrics.DUPLICATES.inc(len(results), endpoint="corpus_query")
+    
+    return CorpusQueryResponse(
+        results=results,
+        total_keywords=len(keywords),
+        total_duplicates=len(results),
+        corpus_keywords=len(corpus),
+        comparisons=comparisons
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
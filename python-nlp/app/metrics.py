@@ -0,0 +1,302 @@
+"""
+In-process metrics in the Prometheus text exposition format
+
+Counters, gauges and histograms are kept in memory and rendered by the
+/metrics endpoint, so the service can be inspected with curl and scraped
+by Prometheus without a client library. Each worker process keeps its own
+values; scrape workers individually (or run one worker) when using
+uvicorn --workers.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; dedupe requests range from milliseconds to minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (1, 10, 50, 100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines of the metric, one per label set (and bucket)"""
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Set of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'nlp_request_duration_seconds', 'Request latency in seconds', ('method', 'path', 'status'))
+REQUEST_SIZE = registry.histogram(
+    'nlp_request_size_bytes', 'Request body size in bytes', ('path',), SIZE_BUCKETS)
+RESPONSE_SIZE = registry.histogram(
+    'nlp_response_size_bytes', 'Response body size in bytes', ('path',), SIZE_BUCKETS)
+REQUESTS_IN_PROGRESS = registry.gauge(
+    'nlp_requests_in_progress', 'Requests being handled')
+BUSY_SECONDS = registry.counter(
+    'nlp_worker_busy_seconds_total', 'Time spent with at least one request in progress')
+THREADPOOL_IN_USE = registry.gauge(
+    'nlp_threadpool_threads_in_use', 'Worker threads running sync endpoints')
+THREADPOOL_CAPACITY = registry.gauge(
+    'nlp_threadpool_capacity', 'Maximum worker threads for sync endpoints')
+DEDUPE_KEYWORDS = registry.histogram(
+    'nlp_dedupe_keywords', 'Keywords per dedupe request', ('endpoint',), COUNT_BUCKETS)
+COMPARISONS = registry.counter(
+    'nlp_comparisons_total', 'Pairwise similarity comparisons computed', ('endpoint', 'algorithm'))
+DUPLICATES = registry.counter(
+    'nlp_duplicates_found_total', 'Duplicate keywords found', ('endpoint',))
+START_TIME = registry.gauge(
+    'nlp_process_start_time_seconds', 'Start time of the process since the epoch')
+START_TIME.set(time.time())
+
+
+class _BusyClock:
+    """Accumulates the time during which any request is in progress"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._since = 0.0
+
+    def enter(self):
+        with self._lock:
+            if self._active == 0:
+                self._since = time.perf_counter()
+            self._active += 1
+
+    def exit(self):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                BUSY_SECONDS.inc(time.perf_counter() - self._since)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, payload sizes and concurrency
+
+    Paths are labelled with their route template (unmatched paths as
+    'unmatched') so that path parameters don't create new series.
+    """
+
+    def __init__(self, app, skip_paths: Iterable[str] = ('/metrics',)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+        self._busy = _BusyClock()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+        received = [0]
+        sent = [0]
+
+        async def receive_wrapper():
+            message = await receive()
+            if message['type'] == 'http.request':
+                received[0] += len(message.get('body', b''))
+            return message
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            elif message['type'] == 'http.response.body':
+                sent[0] += len(message.get('body', b''))
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        self._busy.enter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            self._busy.exit()
+            REQUESTS_IN_PROGRESS.dec()
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            REQUEST_LATENCY.observe(time.perf_counter() - start,
+                                    method=scope['method'], path=path, status=str(status[0]))
+            REQUEST_SIZE.observe(received[0], path=path)
+            RESPONSE_SIZE.observe(sent[0], path=path)
+
+
+def update_threadpool_gauges():
+    """Sample the thread limiter used for sync endpoints (call from the event loop)"""
+    try:
+        import anyio.to_thread
+        limiter = anyio.to_thread.current_default_thread_limiter()
+    except (ImportError, RuntimeError):
+        return
+    THREADPOOL_IN_USE.set(limiter.borrowed_tokens)
+    THREADPOOL_CAPACITY.set(limiter.total_tokens)
+
+
+def render() -> str:
+    """Current metrics in the text exposition format"""
+    update_threadpool_gauges()
+    return registry.render()
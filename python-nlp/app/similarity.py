@@ -0,0 +1,169 @@
+"""
+Token-based similarity algorithms with candidate indexes
+
+Same algorithms as kwbank.similarity_index (the service doesn't depend on
+the kwbank package):
+
+    token_set     edit similarity of sorted word sets (word order ignored);
+                  candidates share a word or a word's first 4 letters
+    jaccard       Jaccard similarity of word sets; exact prefix filtering
+    jaccard_char  Jaccard similarity of character 3-shingles; exact prefix filtering
+    minhash       MinHash estimate of the 3-shingle Jaccard similarity; banded LSH
+"""
+import math
+import random
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Hashable, List, Sequence, Set, Tuple
+
+import jellyfish
+
+INDEXED_ALGORITHMS = ("token_set", "jaccard", "jaccard_char", "minhash")
+
+NUM_PERM = 64
+# Probability that a pair exactly at the threshold shares an LSH bucket
+LSH_RECALL = 0.95
+
+# Shingles are folded into codes below PRIME, then hashed with multiply-shift
+# hashing ((a * x + b) mod 2**64) >> 32, as kwbank.minhash does
+PRIME = 4294967291
+_CODE_BASE = 0x110000
+_MASK64 = (1 << 64) - 1
+_EMPTY = (1 << 32) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)]
+
+
+def char_shingles(text: str, k: int = 3) -> Set[str]:
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def jaccard(set1: Set[str], set2: Set[str]) -> float:
+    if not set1 and not set2:
+        return 1.0
+    intersection = len(set1 & set2)
+    return intersection / (len(set1) + len(set2) - intersection)
+
+
+def jaccard_similarity(text1: str, text2: str) -> float:
+    return jaccard(set(text1.split()), set(text2.split()))
+
+
+def char_jaccard_similarity(text1: str, text2: str) -> float:
+    return jaccard(char_shingles(text1), char_shingles(text2))
+
+
+def token_set_ratio(text1: str, text2: str) -> float:
+    """Levenshtein similarity of the sorted word sets, shared words first"""
+    tokens1, tokens2 = set(text1.split()), set(text2.split())
+    shared = sorted(tokens1 & tokens2)
+    sorted1 = " ".join(shared + sorted(tokens1 - tokens2))
+    sorted2 = " ".join(shared + sorted(tokens2 - tokens1))
+    max_len = max(len(sorted1), len(sorted2))
+    if max_len == 0:
+        return 1.0
+    return 1 - jellyfish.levenshtein_distance(sorted1, sorted2) / max_len
+
+
+def _shingle_code(shingle: str) -> int:
+    code = 0
+    for char in shingle:
+        code = (code * _CODE_BASE + ord(char)) % PRIME
+    return code
+
+
+@lru_cache(maxsize=65536)
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    """MinHash of the character 3-shingles (stable across processes)"""
+    codes = [_shingle_code(shingle) for shingle in char_shingles(text)]
+    if not codes:
+        return (_EMPTY,) * NUM_PERM
+    return tuple(min([((a * code + b) & _MASK64) >> 32 for code in codes]) for a, b in _PERMUTATIONS)
+
+
+def signature_similarity(signature1: Sequence[int], signature2: Sequence[int]) -> float:
+    return sum(1 for x, y in zip(signature1, signature2) if x == y) / len(signature1)
+
+
+def minhash_similarity(text1: str, text2: str) -> float:
+    return signature_similarity(minhash_signature(text1), minhash_signature(text2))
+
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM, recall: float = LSH_RECALL) -> Tuple[int, int]:
+    """(bands, rows) with the most rows that still reach `recall` at the threshold"""
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class CandidateIndex:
+    """Index of texts for one of the INDEXED_ALGORITHMS, returning candidates to score"""
+
+    def __init__(self, algorithm: str, threshold: float):
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self._postings: Dict[Hashable, Set[Hashable]] = defaultdict(set)
+        # Token counts (jaccard) or joined word lengths (token_set), for size filtering
+        self._sizes: Dict[Hashable, int] = {}
+        if algorithm == "minhash":
+            self.bands, self.rows = lsh_params(threshold)
+
+    def _tokens(self, text: str) -> List[Hashable]:
+        """Words, shingles or LSH band keys of a text"""
+        if self.algorithm == "minhash":
+            signature = minhash_signature(text)
+            rows = self.rows
+            return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+        if self.algorithm == "jaccard_char":
+            return list(char_shingles(text))
+        return list(set(text.split()))
+
+    def _size(self, tokens: List[Hashable]) -> int:
+        if self.algorithm == "token_set":
+            return sum(map(len, tokens)) + len(tokens) - 1 if tokens else 0
+        return len(tokens)
+
+    def _index_tokens(self, tokens: List[Hashable]) -> List[Hashable]:
+        if self.algorithm == "token_set":
+            # Word prefixes let 'shoe' find 'shoes' without sharing a word
+            return tokens + [word[:4] + "*" for word in tokens if len(word) > 4]
+        return tokens
+
+    def add(self, key: Hashable, text: str):
+        tokens = self._tokens(text)
+        self._sizes[key] = self._size(tokens)
+        for token in self._index_tokens(tokens):
+            self._postings[token].add(key)
+
+    def _size_filter(self, size: int, keys: Set[Hashable]) -> Set[Hashable]:
+        """Drop keys whose size rules out reaching the threshold"""
+        threshold = self.threshold
+        sizes = self._sizes
+        if self.algorithm == "token_set":
+            # Edit similarity >= t needs |L1 - L2| <= (1 - t) * max(L1, L2)
+            slack = 1 - threshold
+            return {key for key in keys if abs(size - sizes[key]) <= slack * max(size, sizes[key]) + 1e-9}
+        # Jaccard >= t needs t * |A| <= |B| <= |A| / t
+        low = threshold * size - 1e-9
+        high = size / threshold + 1e-9 if threshold > 0 else float("inf")
+        return {key for key in keys if low <= sizes[key] <= high}
+
+    def candidates(self, text: str) -> Set[Hashable]:
+        tokens = self._tokens(text)
+        postings = sorted((self._postings.get(token, ()) for token in self._index_tokens(tokens)), key=len)
+        probe = len(postings)
+        if self.algorithm in ("jaccard", "jaccard_char"):
+            # Jaccard >= t needs ceil(t * |tokens|) shared tokens, so every
+            # match shares one of the rarest |tokens| - required + 1
+            required = max(1, math.ceil(self.threshold * len(tokens) - 1e-9))
+            probe = len(postings) - required + 1
+        found: Set[Hashable] = set()
+        for keys in postings[:probe]:
+            found.update(keys)
+        if self.algorithm == "minhash":
+            return found
+        return self._size_filter(self._size(tokens), found)
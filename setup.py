@@ -10,6 +10,10 @@ setup(
         "click>=8.1.0",
         "pyyaml>=6.0",
     ],
+    extras_require={
+        "fast": ["orjson>=3.9"],
+        "lsh": ["numpy>=1.24"],
+    },
     entry_points={
         "console_scripts": [
             "kwbank=kwbank.cli:main",
@@ -2,8 +2,15 @@
 Amazon bulk CSV export functionality
 """
 import csv
-from typing import List
+import hashlib
+import json
+import os
+import time
+from itertools import groupby
+from typing import List, Dict, Iterator, Tuple, Optional
 from .models import Campaign, AdGroup, Keyword, KeywordType
+from .storage import atomic_write_json
+from . import instrumentation
 
 
 class AmazonBulkExporter:
@@ -53,8 +60,98 @@ class AmazonBulkExporter:
         "Product Ad State"
     ]
     
+    # Bulk sheet operations used by incremental exports
+    OPERATION_COLUMN = "Operation"
+    OPERATION_CREATE = "Create"
+    OPERATION_UPDATE = "Update"
+    OPERATION_ARCHIVE = "Archive"
+    
+    # Section title -> (columns, index of the state column)
+    SECTIONS = {
+        "Campaign": (CAMPAIGN_COLUMNS, 6),
+        "Ad Group": (AD_GROUP_COLUMNS, 3),
+        "Product Ad": (PRODUCT_AD_COLUMNS, 4),
+        "Keyword": (KEYWORD_COLUMNS, 4),
+        "Negative Keyword": (NEGATIVE_KEYWORD_COLUMNS, 4),
+    }
+    
+    @staticmethod
+    def iter_campaign_rows(campaign: Campaign,
+                           default_budget: float = 10.0,
+                           default_bid: float = 0.75) -> Iterator[Tuple[str, Tuple[str, ...], list]]:
+        """
+        Yield every bulk sheet row of a campaign in export order
+        
+        Each item is (section, entity_key, row). The entity key holds the
+        identifying values of the row (campaign, ad group, ASIN or keyword
+        text and match type) and stays stable when only bids, budgets or
+        states change.
+        """
+        yield "Campaign", (campaign.name,), [
+            campaign.name,
+            default_budget,
+            "",  # Start date (optional)
+            "",  # End date (optional)
+            "Manual",  # Targeting type
+            "",  # Portfolio name (optional)
+            "enabled",
+            "legacyForSales"  # Bidding strategy
+        ]
+        
+        for ad_group in campaign.ad_groups:
+            yield "Ad Group", (campaign.name, ad_group.name), [
+                campaign.name,
+                ad_group.name,
+                default_bid,
+                "enabled"
+            ]
+            
+            yield "Product Ad", (campaign.name, ad_group.name, ad_group.asin), [
+                campaign.name,
+                ad_group.name,
+                "",  # SKU (optional)
+                ad_group.asin,
+                "enabled"
+            ]
+            
+            for keyword in ad_group.keywords:
+                match_type = keyword.match_type.value
+                yield "Keyword", (campaign.name, ad_group.name, keyword.text, match_type), [
+                    campaign.name,
+                    ad_group.name,
+                    keyword.text,
+                    match_type,
+                    "enabled",
+                    default_bid
+                ]
+            
+            for keyword in ad_group.negative_keywords:
+                match_type = keyword.match_type.value
+                yield "Negative Keyword", (campaign.name, ad_group.name, keyword.text, match_type), [
+                    campaign.name,
+                    ad_group.name,
+                    keyword.text,
+                    match_type,
+                    "enabled"
+                ]
+    
+    @staticmethod
+    def _write_campaign(writer, campaign: Campaign, default_budget: float, default_bid: float) -> int:
+        """Write one campaign as consecutive bulk sheet sections, returning the entity rows written"""
+        rows = AmazonBulkExporter.iter_campaign_rows(campaign, default_budget, default_bid)
+        written = 0
+        # A new section starts whenever the entity type or the ad group changes
+        for (section, _), block in groupby(rows, key=lambda item: (item[0], item[1][:2])):
+            writer.writerow([section])
+            writer.writerow(AmazonBulkExporter.SECTIONS[section][0])
+            for _, _, row in block:
+                writer.writerow(row)
+                written += 1
+            writer.writerow([])
+        return written
+    
     @staticmethod
-    def export_campaign(campaign: Campaign, output_path: str, 
+    def export_campaign(campaign: Campaign, output_path: str,
                        default_budget: float = 10.0,
                        default_bid: float = 0.75):
         """
@@ -66,156 +163,217 @@ class AmazonBulkExporter:
             default_budget: Default daily budget for campaign
             default_bid: Default bid for keywords
         """
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        AmazonBulkExporter.export_campaigns([campaign], output_path, default_budget, default_bid)
+    
+    @staticmethod
+    def export_campaigns(campaigns: List[Campaign], output_path: str,
+                        default_budget: float = 10.0,
+                        default_bid: float = 0.75,
+                        campaign_settings: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Export multiple campaigns to a single CSV file
+        
+        campaign_settings optionally maps campaign names to their own
+        (daily budget, default bid), overriding the defaults.
+        """
+        campaign_settings = campaign_settings or {}
+        written = 0
+        with instrumentation.phase('export'), open(output_path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             
             # Write header section
             writer.writerow(["Amazon Advertising Bulk Sheet"])
             writer.writerow([])
             
-            # Export campaign
-            writer.writerow(["Campaign"])
-            writer.writerow(AmazonBulkExporter.CAMPAIGN_COLUMNS)
-            writer.writerow([
-                campaign.name,
-                default_budget,
-                "",  # Start date (optional)
-                "",  # End date (optional)
-                "Manual",  # Targeting type
-                "",  # Portfolio name (optional)
-                "enabled",
-                "legacyForSales"  # Bidding strategy
-            ])
-            writer.writerow([])
-            
-            # Export ad groups and keywords
-            for ad_group in campaign.ad_groups:
-                # Ad Group
-                writer.writerow(["Ad Group"])
-                writer.writerow(AmazonBulkExporter.AD_GROUP_COLUMNS)
-                writer.writerow([
-                    campaign.name,
-                    ad_group.name,
-                    default_bid,
-                    "enabled"
-                ])
-                writer.writerow([])
-                
-                # Product Ads
-                writer.writerow(["Product Ad"])
-                writer.writerow(AmazonBulkExporter.PRODUCT_AD_COLUMNS)
-                writer.writerow([
-                    campaign.name,
-                    ad_group.name,
-                    "",  # SKU (optional)
-                    ad_group.asin,
-                    "enabled"
-                ])
-                writer.writerow([])
-                
-                # Keywords
-                if ad_group.keywords:
-                    writer.writerow(["Keyword"])
-                    writer.writerow(AmazonBulkExporter.KEYWORD_COLUMNS)
-                    for keyword in ad_group.keywords:
-                        writer.writerow([
-                            campaign.name,
-                            ad_group.name,
-                            keyword.text,
-                            keyword.match_type.value,
-                            "enabled",
-                            default_bid
-                        ])
-                    writer.writerow([])
-                
-                # Negative Keywords
-                if ad_group.negative_keywords:
-                    writer.writerow(["Negative Keyword"])
-                    writer.writerow(AmazonBulkExporter.NEGATIVE_KEYWORD_COLUMNS)
-                    for keyword in ad_group.negative_keywords:
-                        writer.writerow([
-                            campaign.name,
-                            ad_group.name,
-                            keyword.text,
-                            keyword.match_type.value,
-                            "enabled"
-                        ])
-                    writer.writerow([])
+            for campaign in campaigns:
+                budget, bid = campaign_settings.get(campaign.name, (default_budget, default_bid))
+                written += AmazonBulkExporter._write_campaign(writer, campaign, budget, bid)
+        instrumentation.count('rows_written', written)
     
     @staticmethod
-    def export_campaigns(campaigns: List[Campaign], output_path: str,
-                        default_budget: float = 10.0,
-                        default_bid: float = 0.75):
-        """Export multiple campaigns to a single CSV file"""
+    def export_campaigns_incremental(campaigns: List[Campaign], output_path: str,
+                                     state: 'ExportState',
+                                     default_budget: float = 10.0,
+                                     default_bid: float = 0.75,
+                                     archive_missing: bool = False) -> Dict[str, int]:
+        """
+        Export only the rows that changed since the last export recorded in state
+        
+        Rows that are new are emitted with a create operation, rows whose
+        content changed with an update operation, and rows that disappeared
+        from a campaign with an archive operation. Campaigns whose fingerprint
+        is unchanged are skipped without diffing their rows.
+        
+        Args:
+            campaigns: Campaigns to export
+            output_path: Path to save CSV file
+            state: Fingerprints of the previous export, updated in place once
+                the file is written
+            default_budget: Default daily budget for campaigns
+            default_bid: Default bid for keywords
+            archive_missing: Archive campaigns known to state but absent from campaigns
+        
+        Returns:
+            Counts of rows per operation ('create', 'update', 'archive')
+            plus unchanged campaigns
+        """
+        start = time.perf_counter()
+        counts = {'create': 0, 'update': 0, 'archive': 0, 'unchanged_campaigns': 0}
+        # Changed rows grouped per section, keeping the bulk sheet section order
+        changes = {section: [] for section in AmazonBulkExporter.SECTIONS}
+        # Fingerprints of the exported campaigns (None for archived ones)
+        fingerprints: Dict[str, Optional[Tuple[str, Dict[str, str]]]] = {}
+        
+        def emit(section: str, row: list, operation: str):
+            changes[section].append(row + [operation])
+            counts[operation.lower()] += 1
+        
+        for campaign in campaigns:
+            rows = list(AmazonBulkExporter.iter_campaign_rows(campaign, default_budget, default_bid))
+            hashed = {
+                ExportState.row_key(section, key): (section, key, row, ExportState.row_hash(row))
+                for section, key, row in rows
+            }
+            digest = ExportState.campaign_digest(h for _, _, _, h in hashed.values())
+            previous = state.get(campaign.name)
+            
+            if previous and previous['digest'] == digest:
+                counts['unchanged_campaigns'] += 1
+                continue
+            
+            previous_rows = previous['rows'] if previous else {}
+            for row_key, (section, _, row, row_hash) in hashed.items():
+                old_hash = previous_rows.get(row_key)
+                if old_hash is None:
+                    emit(section, row, AmazonBulkExporter.OPERATION_CREATE)
+                elif old_hash != row_hash:
+                    emit(section, row, AmazonBulkExporter.OPERATION_UPDATE)
+            
+            # Archive rows that no longer exist, skipping children of archived ad groups
+            removed = [ExportState.split_row_key(k) for k in previous_rows if k not in hashed]
+            archived_groups = {key[:2] for section, key in removed if section == "Ad Group"}
+            for section, key in removed:
+                if section in ("Product Ad", "Keyword", "Negative Keyword") and key[:2] in archived_groups:
+                    continue
+                emit(section, AmazonBulkExporter._archive_row(section, key),
+                     AmazonBulkExporter.OPERATION_ARCHIVE)
+            
+            fingerprints[campaign.name] = (digest, {k: v[3] for k, v in hashed.items()})
+        
+        if archive_missing:
+            current = {c.name for c in campaigns}
+            for name in [n for n in state.campaign_names() if n not in current]:
+                emit("Campaign", AmazonBulkExporter._archive_row("Campaign", (name,)),
+                     AmazonBulkExporter.OPERATION_ARCHIVE)
+                fingerprints[name] = None
+        
         with open(output_path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
-            
-            # Write header section
             writer.writerow(["Amazon Advertising Bulk Sheet"])
             writer.writerow([])
             
-            for campaign in campaigns:
-                # Campaign
-                writer.writerow(["Campaign"])
-                writer.writerow(AmazonBulkExporter.CAMPAIGN_COLUMNS)
-                writer.writerow([
-                    campaign.name,
-                    default_budget,
-                    "",
-                    "",
-                    "Manual",
-                    "",
-                    "enabled",
-                    "legacyForSales"
-                ])
+            for section, section_rows in changes.items():
+                if not section_rows:
+                    continue
+                writer.writerow([section])
+                writer.writerow(AmazonBulkExporter.SECTIONS[section][0] +
+                                [AmazonBulkExporter.OPERATION_COLUMN])
+                writer.writerows(section_rows)
                 writer.writerow([])
-                
-                # Ad groups and keywords
-                for ad_group in campaign.ad_groups:
-                    writer.writerow(["Ad Group"])
-                    writer.writerow(AmazonBulkExporter.AD_GROUP_COLUMNS)
-                    writer.writerow([
-                        campaign.name,
-                        ad_group.name,
-                        default_bid,
-                        "enabled"
-                    ])
-                    writer.writerow([])
-                    
-                    writer.writerow(["Product Ad"])
-                    writer.writerow(AmazonBulkExporter.PRODUCT_AD_COLUMNS)
-                    writer.writerow([
-                        campaign.name,
-                        ad_group.name,
-                        "",
-                        ad_group.asin,
-                        "enabled"
-                    ])
-                    writer.writerow([])
-                    
-                    if ad_group.keywords:
-                        writer.writerow(["Keyword"])
-                        writer.writerow(AmazonBulkExporter.KEYWORD_COLUMNS)
-                        for keyword in ad_group.keywords:
-                            writer.writerow([
-                                campaign.name,
-                                ad_group.name,
-                                keyword.text,
-                                keyword.match_type.value,
-                                "enabled",
-                                default_bid
-                            ])
-                        writer.writerow([])
-                    
-                    if ad_group.negative_keywords:
-                        writer.writerow(["Negative Keyword"])
-                        writer.writerow(AmazonBulkExporter.NEGATIVE_KEYWORD_COLUMNS)
-                        for keyword in ad_group.negative_keywords:
-                            writer.writerow([
-                                campaign.name,
-                                ad_group.name,
-                                keyword.text,
-                                keyword.match_type.value,
-                                "enabled"
-                            ])
-                        writer.writerow([])
+        
+        # Only rows that made it into the file count as exported
+        for name, fingerprint in fingerprints.items():
+            if fingerprint is None:
+                state.remove(name)
+            else:
+                state.set(name, *fingerprint)
+        
+        instrumentation.add_time('export', time.perf_counter() - start)
+        instrumentation.count('rows_written', sum(len(rows) for rows in changes.values()))
+        return counts
+    
+    @staticmethod
+    def _archive_row(section: str, key: Tuple[str, ...]) -> list:
+        """Build a minimal row that archives the entity identified by key"""
+        columns, state_index = AmazonBulkExporter.SECTIONS[section]
+        row = [""] * len(columns)
+        if section in ("Keyword", "Negative Keyword"):
+            # Campaign, ad group, keyword text and match type
+            row[:4] = key
+        elif section == "Product Ad":
+            row[0], row[1], row[3] = key
+        else:
+            row[:len(key)] = key
+        row[state_index] = "archived"
+        return row
+
+
+class ExportState:
+    """
+    Fingerprints of the last exported bulk sheet rows, per campaign
+    
+    Stores a content hash per row and a digest per campaign so the next
+    incremental export only has to emit what changed.
+    """
+    
+    KEY_SEPARATOR = "\x1f"
+    
+    def __init__(self, state_path: str = "data/exports/export_state.json"):
+        self.state_path = state_path
+        self.campaigns: Dict[str, Dict] = {}
+        self._load()
+    
+    def _load(self):
+        """Load fingerprints from storage"""
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r') as f:
+                    self.campaigns = json.load(f).get('campaigns', {})
+            except Exception as e:
+                print(f"Error loading export state: {e}")
+    
+    def save(self):
+        """Save fingerprints to storage"""
+        atomic_write_json(self.state_path, {'campaigns': self.campaigns},
+                          indent=None, separators=(',', ':'))
+    
+    def get(self, campaign_name: str) -> Dict:
+        """Get the fingerprint of a campaign, or None if never exported"""
+        return self.campaigns.get(campaign_name)
+    
+    def set(self, campaign_name: str, digest: str, rows: Dict[str, str]):
+        """Record the fingerprint of an exported campaign"""
+        self.campaigns[campaign_name] = {'digest': digest, 'rows': rows}
+    
+    def remove(self, campaign_name: str):
+        """Forget an archived campaign"""
+        self.campaigns.pop(campaign_name, None)
+    
+    def campaign_names(self) -> List[str]:
+        """Get the names of all campaigns with a recorded fingerprint"""
+        return list(self.campaigns)
+    
+    @staticmethod
+    def row_key(section: str, key: Tuple[str, ...]) -> str:
+        """Encode a section and entity key as a single string"""
+        return ExportState.KEY_SEPARATOR.join((section,) + tuple(key))
+    
+    @staticmethod
+    def split_row_key(row_key: str) -> Tuple[str, Tuple[str, ...]]:
+        """Decode a row key back into (section, entity_key)"""
+        section, *key = row_key.split(ExportState.KEY_SEPARATOR)
+        return section, tuple(key)
+    
+    @staticmethod
+    def row_hash(row: list) -> str:
+        """Content hash of a bulk sheet row"""
+        content = ExportState.KEY_SEPARATOR.join(str(value) for value in row)
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()
+    
+    @staticmethod
+    def campaign_digest(row_hashes) -> str:
+        """Order-independent digest over the row hashes of a campaign"""
+        digest = hashlib.blake2b(digest_size=16)
+        for row_hash in sorted(row_hashes):
+            digest.update(row_hash.encode('ascii'))
+        return digest.hexdigest()
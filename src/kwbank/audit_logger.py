@@ -4,8 +4,10 @@ Audit trail logging functionality
 import json
 import os
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple, Optional
 from .models import AuditEntry
+from .storage import FileLock, atomic_write_bytes, file_signature
+from . import codec, instrumentation
 
 
 class AuditLogger:
@@ -13,42 +15,106 @@ class AuditLogger:
     
     def __init__(self, log_path: str = "data/audit_trail.json"):
         self.log_path = log_path
-        self.entries: List[AuditEntry] = []
-        self._load()
+        self._entries: Optional[List[AuditEntry]] = None
+        self._file_lock = FileLock(log_path)
+        self._signature = None
+        # Entries up to this index are known to be on disk
+        self._saved_count = 0
+    
+    @property
+    def entries(self) -> List[AuditEntry]:
+        """Audit entries, loaded from storage on first access"""
+        if self._entries is None:
+            self._entries = []
+            self._load()
+        return self._entries
+    
+    @entries.setter
+    def entries(self, entries: List[AuditEntry]):
+        self._entries = entries
     
     def _load(self):
         """Load existing audit entries"""
+        self._signature = file_signature(self.log_path)
         if os.path.exists(self.log_path):
             try:
-                with open(self.log_path, 'r') as f:
-                    data = json.load(f)
-                    self.entries = [
-                        AuditEntry(
-                            timestamp=datetime.fromisoformat(e['timestamp']),
-                            action=e['action'],
-                            details=e['details'],
-                            user=e.get('user', 'system')
-                        ) for e in data
-                    ]
+                self.entries = self._read()
             except Exception as e:
                 print(f"Error loading audit log: {e}")
+        self._saved_count = len(self._entries)
+    
+    def is_stale(self) -> bool:
+        """Check if another process saved the trail since it was loaded"""
+        return self._entries is not None and file_signature(self.log_path) != self._signature
+    
+    def reload(self):
+        """Discard the in-memory entries and load them from storage again"""
+        self._entries = None
+        self.entries
+    
+    def _read(self) -> List[AuditEntry]:
+        """Read the audit entries stored on disk"""
+        with open(self.log_path, 'rb') as f:
+            data = codec.loads(f.read())
+        return [
+            AuditEntry(
+                timestamp=datetime.fromisoformat(e['timestamp']),
+                action=e['action'],
+                details=e['details'],
+                user=e.get('user', 'system')
+            ) for e in data
+        ]
+    
+    @staticmethod
+    def _with_timings(details: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the timings recorded by the running command to entry details"""
+        timings = instrumentation.summary()
+        if not timings or 'timings' in details:
+            return details
+        return dict(details, timings=timings)
     
     def log(self, action: str, details: Dict[str, Any], user: str = "system"):
-        """Log an action"""
+        """Log an action, with the timings of the running command"""
         entry = AuditEntry(
             timestamp=datetime.now(),
             action=action,
-            details=details,
+            details=self._with_timings(details),
             user=user
         )
         self.entries.append(entry)
         self._save()
     
+    def log_many(self, actions: List[Tuple[str, Dict[str, Any]]], user: str = "system"):
+        """
+        Log several actions with a single save
+        Timings cover the whole command and are added to the last entry only
+        """
+        timestamp = datetime.now()
+        for i, (action, details) in enumerate(actions):
+            self.entries.append(AuditEntry(
+                timestamp=timestamp,
+                action=action,
+                details=self._with_timings(details) if i == len(actions) - 1 else details,
+                user=user
+            ))
+        self._save()
+    
     def _save(self):
-        """Save audit entries to file"""
-        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
-        with open(self.log_path, 'w') as f:
-            json.dump([e.to_dict() for e in self.entries], f, indent=2)
+        """
+        Save audit entries to file
+        
+        Runs under the trail's write lock. If another process appended
+        entries since they were loaded, the new local entries are appended
+        after the ones on disk instead of overwriting them.
+        """
+        with self._file_lock, instrumentation.phase('audit'):
+            entries = self.entries
+            if file_signature(self.log_path) != self._signature and os.path.exists(self.log_path):
+                entries = self._read() + entries[self._saved_count:]
+                self._entries = entries
+            atomic_write_bytes(self.log_path, codec.dumps([e.to_dict() for e in entries]))
+            self._signature = file_signature(self.log_path)
+            self._saved_count = len(entries)
     
     def get_recent_entries(self, count: int = 10) -> List[AuditEntry]:
         """Get the most recent audit entries"""
@@ -0,0 +1,189 @@
+"""
+Read-only, memory-mapped view of a keyword bank snapshot
+
+Reporting commands use the view instead of KeywordBank when the bank is
+stored as a .kwb snapshot: keywords are read straight from the mapped
+columns through lightweight row views, and no Keyword objects are built.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .models import KEYWORD_COUNT_FIELDS, decode_keyword_counts
+from .snapshot import COLUMNS, KeywordSnapshot
+
+# Rows between progress calls of scans (keyword_bank.PROGRESS_INTERVAL)
+PROGRESS_INTERVAL = 10_000
+
+
+class KeywordRow:
+    """Read-only view of one keyword of a snapshot, with Keyword's attributes"""
+
+    __slots__ = ('_snapshot', '_index')
+
+    def __init__(self, snapshot: KeywordSnapshot, index: int):
+        self._snapshot = snapshot
+        self._index = index
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromisoformat(self._snapshot.value('created_at', self._index))
+
+    def __repr__(self):
+        return f"KeywordRow({self.keyword_id}, {self.text!r}, {self.brand!r})"
+
+
+def _column_property(name: str) -> property:
+    return property(lambda row: row._snapshot.value(name, row._index))
+
+
+for _name in COLUMNS:
+    if _name != 'created_at':
+        setattr(KeywordRow, _name, _column_property(_name))
+
+
+class RecordRow:
+    """Read-only attribute access to a stored record (mapping, brand, ...)"""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+class KeywordBankView:
+    """
+    Read-only view of a keyword bank snapshot
+
+    Offers the query methods of KeywordBank used by reporting commands.
+    Keywords stay in the memory-mapped file; only the columns a query
+    touches are read.
+
+    Args:
+        storage_path: .kwb snapshot file
+    """
+
+    def __init__(self, storage_path: str):
+        self.storage_path = storage_path
+        self.snapshot = KeywordSnapshot(storage_path)
+        self.mappings: List[RecordRow] = [RecordRow(m) for m in self.snapshot.meta.get('mappings', [])]
+        self._keyword_counts: Optional[Dict[tuple, int]] = None
+
+    @property
+    def keyword_count(self) -> int:
+        return self.snapshot.rows
+
+    @property
+    def campaign_count(self) -> int:
+        return len(self.snapshot.meta.get('campaigns') or [])
+
+    def _brand_code(self, brand: str) -> Optional[int]:
+        try:
+            return self.snapshot.dictionary('brand').index(brand)
+        except ValueError:
+            return None
+
+    def _indexes(self, brand: Optional[str] = None) -> Iterator[int]:
+        """Row indexes, optionally only those of a brand"""
+        if not brand:
+            return iter(range(self.snapshot.rows))
+        code = self._brand_code(brand)
+        if code is None:
+            return iter(())
+        return (i for i, c in enumerate(self.snapshot.codes('brand')) if c == code)
+
+    def iter_keywords(self, brand: Optional[str] = None) -> Iterator[KeywordRow]:
+        """Iterate keywords as row views, optionally only those of a brand"""
+        snapshot = self.snapshot
+        return (KeywordRow(snapshot, i) for i in self._indexes(brand))
+
+    def get_keywords_by_brand(self, brand: str) -> List[KeywordRow]:
+        """Get all keywords for a specific brand"""
+        return list(self.iter_keywords(brand))
+
+    def get_all_brands(self) -> Set[str]:
+        """Get all unique brand names"""
+        return {key[0] for key in self.keyword_counts()}
+
+    def keyword_counts(self) -> Dict[tuple, int]:
+        """Keyword counts per (brand, keyword_type, match_type, intent, status)"""
+        if self._keyword_counts is None:
+            rows = self.snapshot.meta.get('keyword_counts')
+            counts = decode_keyword_counts(rows) if rows is not None else None
+            if counts is None or sum(counts.values()) != self.snapshot.rows:
+                counts = self._count_columns(*KEYWORD_COUNT_FIELDS)
+            self._keyword_counts = counts
+        return self._keyword_counts
+
+    def count_keywords(self, *fields: str) -> Dict[tuple, int]:
+        """Number of keywords per combination of the given (categorical) fields"""
+        if set(fields) <= set(KEYWORD_COUNT_FIELDS):
+            positions = [KEYWORD_COUNT_FIELDS.index(f) for f in fields]
+            counts = defaultdict(int)
+            for key, count in self.keyword_counts().items():
+                counts[tuple(key[i] for i in positions)] += count
+            return dict(counts)
+        return self._count_columns(*fields)
+
+    def _count_columns(self, *fields: str) -> Dict[tuple, int]:
+        """Count keywords per field combination by scanning the code columns"""
+        snapshot = self.snapshot
+        if len(fields) == 1:
+            return {(value,): n for value, n in snapshot.count(fields[0]).items()}
+        dictionaries = [snapshot.dictionary(f) for f in fields]
+        counter = Counter(zip(*(snapshot.codes(f) for f in fields)))
+        return {
+            tuple(d[c] for d, c in zip(dictionaries, codes)): counter[codes]
+            for codes in sorted(counter)
+        }
+
+    def find_exact_duplicates(self, brand: str = None) -> Dict[str, List[KeywordRow]]:
+        """
+        Find exact duplicates based on normalized text
+        Returns dict mapping normalized text to list of duplicate keyword rows
+        """
+        return dict(self.iter_exact_duplicates(brand))
+
+    def iter_exact_duplicates(
+        self,
+        brand: str = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Iterator[Tuple[str, List[KeywordRow]]]:
+        """
+        Exact duplicate groups of find_exact_duplicates(), as (normalized text, rows)
+        Groups are yielded after the scan, which calls progress(rows scanned, total)
+        """
+        normalized = self.snapshot.column('normalized_text')
+        indexes = list(self._indexes(brand))
+        groups = defaultdict(list)
+        for start in range(0, len(indexes), PROGRESS_INTERVAL):
+            for i in indexes[start:start + PROGRESS_INTERVAL]:
+                groups[normalized[i]].append(i)
+            if progress:
+                progress(min(start + PROGRESS_INTERVAL, len(indexes)), len(indexes))
+        for text, rows in groups.items():
+            if len(rows) > 1:
+                yield text, [KeywordRow(self.snapshot, i) for i in rows]
+
+    def get_mappings_by_asin(self, asin: str) -> List[RecordRow]:
+        """Get all mappings for an ASIN"""
+        return [m for m in self.mappings if m.asin == asin]
+
+    def get_mappings_by_keyword(self, keyword: str) -> List[RecordRow]:
+        """Get all mappings for a keyword"""
+        return [m for m in self.mappings if m.keyword == keyword]
+
+    def close(self):
+        self.snapshot.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
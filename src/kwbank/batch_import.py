@@ -0,0 +1,157 @@
+"""
+Batch keyword import from many CSV files with parallel parsing
+"""
+import csv
+import os
+from dataclasses import dataclass
+from typing import List, Iterator, Tuple, Optional
+
+from .models import Keyword, KeywordType, MatchType
+from . import instrumentation
+
+
+@dataclass
+class ImportJob:
+    """One keyword file to import for a brand"""
+    file: str
+    brand: str
+    keyword_type: str = "positive"
+    match_type: str = "exact"
+
+
+def read_keywords_csv(csv_file: str, brand: str, keyword_type: str, match_type: str) -> List[Keyword]:
+    """
+    Read keywords from the first column of a CSV file
+    A header row starting with 'keyword' is skipped
+    """
+    keywords = []
+    match = MatchType(match_type)
+    kw_type = KeywordType(keyword_type)
+    with instrumentation.phase('parse'), open(csv_file, 'r') as f:
+        reader = csv.reader(f)
+        # Skip header if present
+        first_row = next(reader, None)
+        if first_row and first_row[0].strip() and not first_row[0].lower().startswith('keyword'):
+            keywords.append(Keyword(
+                text=first_row[0].strip(),
+                brand=brand,
+                match_type=match,
+                keyword_type=kw_type
+            ))
+
+        for row in reader:
+            if row and row[0].strip():
+                keywords.append(Keyword(
+                    text=row[0].strip(),
+                    brand=brand,
+                    match_type=match,
+                    keyword_type=kw_type
+                ))
+    instrumentation.count('rows_read', len(keywords))
+    return keywords
+
+
+def parse_job(job: ImportJob) -> List[Keyword]:
+    """Parse the keywords of an import job"""
+    return read_keywords_csv(job.file, job.brand, job.keyword_type, job.match_type)
+
+
+def load_manifest(manifest_path: str) -> List[ImportJob]:
+    """
+    Load import jobs from a manifest file
+
+    CSV manifests need a header with file and brand columns, and may add
+    keyword_type and match_type columns. YAML manifests hold a list of
+    mappings with the same keys (or a mapping with a 'files' list).
+    Relative file paths are resolved against the manifest directory.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    if manifest_path.endswith(('.yaml', '.yml')):
+        import yaml
+        with open(manifest_path, 'r') as f:
+            data = yaml.safe_load(f) or []
+        entries = data.get('files', []) if isinstance(data, dict) else data
+    else:
+        with open(manifest_path, 'r', newline='') as f:
+            entries = list(csv.DictReader(f))
+
+    jobs = []
+    for entry in entries:
+        if not entry.get('file') or not entry.get('brand'):
+            raise ValueError(f"Manifest entry needs 'file' and 'brand': {entry}")
+        jobs.append(ImportJob(
+            file=os.path.join(base_dir, entry['file']),
+            brand=entry['brand'],
+            keyword_type=entry.get('keyword_type') or 'positive',
+            match_type=entry.get('match_type') or 'exact'
+        ))
+    return jobs
+
+
+def validate_jobs(jobs: List[ImportJob]) -> List[str]:
+    """
+    Problems that would make import jobs fail, one message per problem
+    Checked before parsing starts so a bad entry can't abort a half-applied import
+    """
+    keyword_types = {t.value for t in KeywordType}
+    match_types = {m.value for m in MatchType}
+    problems = []
+    for job in jobs:
+        if not os.path.isfile(job.file):
+            problems.append(f"{job.file}: file not found")
+        if job.keyword_type not in keyword_types:
+            problems.append(f"{job.file}: invalid keyword_type '{job.keyword_type}' "
+                            f"(expected one of: {', '.join(sorted(keyword_types))})")
+        if job.match_type not in match_types:
+            problems.append(f"{job.file}: invalid match_type '{job.match_type}' "
+                            f"(expected one of: {', '.join(sorted(match_types))})")
+    return problems
+
+
+def jobs_from_directory(directory: str, brand: Optional[str] = None,
+                        keyword_type: str = "positive",
+                        match_type: str = "exact") -> List[ImportJob]:
+    """
+    Create one import job per CSV file in a directory
+    Without a brand, each file's name (without extension) is used as brand
+    """
+    jobs = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith('.csv'):
+            continue
+        jobs.append(ImportJob(
+            file=os.path.join(directory, name),
+            brand=brand or os.path.splitext(name)[0],
+            keyword_type=keyword_type,
+            match_type=match_type
+        ))
+    return jobs
+
+
+def parse_jobs(jobs: List[ImportJob], workers: int = 0) -> Iterator[Tuple[ImportJob, List[Keyword]]]:
+    """
+    Parse import jobs, in parallel worker processes when workers > 1
+
+    Results are yielded in job order so imports stay deterministic.
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+
+    if workers <= 1:
+        for job in jobs:
+            yield job, parse_job(job)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Larger chunks amortize process round-trips for many small files
+        chunksize = max(1, len(jobs) // (workers * 4))
+        results = executor.map(parse_job, jobs, chunksize=chunksize)
+        for job in jobs:
+            # Workers record into their own recorder; time spent waiting for them here
+            with instrumentation.phase('parse'):
+                keywords = next(results)
+            instrumentation.count('rows_read', len(keywords))
+            yield job, keywords
@@ -1,11 +1,114 @@
 """
 Campaign name generation utilities with pattern token support
 """
+import re
 from datetime import datetime
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import List, Dict, Optional, Iterable
 from .models import AdGroup, Brand, CampaignGoal, MatchType
 
 
+class CompiledNamingPattern:
+    """
+    A naming pattern parsed once into literal and token parts
+    
+    Rendering only joins the parts, so generating many names from the same
+    pattern avoids re-scanning it. Date tokens are pre-translated to strftime
+    formats and evaluated once per render call (or per batch with render_many).
+    """
+    
+    TOKEN_RE = re.compile(r'\{([^{}]+)\}')
+    
+    # Pattern token -> key of the values passed to render
+    STANDARD_TOKENS = {
+        'BrandPrefix': 'brand_prefix',
+        'ASIN': 'asin',
+        'Goal': 'goal',
+        'MatchType': 'match_type',
+        'Locale': 'locale',
+    }
+    
+    LITERAL = 0
+    FIELD = 1
+    DATE = 2
+    CUSTOM = 3
+    
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.parts = []
+        self.date_formats = []
+        
+        position = 0
+        for match in self.TOKEN_RE.finditer(pattern):
+            if match.start() > position:
+                self.parts.append((self.LITERAL, pattern[position:match.start()]))
+            token = match.group(1)
+            if token in self.STANDARD_TOKENS:
+                self.parts.append((self.FIELD, self.STANDARD_TOKENS[token]))
+            elif token.startswith('Date:'):
+                # Convert common date format patterns
+                python_fmt = token[5:].replace('yyyy', '%Y').replace('MM', '%m').replace('dd', '%d')
+                self.parts.append((self.DATE, python_fmt))
+                if python_fmt not in self.date_formats:
+                    self.date_formats.append(python_fmt)
+            else:
+                self.parts.append((self.CUSTOM, token))
+            position = match.end()
+        if position < len(pattern):
+            self.parts.append((self.LITERAL, pattern[position:]))
+    
+    def _format_dates(self, now: Optional[datetime]) -> Dict[str, str]:
+        """Format every date token of the pattern for one point in time"""
+        if not self.date_formats:
+            return {}
+        now = now or datetime.now()
+        return {fmt: now.strftime(fmt) for fmt in self.date_formats}
+    
+    def _render(self, values: Dict[str, str], dates: Dict[str, str],
+                custom_tokens: Optional[Dict[str, str]]) -> str:
+        out = []
+        for kind, value in self.parts:
+            if kind == self.LITERAL:
+                out.append(value)
+            elif kind == self.FIELD:
+                out.append(values.get(value, ''))
+            elif kind == self.DATE:
+                out.append(dates[value])
+            elif custom_tokens and value in custom_tokens:
+                out.append(custom_tokens[value])
+            else:
+                # Unknown tokens are left as-is
+                out.append('{' + value + '}')
+        return ''.join(out)
+    
+    def render(self, values: Dict[str, str], now: Optional[datetime] = None,
+               custom_tokens: Optional[Dict[str, str]] = None) -> str:
+        """
+        Render one name
+        
+        Args:
+            values: Token values keyed brand_prefix, asin, goal, match_type, locale
+            now: Time used for date tokens (default: current time)
+            custom_tokens: Values for additional {Token} placeholders
+        """
+        return self._render(values, self._format_dates(now), custom_tokens)
+    
+    def render_many(self, rows: Iterable[Dict[str, str]], now: Optional[datetime] = None,
+                    custom_tokens: Optional[Dict[str, str]] = None) -> List[str]:
+        """
+        Render a name per row of token values
+        All names share one timestamp, so a batch never straddles midnight
+        """
+        dates = self._format_dates(now)
+        return [self._render(values, dates, custom_tokens) for values in rows]
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str) -> CompiledNamingPattern:
+    """Get the compiled form of a naming pattern (cached)"""
+    return CompiledNamingPattern(pattern)
+
+
 class CampaignNameGenerator:
     """Generates campaign names following Amazon best practices with pattern tokens"""
     
@@ -34,37 +137,32 @@ class CampaignNameGenerator:
         Example pattern: "{BrandPrefix}_{ASIN}_{Goal}_{MatchType}_{Date:yyyyMMdd}"
         Example output: "NIKE_B07X9C8N6D_Conversion_Exact_20251020"
         """
-        result = pattern
-        
-        # Replace standard tokens
-        replacements = {
-            '{BrandPrefix}': brand_prefix,
-            '{ASIN}': asin,
-            '{Goal}': goal,
-            '{MatchType}': match_type,
-            '{Locale}': locale,
-        }
-        
-        for token, value in replacements.items():
-            result = result.replace(token, value)
-        
-        # Handle date token with custom format
-        if '{Date:' in result:
-            import re
-            date_pattern = r'\{Date:([^}]+)\}'
-            matches = re.findall(date_pattern, result)
-            for date_fmt in matches:
-                # Convert common date format patterns
-                python_fmt = date_fmt.replace('yyyy', '%Y').replace('MM', '%m').replace('dd', '%d')
-                date_str = datetime.now().strftime(python_fmt)
-                result = result.replace(f'{{Date:{date_fmt}}}', date_str)
-        
-        # Handle custom tokens
-        if custom_tokens:
-            for token, value in custom_tokens.items():
-                result = result.replace(f'{{{token}}}', value)
+        return compile_pattern(pattern).render(
+            {
+                'brand_prefix': brand_prefix,
+                'asin': asin,
+                'goal': goal,
+                'match_type': match_type,
+                'locale': locale,
+            },
+            custom_tokens=custom_tokens
+        )
+    
+    @staticmethod
+    def render_many(
+        pattern: str,
+        rows: Iterable[Dict[str, str]],
+        now: Optional[datetime] = None,
+        custom_tokens: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """
+        Generate names for many token value sets from one pattern
         
-        return result
+        Each row holds brand_prefix, asin, goal, match_type and locale values
+        (missing keys render empty). The pattern is compiled once and every
+        date token uses the same timestamp.
+        """
+        return compile_pattern(pattern).render_many(rows, now=now, custom_tokens=custom_tokens)
     
     @staticmethod
     def generate(brand: str, ad_groups: List[AdGroup], suffix: str = "") -> str:
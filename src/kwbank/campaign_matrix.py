@@ -0,0 +1,175 @@
+"""
+Batch campaign generation over brands x ASINs x goals x match types
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+from .models import (
+    Brand, Campaign, AdGroup, KeywordSet, KeywordType, MatchType,
+    CampaignGoal, CampaignType, AutoManual
+)
+from .campaign_generator import CampaignNameGenerator
+
+
+DEFAULT_PATTERN = "{BrandPrefix}_{ASIN}_{Goal}_{MatchType}_{Date:yyyyMMdd}"
+
+
+@dataclass
+class CampaignMatrixSpec:
+    """
+    Which campaigns to generate
+
+    Empty lists mean "all": every brand in the bank, every product of the
+    brand, every CampaignGoal and every MatchType. ASINs select among each
+    brand's own products.
+    """
+    brands: List[str] = field(default_factory=list)
+    asins: List[str] = field(default_factory=list)
+    goals: List[CampaignGoal] = field(default_factory=list)
+    match_types: List[MatchType] = field(default_factory=list)
+    naming_rule: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CampaignMatrixSpec':
+        """Build a spec from a parsed YAML/JSON mapping"""
+        return cls(
+            brands=list(data.get('brands') or []),
+            asins=list(data.get('asins') or []),
+            goals=[CampaignGoal(g.lower()) for g in data.get('goals') or []],
+            match_types=[MatchType(m.lower()) for m in data.get('match_types') or []],
+            naming_rule=data.get('naming_rule') or ""
+        )
+
+
+@dataclass
+class CampaignMatrixResult:
+    """Campaigns built from a matrix spec"""
+    campaigns: List[Campaign] = field(default_factory=list)
+    # Campaign name -> (daily budget, default bid) from the brand defaults
+    settings: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    skipped_existing: int = 0
+    skipped_empty: int = 0
+    unknown_brands: List[str] = field(default_factory=list)
+    # Requested ASINs that are not a product of any selected brand
+    unmatched_asins: List[str] = field(default_factory=list)
+
+
+class CampaignMatrixGenerator:
+    """
+    Builds every campaign of a matrix spec in one pass over the bank
+
+    One campaign is created per brand x ASIN x goal x match type, holding a
+    single ad group for the ASIN. Positive keywords of the brand with the
+    campaign's match type and all negative keywords of the brand are grouped
+    into keyword sets that are shared by every campaign using them.
+    """
+
+    def __init__(self, bank):
+        self.bank = bank
+
+    def resolve_brands(self, spec: CampaignMatrixSpec) -> Tuple[List[Brand], List[str]]:
+        """Find the brands of a spec by name or ID, returning (brands, unknown)"""
+        if not spec.brands:
+            return list(self.bank.brands), []
+        brands, unknown = [], []
+        for value in spec.brands:
+            brand = self.bank.get_brand_by_name(value) or self.bank.get_brand_by_id(value)
+            if brand:
+                brands.append(brand)
+            else:
+                unknown.append(value)
+        return brands, unknown
+
+    def pattern_for(self, brand: Brand, rule_name: str = "") -> str:
+        """Pick the naming pattern for a brand: named rule, brand rule, global rule, default"""
+        rules = self.bank.get_naming_rules_by_brand(brand.brand_id)
+        if rule_name:
+            rules = [r for r in rules if r.name == rule_name]
+        # Brand-specific rules take precedence over global ones
+        rules.sort(key=lambda r: r.brand_id != brand.brand_id)
+        return rules[0].pattern if rules else DEFAULT_PATTERN
+
+    def generate(self, spec: CampaignMatrixSpec, now: Optional[datetime] = None) -> CampaignMatrixResult:
+        """Build the campaigns of a spec without adding them to the bank"""
+        now = now or datetime.now()
+        result = CampaignMatrixResult()
+        brands, result.unknown_brands = self.resolve_brands(spec)
+        goals = spec.goals or list(CampaignGoal)
+        match_types = spec.match_types or list(MatchType)
+        existing_names = {c.name for c in self.bank.campaigns}
+
+        # Split keywords once for all brands
+        positive: Dict[Tuple[str, MatchType], list] = {}
+        negative: Dict[str, list] = {}
+        for keyword in self.bank.keywords:
+            if keyword.keyword_type == KeywordType.POSITIVE:
+                positive.setdefault((keyword.brand, keyword.match_type), []).append(keyword)
+            else:
+                negative.setdefault(keyword.brand, []).append(keyword)
+
+        matched_asins = set()
+        for brand in brands:
+            asins = [p.asin for p in self.bank.get_products_by_brand(brand.brand_id)]
+            if spec.asins:
+                own_asins = set(asins)
+                asins = [asin for asin in spec.asins if asin in own_asins]
+                matched_asins.update(asins)
+                if not asins:
+                    continue
+            keyword_sets = {
+                match_type: KeywordSet(
+                    keywords=positive.get((brand.name, match_type), []),
+                    negative_keywords=negative.get(brand.name, [])
+                ) for match_type in match_types
+            }
+
+            combos = [
+                (asin, goal, match_type)
+                for asin in asins
+                for goal in goals
+                for match_type in match_types
+            ]
+            names = CampaignNameGenerator.render_many(
+                self.pattern_for(brand, spec.naming_rule),
+                [
+                    {
+                        'brand_prefix': brand.prefix,
+                        'asin': asin,
+                        'goal': goal.value.capitalize(),
+                        'match_type': match_type.value.capitalize(),
+                        'locale': brand.default_locale,
+                    } for asin, goal, match_type in combos
+                ],
+                now=now
+            )
+
+            for name, (asin, goal, match_type) in zip(names, combos):
+                keyword_set = keyword_sets[match_type]
+                if not keyword_set.keywords:
+                    result.skipped_empty += 1
+                    continue
+                if name in existing_names:
+                    result.skipped_existing += 1
+                    continue
+                existing_names.add(name)
+
+                campaign = Campaign(
+                    name=name,
+                    brand=brand.name,
+                    campaign_type=CampaignType.SPONSORED_PRODUCTS,
+                    auto_manual=AutoManual.MANUAL,
+                    goal=goal,
+                    match_type=match_type,
+                    created_at=now
+                )
+                campaign.add_ad_group(AdGroup.from_keyword_set(
+                    name=CampaignNameGenerator.generate_ad_group_name(asin, len(keyword_set.keywords)),
+                    asin=asin,
+                    keyword_set=keyword_set
+                ))
+                result.campaigns.append(campaign)
+                result.settings[name] = (brand.default_budget, brand.default_bid)
+
+        result.unmatched_asins = [asin for asin in spec.asins if asin not in matched_asins]
+        return result
@@ -0,0 +1,50 @@
+"""
+Checkpoints of interrupted long-running commands
+
+A checkpoint is a JSON file next to the storage file holding the command's
+parameters, the position it reached and the results reported up to there.
+It only applies to a rerun with the same parameters against the same
+version of the storage file.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .storage import atomic_write_json, file_signature
+
+
+class Checkpoint:
+    """
+    Checkpoint of one command on a bank
+
+    Args:
+        storage_path: Bank storage file
+        command: Command name, part of the checkpoint file name
+        params: JSON-serializable parameters a resumed run must match
+    """
+
+    def __init__(self, storage_path: str, command: str, params: Dict[str, Any]):
+        self.path = f"{storage_path}.{command}.checkpoint"
+        signature = file_signature(storage_path)
+        self.params = dict(params, bank=list(signature) if signature else None)
+
+    def load(self) -> Optional[Tuple[int, List[Any]]]:
+        """(position, results) of a matching checkpoint, or None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('params') != self.params:
+            return None
+        return data['position'], data['results']
+
+    def save(self, position: int, results: List[Any]):
+        atomic_write_json(self.path, {'params': self.params, 'position': position, 'results': results},
+                          indent=None, separators=(',', ':'))
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
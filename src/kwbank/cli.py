@@ -1,33 +1,166 @@
 """
 Command-line interface for KWBank
 """
+import os
+import sys
+
 import click
-import csv
-import uuid
-from typing import List
-from pathlib import Path
-
-from .keyword_bank import KeywordBank
-from .models import (
-    Keyword, AdGroup, MatchType, KeywordType, Brand, Product,
-    Mapping, NamingRule, KeywordIntent, KeywordStatus,
-    CampaignGoal, CampaignType, AutoManual
-)
-from .campaign_generator import CampaignNameGenerator
-from .amazon_exporter import AmazonBulkExporter
-from .audit_logger import AuditLogger
-
-
-@click.group()
+
+# Subsystem modules are imported inside the commands that use them so that
+# --help and lightweight commands don't pay for loading the whole package.
+
+# Warm bank and audit logger provided while a command runs inside the daemon
+_WARM_STATE = {}
+
+# similarity_index.ALGORITHMS, listed here so --help doesn't import it
+_SIMILARITY_ALGORITHMS = ['jaro_winkler', 'levenshtein', 'token_set', 'jaccard', 'jaccard_char', 'minhash']
+
+
+def _keyword_bank(for_update: bool = False):
+    """
+    Load the keyword bank (or use the daemon's warm bank)
+    
+    With for_update, the bank's write lock is held until the command
+    finishes so concurrent kwbank processes can't overwrite each other.
+    """
+    if 'bank' in _WARM_STATE:
+        return _WARM_STATE['bank']
+    from .keyword_bank import KeywordBank
+    bank = KeywordBank()
+    if for_update:
+        ctx = click.get_current_context()
+        ctx.with_resource(bank.locked())
+        if bank.load_error is not None:
+            click.echo(f"Error: {bank.storage_path} could not be loaded; fix or restore it before making changes")
+            ctx.exit(1)
+    return bank
+
+
+def _read_only_bank():
+    """
+    Bank for commands that only read it
+    
+    A .kwb snapshot is opened as a memory-mapped KeywordBankView, which
+    answers queries without building Keyword objects; other storage formats
+    load a regular KeywordBank.
+    """
+    if 'bank' in _WARM_STATE:
+        return _WARM_STATE['bank']
+    from .keyword_bank import default_storage_path
+    from .snapshot import is_snapshot_path
+    path = default_storage_path()
+    if is_snapshot_path(path) and os.path.exists(path):
+        from .bank_view import KeywordBankView
+        return click.get_current_context().with_resource(KeywordBankView(path))
+    return _keyword_bank()
+
+
+def _audit_logger():
+    """Open the audit trail (entries are read on first use)"""
+    if 'audit' in _WARM_STATE:
+        return _WARM_STATE['audit']
+    from .audit_logger import AuditLogger
+    return AuditLogger()
+
+
+class _ProgressBar:
+    """
+    progress(done, total) callback of the bank's dedupe iterators, drawn on stderr
+    
+    The bar is created by the first call, which gives the total. work maps
+    (done, total) to units of work for steps that aren't equally long.
+    """
+    
+    def __init__(self, label: str, work=None):
+        self.label = label
+        self.work = work or (lambda done, total: done)
+        self.bar = None
+        self.position = 0
+    
+    def __call__(self, done: int, total: int):
+        if self.bar is None:
+            self.bar = click.progressbar(length=self.work(total, total), label=self.label,
+                                         file=sys.stderr)
+            self.bar.__enter__()
+        position = self.work(done, total)
+        self.bar.update(position - self.position)
+        self.position = position
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self.bar is not None:
+            self.bar.__exit__(*exc_info)
+
+
+def _compared_pairs(done: int, total: int) -> int:
+    """Pairs compared once the first `done` of `total` keywords are compared with the later ones"""
+    return done * total - done * (done + 1) // 2
+
+
+class KWBankGroup(click.Group):
+    """Command group that forwards commands to a running daemon"""
+    
+    # Commands that always run in the calling process
+    LOCAL_COMMANDS = {'daemon'}
+    
+    def main(self, args=None, **kwargs):
+        if args is None:
+            args = sys.argv[1:]
+        if self._should_forward(args):
+            from .daemon_client import socket_path, forward_command
+            if os.path.exists(socket_path()):
+                response = forward_command(list(args))
+                if response is not None:
+                    sys.stdout.write(response.get('stdout', ''))
+                    sys.stderr.write(response.get('stderr', ''))
+                    sys.exit(response.get('exit_code', 0))
+        return super().main(args, **kwargs)
+    
+    def _should_forward(self, args) -> bool:
+        if _WARM_STATE or os.environ.get('KWBANK_NO_DAEMON'):
+            return False
+        if any(a == '--profile' or a.startswith('--profile-output') for a in args):
+            # Profile the command in this process
+            return False
+        commands = [a for a in args if not a.startswith('-')]
+        return bool(commands) and commands[0] in self.commands and commands[0] not in self.LOCAL_COMMANDS
+
+
+@click.group(cls=KWBankGroup)
 @click.version_option(version="0.1.0")
-def main():
+@click.option('--profile', is_flag=True,
+              help='Print phase timings, counters, top functions and memory peaks after the command')
+@click.option('--profile-output', type=click.Path(dir_okay=False),
+              help='Write the profile report of the command as JSON to this file')
+@click.pass_context
+def main(ctx, profile, profile_output):
     """
     KWBank - Keyword Bank for Amazon PPC Campaign Management
     
     Centralizes keyword operations including import, deduplication, mapping,
     and campaign generation for Amazon PPC campaigns.
     """
-    pass
+    from . import instrumentation
+    instrumentation.reset()
+    if not (profile or profile_output):
+        return
+    
+    profiler = instrumentation.Profiler()
+    
+    def finish():
+        profiler.stop()
+        report = profiler.report()
+        if profile:
+            click.echo(instrumentation.format_report(report), err=True)
+        if profile_output:
+            import json
+            with open(profile_output, 'w') as f:
+                json.dump(report, f, indent=2)
+    
+    profiler.start()
+    ctx.call_on_close(finish)
 
 
 @main.command()
@@ -40,39 +173,26 @@ def main():
 @click.option('--enhanced/--basic', default=False, help='Use enhanced normalization')
 @click.option('--auto-detect-intent/--no-auto-detect-intent', default=True, 
               help='Auto-detect keyword intent and suggest bids')
-def import_keywords(csv_file, brand, keyword_type, match_type, enhanced, auto_detect_intent):
+@click.option('--fuzzy-algorithm', type=click.Choice(_SIMILARITY_ALGORITHMS), default='jaro_winkler',
+              help='Similarity algorithm for the fuzzy duplicate check')
+@click.option('--fuzzy-threshold', default=0.92, type=float, help='Fuzzy duplicate similarity threshold (0.0-1.0)')
+def import_keywords(csv_file, brand, keyword_type, match_type, enhanced, auto_detect_intent,
+                    fuzzy_algorithm, fuzzy_threshold):
     """Import keywords from a CSV file with enhanced processing"""
-    bank = KeywordBank()
-    audit = AuditLogger()
-    
-    keywords = []
-    with open(csv_file, 'r') as f:
-        reader = csv.reader(f)
-        # Skip header if present
-        first_row = next(reader, None)
-        if first_row and not first_row[0].lower().startswith('keyword'):
-            keywords.append(Keyword(
-                text=first_row[0].strip(),
-                brand=brand,
-                match_type=MatchType(match_type),
-                keyword_type=KeywordType(keyword_type)
-            ))
-        
-        for row in reader:
-            if row and row[0].strip():
-                keywords.append(Keyword(
-                    text=row[0].strip(),
-                    brand=brand,
-                    match_type=MatchType(match_type),
-                    keyword_type=KeywordType(keyword_type)
-                ))
+    from .batch_import import read_keywords_csv
+    bank = _keyword_bank(for_update=True)
+    audit = _audit_logger()
+    
+    keywords = read_keywords_csv(csv_file, brand, keyword_type, match_type)
     
     # Use enhanced import if requested
     if enhanced or auto_detect_intent:
         added, duplicates, stats = bank.import_keywords_enhanced(
             keywords,
             auto_enhance=auto_detect_intent,
-            normalization_mode='enhanced' if enhanced else 'basic'
+            normalization_mode='enhanced' if enhanced else 'basic',
+            fuzzy_algorithm=fuzzy_algorithm,
+            fuzzy_threshold=fuzzy_threshold
         )
         bank.save()
         
@@ -123,38 +243,147 @@ def import_keywords(csv_file, brand, keyword_type, match_type, enhanced, auto_de
         click.echo(f"  Match Type: {match_type}")
 
 
+@main.command()
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--brand', help='Brand for every file of a directory (default: file name)')
+@click.option('--keyword-type', type=click.Choice(['positive', 'negative']),
+              default='positive', help='Type of keywords for a directory import')
+@click.option('--match-type', type=click.Choice(['exact', 'phrase', 'broad']),
+              default='exact', help='Match type for a directory import')
+@click.option('--enhanced/--basic', default=False, help='Use enhanced normalization')
+@click.option('--auto-detect-intent/--no-auto-detect-intent', default=True,
+              help='Auto-detect keyword intent and suggest bids')
+@click.option('--workers', default=0, type=int, help='Parallel parsing processes (default: CPU count)')
+@click.option('--fuzzy-algorithm', type=click.Choice(_SIMILARITY_ALGORITHMS), default='jaro_winkler',
+              help='Similarity algorithm for the fuzzy duplicate check')
+@click.option('--fuzzy-threshold', default=0.92, type=float, help='Fuzzy duplicate similarity threshold (0.0-1.0)')
+@click.pass_context
+def import_batch(ctx, source, brand, keyword_type, match_type, enhanced, auto_detect_intent, workers,
+                 fuzzy_algorithm, fuzzy_threshold):
+    """
+    Import many keyword CSV files in one run
+    
+    SOURCE is a directory of CSV files or a manifest (.csv/.yaml) listing
+    file, brand, keyword_type and match_type per file. Files are parsed in
+    parallel and imported together, the bank is saved once and one audit
+    entry is written per file.
+    """
+    from pathlib import Path
+    from .batch_import import load_manifest, jobs_from_directory, parse_jobs, validate_jobs
+    bank = _keyword_bank(for_update=True)
+    audit = _audit_logger()
+    
+    if Path(source).is_dir():
+        jobs = jobs_from_directory(source, brand, keyword_type, match_type)
+    else:
+        try:
+            jobs = load_manifest(source)
+        except ValueError as e:
+            click.echo(f"Error: {e}")
+            ctx.exit(1)
+    
+    if not jobs:
+        click.echo("No files to import.")
+        return
+    
+    problems = validate_jobs(jobs)
+    if problems:
+        for problem in problems:
+            click.echo(f"Error: {problem}")
+        click.echo("Nothing was imported.")
+        ctx.exit(1)
+    
+    use_enhanced = enhanced or auto_detect_intent
+    parsed = list(parse_jobs(jobs, workers))
+    all_keywords = [keyword for _, keywords in parsed for keyword in keywords]
+    
+    # One import for all files, so the duplicate checks share their indexes
+    if use_enhanced:
+        total_added, total_duplicates, _ = bank.import_keywords_enhanced(
+            all_keywords,
+            auto_enhance=auto_detect_intent,
+            normalization_mode='enhanced' if enhanced else 'basic',
+            fuzzy_algorithm=fuzzy_algorithm,
+            fuzzy_threshold=fuzzy_threshold
+        )
+    else:
+        total_added, total_duplicates = bank.import_keywords(all_keywords)
+    
+    # Stored keywords were assigned an ID; rejected ones whose key isn't in
+    # the bank were fuzzy duplicates
+    entries = []
+    for job, keywords in parsed:
+        stored = [k for k in keywords if k.keyword_id]
+        added = len(stored)
+        duplicates = len(keywords) - added
+        if use_enhanced:
+            intents = {}
+            if auto_detect_intent:
+                for keyword in stored:
+                    intents[keyword.intent.value] = intents.get(keyword.intent.value, 0) + 1
+            entries.append(('import_keywords_enhanced', {
+                'file': job.file,
+                'brand': job.brand,
+                'added': added,
+                'duplicates': duplicates,
+                'fuzzy_duplicates': sum(1 for k in keywords if not k.keyword_id and not bank.is_duplicate(k)),
+                'enhanced': added if auto_detect_intent else 0,
+                'keyword_type': job.keyword_type,
+                'match_type': job.match_type,
+                'intents': intents,
+                'batch': True
+            }))
+        else:
+            entries.append(('import_keywords', {
+                'file': job.file,
+                'brand': job.brand,
+                'added': added,
+                'duplicates': duplicates,
+                'keyword_type': job.keyword_type,
+                'match_type': job.match_type,
+                'batch': True
+            }))
+        click.echo(f"  {job.file}: {added} added, {duplicates} duplicates ({job.brand})")
+    
+    bank.save()
+    audit.log_many(entries)
+    
+    click.echo(f"✓ Imported {total_added} keywords from {len(jobs)} files "
+               f"({total_duplicates} duplicates skipped)")
+
+
 @main.command()
 @click.option('--brand', help='Filter by brand (optional)')
 def list_keywords(brand):
     """List all keywords in the bank"""
-    bank = KeywordBank()
+    from .models import KeywordType
+    bank = _read_only_bank()
     
-    keywords = bank.keywords if not brand else bank.get_keywords_by_brand(brand)
+    # Group by brand
+    by_brand = {}
+    for (brand_name, keyword_type), count in bank.count_keywords('brand', 'keyword_type').items():
+        if not brand or brand_name == brand:
+            by_brand.setdefault(brand_name, {})[keyword_type] = count
+    total = sum(sum(counts.values()) for counts in by_brand.values())
     
-    if not keywords:
+    if not total:
         click.echo("No keywords found.")
         return
     
-    # Group by brand
-    from collections import defaultdict
-    by_brand = defaultdict(list)
-    for kw in keywords:
-        by_brand[kw.brand].append(kw)
+    click.echo(f"\n=== Keyword Bank ({total} total) ===\n")
     
-    click.echo(f"\n=== Keyword Bank ({len(keywords)} total) ===\n")
-    
-    for brand_name, kws in by_brand.items():
-        click.echo(f"{brand_name}: {len(kws)} keywords")
-        positive = [k for k in kws if k.keyword_type == KeywordType.POSITIVE]
-        negative = [k for k in kws if k.keyword_type == KeywordType.NEGATIVE]
-        click.echo(f"  Positive: {len(positive)}, Negative: {len(negative)}")
+    for brand_name, counts in by_brand.items():
+        click.echo(f"{brand_name}: {sum(counts.values())} keywords")
+        positive = counts.get(KeywordType.POSITIVE, 0)
+        negative = counts.get(KeywordType.NEGATIVE, 0)
+        click.echo(f"  Positive: {positive}, Negative: {negative}")
 
 
 @main.command()
 def detect_conflicts():
     """Detect conflicts between positive and negative keywords"""
-    bank = KeywordBank()
-    audit = AuditLogger()
+    bank = _keyword_bank()
+    audit = _audit_logger()
     
     conflicts = bank.detect_conflicts()
     
@@ -186,8 +415,12 @@ def detect_conflicts():
 @click.option('--bid', default=0.75, type=float, help='Default bid')
 def create_campaign(brand, asin, strategy, output, budget, bid):
     """Create a new campaign with ASINs and keywords"""
-    bank = KeywordBank()
-    audit = AuditLogger()
+    from pathlib import Path
+    from .models import AdGroup, KeywordSet, KeywordType
+    from .campaign_generator import CampaignNameGenerator
+    from .amazon_exporter import AmazonBulkExporter
+    bank = _keyword_bank(for_update=True)
+    audit = _audit_logger()
     
     # Get keywords for brand
     keywords = bank.get_keywords_by_brand(brand)
@@ -201,18 +434,15 @@ def create_campaign(brand, asin, strategy, output, budget, bid):
     positive_keywords = [k for k in keywords if k.keyword_type == KeywordType.POSITIVE]
     negative_keywords = [k for k in keywords if k.keyword_type == KeywordType.NEGATIVE]
     
+    # All ad groups share one keyword set instead of holding their own copies
+    keyword_set = KeywordSet(keywords=positive_keywords, negative_keywords=negative_keywords)
+    
     for asin_value in asin:
-        ad_group = AdGroup(
+        ad_group = AdGroup.from_keyword_set(
             name=CampaignNameGenerator.generate_ad_group_name(asin_value, len(positive_keywords)),
-            asin=asin_value
+            asin=asin_value,
+            keyword_set=keyword_set
         )
-        # Add all positive keywords to each ad group
-        for kw in positive_keywords:
-            ad_group.add_keyword(kw)
-        # Add all negative keywords
-        for kw in negative_keywords:
-            ad_group.add_keyword(kw)
-        
         ad_groups.append(ad_group)
     
     # Generate campaign name
@@ -245,11 +475,80 @@ def create_campaign(brand, asin, strategy, output, budget, bid):
     click.echo(f"  Exported to: {output}")
 
 
+@main.command()
+@click.option('--spec', type=click.Path(exists=True), help='YAML matrix spec (brands, asins, goals, match_types, naming_rule)')
+@click.option('--brand', multiple=True, help='Brand name or ID (repeatable, default: all brands)')
+@click.option('--asin', multiple=True, help='ASIN of a brand product (repeatable, default: all products of each brand)')
+@click.option('--goal', multiple=True, type=click.Choice(['awareness', 'conversion', 'consideration']),
+              help='Campaign goal (repeatable, default: all goals)')
+@click.option('--match-type', multiple=True, type=click.Choice(['exact', 'phrase', 'broad']),
+              help='Match type (repeatable, default: all match types)')
+@click.option('--naming-rule', default='', help='Naming rule name (default: brand rule, then global rule)')
+@click.option('--output', default='data/exports/campaign_matrix.csv', help='Output CSV file path')
+def create_campaign_matrix(spec, brand, asin, goal, match_type, naming_rule, output):
+    """Create campaigns for every brand x ASIN x goal x match type"""
+    from pathlib import Path
+    from .campaign_matrix import CampaignMatrixSpec, CampaignMatrixGenerator
+    from .amazon_exporter import AmazonBulkExporter
+    bank = _keyword_bank(for_update=True)
+    audit = _audit_logger()
+    
+    spec_data = {}
+    if spec:
+        import yaml
+        with open(spec, 'r') as f:
+            spec_data = yaml.safe_load(f) or {}
+    # Command line options override the spec file
+    for key, values in (('brands', brand), ('asins', asin), ('goals', goal), ('match_types', match_type)):
+        if values:
+            spec_data[key] = list(values)
+    if naming_rule:
+        spec_data['naming_rule'] = naming_rule
+    
+    try:
+        matrix_spec = CampaignMatrixSpec.from_dict(spec_data)
+    except ValueError as e:
+        click.echo(f"Error: {e}")
+        return
+    
+    result = CampaignMatrixGenerator(bank).generate(matrix_spec)
+    
+    for unknown in result.unknown_brands:
+        click.echo(f"Warning: Brand '{unknown}' not found")
+    for asin in result.unmatched_asins:
+        click.echo(f"Warning: ASIN '{asin}' is not a product of any selected brand")
+    
+    if not result.campaigns:
+        click.echo("No campaigns to create.")
+        return
+    
+    bank.campaigns.extend(result.campaigns)
+    bank.save()
+    
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    AmazonBulkExporter.export_campaigns(result.campaigns, output, campaign_settings=result.settings)
+    
+    audit.log('create_campaign_matrix', {
+        'brands': sorted({c.brand for c in result.campaigns}),
+        'campaigns': len(result.campaigns),
+        'skipped_existing': result.skipped_existing,
+        'skipped_no_keywords': result.skipped_empty,
+        'output_file': output
+    })
+    
+    click.echo(f"✓ Created {len(result.campaigns)} campaigns")
+    if result.skipped_existing:
+        click.echo(f"  Skipped (already exist): {result.skipped_existing}")
+    if result.skipped_empty:
+        click.echo(f"  Skipped (no keywords for match type): {result.skipped_empty}")
+    click.echo(f"  Exported to: {output}")
+
+
 @main.command()
 @click.option('--brand', help='Filter by brand (optional)')
 def list_campaigns(brand):
     """List all campaigns"""
-    bank = KeywordBank()
+    bank = _keyword_bank()
     
     campaigns = bank.campaigns if not brand else bank.get_campaigns_by_brand(brand)
     
@@ -267,11 +566,76 @@ def list_campaigns(brand):
         click.echo()
 
 
+@main.command()
+@click.option('--brand', help='Filter by brand (optional)')
+@click.option('--output', default='data/exports/campaigns.csv', help='Output CSV file path')
+@click.option('--budget', default=10.0, type=float, help='Daily budget')
+@click.option('--bid', default=0.75, type=float, help='Default bid')
+@click.option('--incremental/--full', default=False,
+              help='Only export rows changed since the last incremental export')
+@click.option('--state', default='data/exports/export_state.json',
+              help='Fingerprint file used by incremental exports')
+@click.option('--archive-missing', is_flag=True,
+              help='Archive previously exported campaigns that no longer exist')
+def export_campaigns(brand, output, budget, bid, incremental, state, archive_missing):
+    """Export campaigns to an Amazon bulk sheet"""
+    from pathlib import Path
+    from .amazon_exporter import AmazonBulkExporter, ExportState
+    bank = _keyword_bank()
+    audit = _audit_logger()
+
+    if brand and archive_missing:
+        click.echo("Error: --archive-missing requires exporting all brands")
+        return
+
+    campaigns = bank.campaigns if not brand else bank.get_campaigns_by_brand(brand)
+
+    if not campaigns and not archive_missing:
+        click.echo("No campaigns found.")
+        return
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+
+    if incremental:
+        export_state = ExportState(state)
+        counts = AmazonBulkExporter.export_campaigns_incremental(
+            campaigns, output, export_state, budget, bid, archive_missing=archive_missing
+        )
+        export_state.save()
+
+        audit.log('export_campaigns_incremental', {
+            'brand': brand,
+            'campaigns': len(campaigns),
+            'created': counts['create'],
+            'updated': counts['update'],
+            'archived': counts['archive'],
+            'unchanged_campaigns': counts['unchanged_campaigns'],
+            'output_file': output
+        })
+
+        click.echo(f"✓ Exported changes for {len(campaigns)} campaigns")
+        click.echo(f"  Created: {counts['create']}")
+        click.echo(f"  Updated: {counts['update']}")
+        click.echo(f"  Archived: {counts['archive']}")
+        click.echo(f"  Unchanged campaigns: {counts['unchanged_campaigns']}")
+    else:
+        AmazonBulkExporter.export_campaigns(campaigns, output, budget, bid)
+
+        audit.log('export_campaigns', {
+            'brand': brand,
+            'campaigns': len(campaigns),
+            'output_file': output
+        })
+
+        click.echo(f"✓ Exported {len(campaigns)} campaigns")
+    click.echo(f"  Exported to: {output}")
+
+
 @main.command()
 @click.option('--count', default=10, help='Number of recent entries to show')
 def audit_trail(count):
     """Show recent audit trail entries"""
-    audit = AuditLogger()
+    audit = _audit_logger()
     
     entries = audit.get_recent_entries(count)
     
@@ -290,15 +654,39 @@ def audit_trail(count):
 
 
 @main.command()
-def stats():
+@click.option('--json', 'as_json', is_flag=True,
+              help='Print keyword counts per brand, type, match type, intent and status as JSON')
+def stats(as_json):
     """Show statistics about the keyword bank"""
-    bank = KeywordBank()
+    from .models import KeywordType
+    bank = _read_only_bank()
+    
+    if as_json:
+        import json
+        click.echo(json.dumps({
+            'total_keywords': bank.keyword_count,
+            'total_campaigns': bank.campaign_count,
+            'keyword_counts': [
+                {
+                    'brand': brand,
+                    'keyword_type': keyword_type.value,
+                    'match_type': match_type.value,
+                    'intent': intent.value,
+                    'status': status.value,
+                    'count': count
+                }
+                for (brand, keyword_type, match_type, intent, status), count in bank.keyword_counts().items()
+            ]
+        }, indent=2))
+        return
     
-    brands = bank.get_all_brands()
-    total_keywords = len(bank.keywords)
-    positive = sum(1 for k in bank.keywords if k.keyword_type == KeywordType.POSITIVE)
-    negative = sum(1 for k in bank.keywords if k.keyword_type == KeywordType.NEGATIVE)
-    total_campaigns = len(bank.campaigns)
+    by_brand = {brand: count for (brand,), count in bank.count_keywords('brand').items()}
+    by_type = {keyword_type: count for (keyword_type,), count in bank.count_keywords('keyword_type').items()}
+    brands = set(by_brand)
+    total_keywords = bank.keyword_count
+    positive = by_type.get(KeywordType.POSITIVE, 0)
+    negative = by_type.get(KeywordType.NEGATIVE, 0)
+    total_campaigns = bank.campaign_count
     
     click.echo("\n=== KWBank Statistics ===\n")
     click.echo(f"Total Brands: {len(brands)}")
@@ -311,8 +699,34 @@ def stats():
     if brands:
         click.echo("Keywords by Brand:")
         for brand in sorted(brands):
-            brand_kws = bank.get_keywords_by_brand(brand)
-            click.echo(f"  {brand}: {len(brand_kws)}")
+            click.echo(f"  {brand}: {by_brand[brand]}")
+
+
+@main.command()
+@click.argument('output', type=click.Path(dir_okay=False))
+def convert_bank(output):
+    """
+    Write the keyword bank to another storage file
+    
+    The format follows the extension of OUTPUT: .json for JSON, .kwb for the
+    columnar snapshot format. Point KWBANK_STORAGE at the new file to use it.
+    """
+    import time
+    bank = _keyword_bank()
+    audit = _audit_logger()
+    
+    start = time.perf_counter()
+    bank.save_as(output)
+    elapsed = time.perf_counter() - start
+    
+    audit.log('convert_bank', {
+        'source': bank.storage_path,
+        'output': output,
+        'keywords': len(bank.keywords)
+    })
+    
+    click.echo(f"✓ Wrote {len(bank.keywords)} keywords to {output} ({elapsed:.2f}s)")
+    click.echo(f"  Size: {os.path.getsize(output) / 1024:.1f} KiB")
 
 
 # Brand Management Commands
@@ -325,8 +739,10 @@ def stats():
 @click.option('--locale', default='en_US', help='Default locale (e.g., en_US)')
 def add_brand(name, prefix, budget, bid, account_id, locale):
     """Add a new brand to the system"""
-    bank = KeywordBank()
-    audit = AuditLogger()
+    import uuid
+    from .models import Brand
+    bank = _keyword_bank(for_update=True)
+    audit = _audit_logger()
     
     # Generate unique brand ID
     brand_id = f"brand_{uuid.uuid4().hex[:8]}"
@@ -360,7 +776,7 @@ def add_brand(name, prefix, budget, bid, account_id, locale):
 @main.command()
 def list_brands():
     """List all brands"""
-    bank = KeywordBank()
+    bank = _keyword_bank()
     
     brands = bank.get_all_brands_list()
     
@@ -393,8 +809,9 @@ def list_brands():
 @click.option('--notes', default='', help='Notes about the product')
 def add_product(brand, asin, name, category, notes):
     """Add a product/ASIN to a brand"""
-    bank = KeywordBank()
-    audit = AuditLogger()
+    from .models import Product
+    bank = _keyword_bank(for_update=True)
+    audit = _audit_logger()
     
     # Find brand by name or ID
     brand_obj = bank.get_brand_by_name(brand) or bank.get_brand_by_id(brand)
@@ -433,7 +850,7 @@ def add_product(brand, asin, name, category, notes):
 @click.option('--brand', help='Filter by brand name or ID')
 def list_products(brand):
     """List all products/ASINs"""
-    bank = KeywordBank()
+    bank = _keyword_bank()
     
     if brand:
         brand_obj = bank.get_brand_by_name(brand) or bank.get_brand_by_id(brand)
@@ -476,8 +893,10 @@ def list_products(brand):
 @click.option('--brand', help='Brand name or ID (optional, leave empty for global rule)')
 def add_naming_rule(name, pattern, brand):
     """Add a campaign naming rule with pattern tokens"""
-    bank = KeywordBank()
-    audit = AuditLogger()
+    from .models import NamingRule
+    from .campaign_generator import CampaignNameGenerator
+    bank = _keyword_bank(for_update=True)
+    audit = _audit_logger()
     
     brand_id = ''
     if brand:
@@ -517,7 +936,7 @@ def add_naming_rule(name, pattern, brand):
 @click.option('--brand', help='Filter by brand name or ID')
 def list_naming_rules(brand):
     """List all naming rules"""
-    bank = KeywordBank()
+    bank = _keyword_bank()
     
     if brand:
         brand_obj = bank.get_brand_by_name(brand) or bank.get_brand_by_id(brand)
@@ -551,6 +970,7 @@ def list_naming_rules(brand):
 @click.argument('pattern')
 def test_naming_pattern(pattern):
     """Test a naming pattern with example data"""
+    from .campaign_generator import CampaignNameGenerator
     click.echo(f"Pattern: {pattern}\n")
     
     # Generate with default example data
@@ -581,8 +1001,9 @@ def test_naming_pattern(pattern):
 @click.option('--notes', default='', help='Notes')
 def add_mapping(asin, keyword, campaign, ad_group, bid, notes):
     """Add a keyword-to-ASIN mapping"""
-    bank = KeywordBank()
-    audit = AuditLogger()
+    from .models import Mapping
+    bank = _keyword_bank(for_update=True)
+    audit = _audit_logger()
     
     # Verify ASIN exists
     product = bank.get_product_by_asin(asin)
@@ -604,12 +1025,15 @@ def add_mapping(asin, keyword, campaign, ad_group, bid, notes):
     
     audit.log('add_mapping', {
         'asin': asin,
-        'keyword': keyword
+        'keyword': keyword,
+        'keyword_id': mapping.keyword_id
     })
     
     click.echo(f"✓ Mapping added")
     click.echo(f"  ASIN: {asin}")
     click.echo(f"  Keyword: {keyword}")
+    if mapping.keyword_id:
+        click.echo(f"  Keyword ID: {mapping.keyword_id}")
     if campaign:
         click.echo(f"  Campaign: {campaign}")
     if ad_group:
@@ -623,7 +1047,7 @@ def add_mapping(asin, keyword, campaign, ad_group, bid, notes):
 @click.option('--keyword', help='Filter by keyword')
 def list_mappings(asin, keyword):
     """List keyword-to-ASIN mappings"""
-    bank = KeywordBank()
+    bank = _read_only_bank()
     
     if asin:
         mappings = bank.get_mappings_by_asin(asin)
@@ -656,13 +1080,74 @@ def list_mappings(asin, keyword):
 @main.command()
 @click.option('--brand', help='Filter by brand')
 @click.option('--threshold', default=0.92, type=float, help='Similarity threshold (0.0-1.0)')
-def find_fuzzy_duplicates(brand, threshold):
-    """Find fuzzy duplicate keywords using similarity matching"""
-    bank = KeywordBank()
+@click.option('--algorithm', type=click.Choice(_SIMILARITY_ALGORITHMS), default='jaro_winkler',
+              help='Similarity algorithm (token_set, jaccard, jaccard_char and minhash are indexed)')
+@click.option('--recall', default=0.95, type=float,
+              help='minhash: target probability that a pair at the threshold is found')
+@click.option('--measure-recall', default=0, type=int, metavar='N',
+              help='minhash: also measure LSH recall by comparing N sampled keywords with all others')
+@click.option('--all-brands', is_flag=True,
+              help='Compare keywords within each brand only, running brands in parallel')
+@click.option('--workers', default=0, type=int, help='With --all-brands: worker processes (default: CPU count)')
+@click.option('--restart', is_flag=True, help='Start over instead of resuming an interrupted search')
+def find_fuzzy_duplicates(brand, threshold, algorithm, recall, measure_recall, all_brands, workers, restart):
+    """
+    Find fuzzy duplicate keywords using similarity matching
+    
+    Ctrl-C saves the pairs found so far next to the bank; running the same
+    search again resumes from there.
+    """
+    if all_brands and brand:
+        click.echo("Error: use either --brand or --all-brands")
+        return
+    from .checkpoint import Checkpoint
+    bank = _keyword_bank()
+    checkpoint = Checkpoint(bank.storage_path, 'find-fuzzy-duplicates', {
+        'brand': brand, 'threshold': threshold, 'algorithm': algorithm,
+        'recall': recall, 'all_brands': all_brands,
+    })
+    resume_from, fuzzy_dupes = (None if restart else checkpoint.load()) or (0, [])
     
-    click.echo(f"Searching for fuzzy duplicates (threshold: {threshold})...\n")
+    click.echo(f"Searching for fuzzy duplicates (threshold: {threshold}, algorithm: {algorithm})...\n")
+    if resume_from:
+        click.echo(f"Resuming an interrupted search ({len(fuzzy_dupes)} pairs found so far)...\n")
     
-    fuzzy_dupes = bank.find_fuzzy_duplicates(brand, threshold)
+    # Position reached and pairs found up to it, saved if interrupted
+    reached = [resume_from, len(fuzzy_dupes)]
+    
+    with _ProgressBar('Brands' if all_brands else 'Keywords',
+                      None if all_brands else _compared_pairs) as bar:
+        def progress(done: int, total: int):
+            reached[:] = [done, len(fuzzy_dupes)]
+            bar(done, total)
+        
+        if all_brands:
+            pairs = bank.iter_fuzzy_duplicates_by_brand(threshold, algorithm, recall, workers,
+                                                        progress, resume_from)
+        else:
+            pairs = bank.iter_fuzzy_duplicates(brand, threshold, algorithm, recall,
+                                               progress, resume_from, list(fuzzy_dupes))
+        try:
+            for pair in pairs:
+                fuzzy_dupes.append(pair)
+        except KeyboardInterrupt:
+            pairs.close()
+            if not reached[0]:
+                click.echo("\nInterrupted", err=True)
+                sys.exit(130)
+            try:
+                checkpoint.save(reached[0], fuzzy_dupes[:reached[1]])
+                click.echo(f"\nInterrupted: {reached[1]} pairs saved, run the same command again to resume",
+                           err=True)
+            except OSError as e:
+                click.echo(f"\nInterrupted: could not save progress: {e}", err=True)
+            sys.exit(130)
+    checkpoint.clear()
+    
+    if measure_recall and algorithm == 'minhash':
+        result = bank.measure_minhash_recall(brand, threshold, recall, measure_recall)
+        click.echo(f"LSH recall for {result['sample']} sampled keywords: {result['recall']:.2%} "
+                   f"({result['found']}/{result['pairs']} pairs, {result['bands']} bands x {result['rows']} rows)\n")
     
     if not fuzzy_dupes:
         click.echo("✓ No fuzzy duplicates found!")
@@ -681,11 +1166,16 @@ def find_fuzzy_duplicates(brand, threshold):
 
 @main.command()
 @click.option('--brand', help='Filter by brand')
-def find_variant_duplicates(brand):
+@click.option('--threshold', type=float,
+              help='Also merge variants whose MinHash similarity reaches this threshold (0.0-1.0)')
+@click.option('--recall', default=0.95, type=float,
+              help='Target probability that a pair at the threshold is found')
+def find_variant_duplicates(brand, threshold, recall):
     """Find variant duplicates using stemming"""
-    bank = KeywordBank()
+    bank = _keyword_bank()
     
-    variants = bank.find_variant_duplicates(brand)
+    with _ProgressBar('Stemming') as bar:
+        variants = dict(bank.iter_variant_duplicates(brand, threshold, recall, bar))
     
     if not variants:
         click.echo("✓ No variant duplicates found!")
@@ -704,9 +1194,10 @@ def find_variant_duplicates(brand):
 @click.option('--brand', help='Filter by brand')
 def find_exact_duplicates(brand):
     """Find exact duplicate keywords"""
-    bank = KeywordBank()
+    bank = _read_only_bank()
     
-    duplicates = bank.find_exact_duplicates(brand)
+    with _ProgressBar('Scanning') as bar:
+        duplicates = dict(bank.iter_exact_duplicates(brand, bar))
     
     if not duplicates:
         click.echo("✓ No exact duplicates found!")
@@ -721,5 +1212,76 @@ def find_exact_duplicates(brand):
         click.echo()
 
 
+# Daemon Commands
+@main.group()
+def daemon():
+    """Run a background daemon that keeps the bank warm in memory"""
+    pass
+
+
+@daemon.command('start')
+@click.option('--foreground', is_flag=True, help='Run in this process instead of detaching')
+def daemon_start(foreground):
+    """Start the daemon for the current data directory"""
+    from .daemon_client import DaemonBusyError, socket_path, send_request, start_background
+    
+    sock_path = socket_path()
+    try:
+        running = send_request({'control': 'status'}, sock_path, timeout=1.0)
+    except DaemonBusyError:
+        running = True
+    if running:
+        click.echo(f"Daemon already running on {sock_path}")
+        return
+    
+    if foreground:
+        from .daemon import KWBankDaemon
+        click.echo(f"✓ Daemon listening on {sock_path} (Ctrl-C to stop)")
+        KWBankDaemon(sock_path).serve_forever()
+        return
+    
+    pid = start_background(sock_path)
+    click.echo(f"✓ Daemon started (PID {pid})")
+    click.echo(f"  Socket: {sock_path}")
+
+
+@daemon.command('stop')
+def daemon_stop():
+    """Stop the daemon"""
+    from .daemon_client import DaemonBusyError, send_request
+    
+    try:
+        response = send_request({'control': 'shutdown'}, timeout=5.0)
+    except DaemonBusyError as e:
+        click.echo(f"Error: {e}")
+        return
+    if response is None:
+        click.echo("Daemon is not running.")
+        return
+    click.echo("✓ Daemon stopped")
+
+
+@daemon.command('status')
+def daemon_status():
+    """Show whether the daemon is running"""
+    from .daemon_client import DaemonBusyError, send_request
+    
+    try:
+        status = send_request({'control': 'status'}, timeout=5.0)
+    except DaemonBusyError as e:
+        click.echo(f"Daemon running but busy: {e}")
+        return
+    if status is None:
+        click.echo("Daemon is not running.")
+        return
+    
+    click.echo("✓ Daemon running")
+    click.echo(f"  PID: {status['pid']}")
+    click.echo(f"  Socket: {status['socket']}")
+    click.echo(f"  Keywords: {status['keywords']}")
+    click.echo(f"  Commands served: {status['commands_served']}")
+    click.echo(f"  Uptime: {status['uptime_seconds']}s")
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,108 @@
+"""
+JSON encoding for the storage files
+
+Uses orjson or msgspec when one of them is installed and falls back to the
+standard library otherwise. All backends write compact JSON. Set
+KWBANK_JSON_CODEC to 'orjson', 'msgspec' or 'json' to force a backend.
+"""
+import gc
+import json
+import os
+from contextlib import contextmanager
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+
+def _stdlib_codec() -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    return (lambda data: encoder.encode(data).encode('utf-8')), json.loads
+
+
+def _orjson_codec():
+    import orjson
+    return (lambda data: orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)), orjson.loads
+
+
+def _msgspec_codec():
+    import msgspec
+    return msgspec.json.encode, msgspec.json.decode
+
+
+_BACKENDS = {
+    'orjson': _orjson_codec,
+    'msgspec': _msgspec_codec,
+    'json': _stdlib_codec,
+}
+
+
+def _select_backend():
+    forced = os.environ.get('KWBANK_JSON_CODEC')
+    names = [forced] if forced else ['orjson', 'msgspec', 'json']
+    for name in names:
+        if name not in _BACKENDS:
+            raise ValueError(f"Unknown KWBANK_JSON_CODEC: {name}")
+        try:
+            return (name,) + _BACKENDS[name]()
+        except ImportError:
+            continue
+    return ('json',) + _stdlib_codec()
+
+
+BACKEND, _dumps, _loads = _select_backend()
+
+
+def available_backends() -> List[str]:
+    """Names of the backends that can be used in this environment"""
+    names = []
+    for name, factory in _BACKENDS.items():
+        try:
+            factory()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_backend(name: str):
+    """Switch the backend used by dumps() and loads()"""
+    global BACKEND, _dumps, _loads
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown JSON codec: {name}")
+    _dumps, _loads = _BACKENDS[name]()
+    BACKEND = name
+
+
+def dumps(data: Any) -> bytes:
+    """Encode data as compact UTF-8 JSON"""
+    return _dumps(data)
+
+
+def loads(payload: bytes) -> Any:
+    """Decode JSON bytes"""
+    return _loads(payload)
+
+
+@lru_cache(maxsize=None)
+def enum_values(enum_cls: Type[Enum]) -> Dict[Any, Enum]:
+    """
+    Value -> member mapping of an enum
+    Dict lookups are much cheaper than calling the Enum constructor per record
+    """
+    return {member.value: member for member in enum_cls}
+
+
+@contextmanager
+def paused_gc():
+    """
+    Pause the cyclic garbage collector while building many objects
+    Bulk loads create millions of acyclic objects that would otherwise
+    trigger repeated collections
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
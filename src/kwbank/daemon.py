@@ -0,0 +1,209 @@
+"""
+Optional long-running daemon that keeps the keyword bank warm in memory
+
+The daemon listens on a Unix socket next to the data files and runs kwbank
+commands against a single loaded KeywordBank and AuditLogger. Commands are
+executed one at a time under the bank's write lock, and the saves a command
+makes are written once, before its response is sent. The CLI forwards
+commands to the daemon when its socket exists and runs them directly
+otherwise.
+"""
+import contextlib
+import io
+import json
+import os
+import socketserver
+import threading
+import time
+from typing import List, Optional
+
+from .keyword_bank import KeywordBank, default_storage_path
+from .audit_logger import AuditLogger
+from .daemon_client import DEFAULT_AUDIT_PATH, DEFAULT_SOCKET_PATH
+
+
+class _DeferredSaveBank(KeywordBank):
+    """KeywordBank whose saves only mark it dirty until the command's flush"""
+
+    def __init__(self, storage_path: str):
+        self.dirty = False
+        super().__init__(storage_path)
+
+    def save(self):
+        self.dirty = True
+
+    def flush(self):
+        if self.dirty:
+            KeywordBank.save(self)
+            self.dirty = False
+
+    def discard(self):
+        """Drop in-memory changes, saved or not, by reloading from disk"""
+        self.dirty = False
+        self.reload()
+
+
+class _DeferredSaveAuditLogger(AuditLogger):
+    """AuditLogger whose saves only mark it dirty until the command's flush"""
+
+    def __init__(self, log_path: str):
+        self.dirty = False
+        super().__init__(log_path)
+
+    def _save(self):
+        self.dirty = True
+
+    def flush(self):
+        if self.dirty:
+            AuditLogger._save(self)
+            self.dirty = False
+
+    def discard(self):
+        """Drop in-memory entries, saved or not, by reloading from disk"""
+        self.dirty = False
+        self.reload()
+
+
+class KWBankDaemon:
+    """
+    Serves kwbank commands from a warm in-memory bank
+
+    Args:
+        sock_path: Unix socket to listen on
+        bank_path: Keyword bank storage file (default: $KWBANK_STORAGE or the JSON bank)
+        audit_path: Audit trail file
+    """
+
+    def __init__(self, sock_path: str = DEFAULT_SOCKET_PATH,
+                 bank_path: Optional[str] = None,
+                 audit_path: str = DEFAULT_AUDIT_PATH):
+        self.sock_path = os.path.abspath(sock_path)
+        self.bank_path = os.path.abspath(bank_path or default_storage_path())
+        self.audit_path = os.path.abspath(audit_path)
+        self.lock = threading.RLock()
+        self.stopped = threading.Event()
+        self.commands_served = 0
+        self.started_at = time.time()
+        self.bank = _DeferredSaveBank(self.bank_path)
+        self.audit = _DeferredSaveAuditLogger(self.audit_path)
+        self.audit.entries  # Load eagerly, the daemon keeps them warm
+
+    def flush(self):
+        """Write the changes saved by the last command to disk"""
+        with self.lock:
+            self.bank.flush()
+            self.audit.flush()
+
+    def run_command(self, argv: List[str], cwd: str) -> dict:
+        """Run one CLI command against the warm state, capturing its output"""
+        from . import cli
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        # The write lock is held until the command's changes are on disk, and
+        # picks up changes of processes that bypassed the daemon (reloading
+        # the bank when it is stale), so neither side overwrites the other
+        with self.lock, self.bank.locked():
+            if self.audit.is_stale():
+                self.audit.reload()
+            previous_cwd = os.getcwd()
+            cli._WARM_STATE.update(bank=self.bank, audit=self.audit)
+            exit_code = 0
+            try:
+                os.chdir(cwd)
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    cli.main.main(args=argv, prog_name='kwbank', standalone_mode=True)
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception as e:
+                stderr.write(f"Error: {e}\n")
+                exit_code = 1
+            finally:
+                cli._WARM_STATE.clear()
+                os.chdir(previous_cwd)
+                self.commands_served += 1
+            if exit_code == 0:
+                try:
+                    self.flush()
+                except Exception as e:
+                    stderr.write(f"Error saving data: {e}\n")
+                    exit_code = 1
+            if exit_code != 0:
+                # A failed command may have stopped halfway through its
+                # changes; don't let the next command save them
+                self.bank.discard()
+                self.audit.discard()
+        return {'exit_code': exit_code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+    def status(self) -> dict:
+        """Describe the daemon state"""
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'socket': self.sock_path,
+                'bank': self.bank_path,
+                'keywords': len(self.bank.keywords),
+                'audit_entries': len(self.audit.entries),
+                'commands_served': self.commands_served,
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+            }
+
+    def handle(self, request: dict) -> dict:
+        """Dispatch a decoded request"""
+        control = request.get('control')
+        if control == 'status':
+            return self.status()
+        if control == 'shutdown':
+            self.stopped.set()
+            return {'stopping': True}
+        if (request.get('bank'), request.get('audit')) != (self.bank_path, self.audit_path):
+            # The client would use other files: it runs the command itself
+            return {'other_files': True, 'bank': self.bank_path, 'audit': self.audit_path}
+        return self.run_command(request.get('argv', []), request.get('cwd', os.getcwd()))
+
+    def serve_forever(self):
+        """Listen on the socket until a shutdown request arrives"""
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                try:
+                    response = daemon.handle(json.loads(line))
+                except Exception as e:
+                    response = {'exit_code': 1, 'stdout': '', 'stderr': f"Error: {e}\n"}
+                self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+        if os.path.exists(self.sock_path):
+            os.unlink(self.sock_path)
+        os.makedirs(os.path.dirname(self.sock_path), exist_ok=True)
+
+        # Only the owner may connect: commands run with the daemon's permissions
+        umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(self.sock_path, Handler)
+        finally:
+            os.umask(umask)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            self.stopped.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
+            if os.path.exists(self.sock_path):
+                os.unlink(self.sock_path)
+            self.flush()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="kwbank daemon")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+    parser.add_argument('--bank')
+    parser.add_argument('--audit', default=DEFAULT_AUDIT_PATH)
+    args = parser.parse_args()
+    KWBankDaemon(args.socket, args.bank, args.audit).serve_forever()
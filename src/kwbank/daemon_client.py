@@ -0,0 +1,96 @@
+"""
+Client side of the kwbank daemon
+
+Kept separate from the daemon itself, and free of heavy imports, so the CLI
+can check for a running daemon without slowing down its startup.
+"""
+import os
+import sys
+from typing import List, Optional
+
+from .storage import default_storage_path
+
+DEFAULT_SOCKET_PATH = "data/kwbank.sock"
+DEFAULT_AUDIT_PATH = "data/audit_trail.json"
+
+
+class DaemonBusyError(Exception):
+    """Raised when the daemon accepted a request but didn't answer in time"""
+    pass
+
+
+def socket_path() -> str:
+    """Socket used by the daemon serving the current data directory"""
+    return os.environ.get('KWBANK_SOCKET', DEFAULT_SOCKET_PATH)
+
+
+def send_request(request: dict, sock_path: Optional[str] = None, timeout: Optional[float] = None) -> Optional[dict]:
+    """
+    Send a request to a running daemon
+
+    Returns None when no daemon is listening or the connection fails, so
+    callers can fall back to direct file access. Raises DaemonBusyError when
+    the daemon doesn't answer within the timeout, as it may still be running
+    the request.
+    """
+    sock_path = sock_path or socket_path()
+    if not os.path.exists(sock_path):
+        return None
+    import json
+    import socket
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(sock_path)
+            client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            with client.makefile('rb') as reader:
+                line = reader.readline()
+    except socket.timeout:
+        raise DaemonBusyError(f"daemon on {sock_path} did not respond within {timeout}s") from None
+    except OSError:
+        # Stale socket file left by a daemon that didn't shut down cleanly,
+        # or a daemon that went away mid-request
+        return None
+    return json.loads(line) if line else None
+
+
+def forward_command(argv: List[str]) -> Optional[dict]:
+    """
+    Run a CLI command through the daemon if one is running
+
+    The request names the bank and audit trail this process would use;
+    returns None when the daemon serves other files, so the command runs
+    locally instead.
+    """
+    response = send_request({
+        'argv': argv,
+        'cwd': os.getcwd(),
+        'bank': os.path.abspath(default_storage_path()),
+        'audit': os.path.abspath(DEFAULT_AUDIT_PATH),
+    })
+    if response is None or response.get('other_files'):
+        return None
+    return response
+
+
+def start_background(sock_path: str) -> int:
+    """Start a detached daemon process, returning its PID"""
+    import subprocess
+    import time
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'kwbank.daemon', '--socket', sock_path],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    # Wait for the socket so the next command is already served warm
+    for _ in range(100):
+        try:
+            if send_request({'control': 'status'}, sock_path, timeout=1.0):
+                break
+        except DaemonBusyError:
+            # Listening, just slow to answer while it loads the bank
+            break
+        time.sleep(0.05)
+    return process.pid
@@ -0,0 +1,163 @@
+"""
+Lightweight timing and counter instrumentation
+
+Bank operations time their phases (load, normalize, dedupe, enhance, save,
+audit, ...) and bump counters (comparisons performed, rows written, ...)
+into the recorder of the running command. The CLI resets the recorder for
+every command, attaches a summary to the command's audit entries, and with
+--profile also captures cProfile and tracemalloc data and prints a report.
+
+Recording is a perf_counter call and a dict update, so it stays enabled;
+hot loops count locally and record their totals once.
+"""
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+
+class Recorder:
+    """Accumulated phase timings and counters"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, list] = {}
+        self.counters: Dict[str, int] = {}
+
+    def add_time(self, name: str, seconds: float, calls: int = 1):
+        """Add time spent in a phase"""
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [seconds, calls]
+        else:
+            phase[0] += seconds
+            phase[1] += calls
+
+    def count(self, name: str, n: int = 1):
+        """Increase a counter"""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as a phase (nested phases are timed separately)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact timings for audit entries: phase -> seconds, plus counters"""
+        if not self.phases and not self.counters:
+            return {}
+        summary: Dict[str, Any] = {
+            'total_s': round(time.perf_counter() - self.started, 4),
+            'phases': {name: round(seconds, 4) for name, (seconds, _) in self.phases.items()},
+        }
+        if self.counters:
+            summary['counters'] = dict(self.counters)
+        return summary
+
+    def report(self) -> Dict[str, Any]:
+        """Structured report with call counts"""
+        return {
+            'total_s': round(time.perf_counter() - self.started, 6),
+            'phases': {
+                name: {'seconds': round(seconds, 6), 'calls': calls}
+                for name, (seconds, calls) in self.phases.items()
+            },
+            'counters': dict(self.counters),
+        }
+
+
+# Recorder of the command being run
+recorder = Recorder()
+
+reset = recorder.reset
+add_time = recorder.add_time
+count = recorder.count
+phase = recorder.phase
+summary = recorder.summary
+
+
+class Profiler:
+    """
+    cProfile and tracemalloc capture around a command
+
+    Args:
+        top: Number of functions and allocation sites in the report
+    """
+
+    def __init__(self, top: int = 20):
+        self.top = top
+        self._profile = None
+        self._memory: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        import cProfile
+        import tracemalloc
+        tracemalloc.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self):
+        import tracemalloc
+        self._profile.disable()
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self._memory = {
+            'current_mb': round(current / 1e6, 3),
+            'peak_mb': round(peak / 1e6, 3),
+            'top_allocations': [
+                {'site': str(stat.traceback[0]), 'size_kb': round(stat.size / 1e3, 1), 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:self.top]
+            ],
+        }
+
+    def functions(self) -> list:
+        """Functions with the most cumulative time"""
+        import pstats
+        stats = pstats.Stats(self._profile)
+        rows = []
+        for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': f"{filename}:{line}({name})",
+                'calls': calls,
+                'total_s': round(total, 6),
+                'cumulative_s': round(cumulative, 6),
+            })
+        rows.sort(key=lambda row: row['cumulative_s'], reverse=True)
+        return rows[:self.top]
+
+    def report(self) -> Dict[str, Any]:
+        """Recorder report plus profile and memory data"""
+        report = recorder.report()
+        report['functions'] = self.functions()
+        report['memory'] = self._memory
+        return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Human-readable form of a (profiler) report"""
+    lines = ["=== Profile ===", f"Total: {report['total_s']:.3f}s"]
+    if report['phases']:
+        lines.append("Phases:")
+        for name, phase_data in sorted(report['phases'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"  {name:<24} {phase_data['seconds']:>9.4f}s  ({phase_data['calls']} calls)")
+    if report['counters']:
+        lines.append("Counters:")
+        for name, value in sorted(report['counters'].items()):
+            lines.append(f"  {name:<24} {value:>12,}")
+    memory = report.get('memory')
+    if memory:
+        lines.append(f"Memory: peak {memory['peak_mb']:.1f} MB traced")
+        for allocation in memory['top_allocations'][:5]:
+            lines.append(f"  {allocation['size_kb']:>10.1f} KB  {allocation['site']}")
+    if report.get('functions'):
+        lines.append("Top functions (cumulative):")
+        for row in report['functions']:
+            lines.append(f"  {row['cumulative_s']:>9.4f}s {row['calls']:>9}  {row['function']}")
+    return "\n".join(lines)
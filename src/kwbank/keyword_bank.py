@@ -1,38 +1,138 @@
 """
 Keyword Bank storage and management
 """
-import json
 import os
-from typing import List, Dict, Set, Tuple, Optional
+import sys
+import time
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Dict, Set, Tuple, Optional
 from collections import defaultdict
 from datetime import datetime
 
 from .models import (
-    Keyword, AdGroup, Campaign, KeywordType, MatchType,
-    Brand, Product, Mapping, NamingRule, KeywordIntent, KeywordStatus
+    Keyword, AdGroup, Campaign, KeywordSet, KeywordType, MatchType,
+    Brand, Product, Mapping, NamingRule, KeywordIntent, KeywordStatus,
+    KEYWORD_COUNT_FIELDS, encode_keyword_counts, decode_keyword_counts
 )
-from .text_utils import TextNormalizer, SimilarityChecker, IntentDetector
+from .text_utils import IntentDetector
+from .similarity_index import INDEXED_ALGORITHMS, SimilarityIndex, similarity_function
+from .minhash import DEFAULT_RECALL, MinHashLSH, MinHashStore, measure_recall, sidecar_path
+from .normalization import DEFAULT_LOCALE, NormalizationProfile, get_profile
+from .storage import (
+    FileLock, ConcurrentModificationError, StorageLoadError, atomic_write_bytes,
+    default_storage_path, file_signature
+)
+from .snapshot import is_snapshot_path, read_snapshot, write_snapshot
+from . import codec, instrumentation
+
+# progress(done, total) callback of the dedupe iterators
+ProgressCallback = Callable[[int, int], None]
+# Keywords between progress calls of single-pass scans
+PROGRESS_INTERVAL = 10_000
+
+
+def _compare_partition(job: Tuple[List[Keyword], float, str]) -> Tuple[List[Dict], int]:
+    """Worker process entry point of find_fuzzy_duplicates_by_brand()"""
+    keywords, threshold, algorithm = job
+    return KeywordBank._compare_keywords(keywords, threshold, algorithm)
+
+
+def _compare_partitions(partitions: List[List[Keyword]], threshold: float, algorithm: str,
+                        workers: int = 0) -> Iterator[Tuple[List[Dict], int]]:
+    """
+    Fuzzy duplicates of each partition, in worker processes when workers > 1
+    
+    Partitions are submitted largest first (pairwise cost grows with the
+    square of their size) so the pool doesn't wait on a big one started last.
+    Results are yielded in partition order; closing the generator cancels
+    the partitions not started yet.
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(partitions))
+    
+    if workers <= 1:
+        for keywords in partitions:
+            yield KeywordBank._compare_keywords(keywords, threshold, algorithm)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor
+    order = sorted(range(len(partitions)), key=lambda index: -len(partitions[index]))
+    executor = ProcessPoolExecutor(max_workers=workers)
+    futures = {}
+    try:
+        for index in order:
+            futures[index] = executor.submit(_compare_partition, (partitions[index], threshold, algorithm))
+        for index in range(len(partitions)):
+            yield futures[index].result()
+    finally:
+        # Drop partitions not started yet (shutdown's cancel_futures needs 3.9)
+        for future in futures.values():
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _report_progress(items: List, progress: Optional[ProgressCallback]) -> Iterable:
+    """Iterate items, calling progress(items done, total) every PROGRESS_INTERVAL items and at the end"""
+    if progress is None:
+        yield from items
+        return
+    total = len(items)
+    for done, item in enumerate(items, 1):
+        yield item
+        if done % PROGRESS_INTERVAL == 0:
+            progress(done, total)
+    progress(total, total)
 
 
 class KeywordBank:
     """Main keyword bank for storing and managing keywords"""
     
-    def __init__(self, storage_path: str = "data/keyword_bank.json"):
+    def __init__(self, storage_path: Optional[str] = None):
+        storage_path = storage_path or default_storage_path()
         self.storage_path = storage_path
+        self._file_lock = FileLock(storage_path)
+        # Version of the storage file the in-memory state was loaded from
+        self._signature = None
+        # Why the storage file could not be loaded; such a bank is never saved
+        self.load_error: Optional[Exception] = None
+        self._reset()
+        self._load()
+    
+    def _reset(self):
+        """Clear the in-memory state"""
         self.keywords: List[Keyword] = []
-        self.campaigns: List[Campaign] = []
+        self._campaigns: Optional[List[Campaign]] = []
+        self._campaign_data: List[dict] = []
         self.brands: List[Brand] = []
         self.products: List[Product] = []
         self.mappings: List[Mapping] = []
         self.naming_rules: List[NamingRule] = []
-        self._load()
+        self._keywords_by_id: Dict[int, Keyword] = {}
+        self._next_keyword_id = 1
+        # keyword_id -> slot in self.keywords when the map was built, built on
+        # first removal; slots freed since then shift later keywords down
+        self._keyword_slots: Optional[Dict[int, int]] = None
+        self._removed_slots: List[int] = []
+        # (normalized_text, keyword_type, brand) -> keyword_id, built on first use
+        self._dedupe_index: Optional[Dict[Tuple[str, KeywordType, str], int]] = None
+        # Further keywords stored under a key already in the index
+        self._dedupe_shared: Dict[Tuple[str, KeywordType, str], List[int]] = {}
+        # Keyword counts per KEYWORD_COUNT_FIELDS combination, decoded on first use
+        self._keyword_counts: Optional[Dict[tuple, int]] = None
+        self._keyword_counts_data: Optional[list] = None
+        self._counted_keywords = 0
+        self._minhash_store: Optional[MinHashStore] = None
     
     def _load(self):
         """Load keywords from storage"""
+        self._signature = file_signature(self.storage_path)
         if os.path.exists(self.storage_path):
             try:
-                with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
+                with instrumentation.phase('load'), codec.paused_gc():
+                    data, keywords = self._read_storage()
+                    now = datetime.now()
                     
                     # Load brands
                     for brand_data in data.get('brands', []):
@@ -60,24 +160,35 @@ class KeywordBank:
                         )
                         self.products.append(product)
                     
-                    # Load keywords
-                    self.keywords = [
-                        Keyword(
-                            text=k['text'],
-                            brand=k['brand'],
-                            match_type=MatchType(k['match_type']),
-                            keyword_type=KeywordType(k['keyword_type']),
-                            normalized_text=k.get('normalized_text', ''),
-                            intent=KeywordIntent(k.get('intent', 'unknown')),
-                            suggested_bid=k.get('suggested_bid'),
-                            tags=k.get('tags', []),
-                            notes=k.get('notes', ''),
-                            owner=k.get('owner', ''),
-                            status=KeywordStatus(k.get('status', 'active')),
-                            source=k.get('source', ''),
-                            created_at=datetime.fromisoformat(k.get('created_at', datetime.now().isoformat()))
-                        ) for k in data.get('keywords', [])
-                    ]
+                    # Load keywords (timestamps are parsed on first access)
+                    if keywords is None:
+                        match_types = codec.enum_values(MatchType)
+                        keyword_types = codec.enum_values(KeywordType)
+                        intents = codec.enum_values(KeywordIntent)
+                        statuses = codec.enum_values(KeywordStatus)
+                        keywords = [
+                            Keyword(
+                                text=k['text'],
+                                brand=k['brand'],
+                                match_type=match_types[k['match_type']],
+                                keyword_type=keyword_types[k['keyword_type']],
+                                normalized_text=k.get('normalized_text', ''),
+                                intent=intents[k.get('intent', 'unknown')],
+                                suggested_bid=k.get('suggested_bid'),
+                                tags=k.get('tags', []),
+                                notes=k.get('notes', ''),
+                                owner=k.get('owner', ''),
+                                status=statuses[k.get('status', 'active')],
+                                source=k.get('source', ''),
+                                created_at=k.get('created_at') or now,
+                                keyword_id=k.get('keyword_id', 0)
+                            ) for k in data.get('keywords', [])
+                        ]
+                    self.keywords = keywords
+                    instrumentation.count('keywords_loaded', len(keywords))
+                    self._next_keyword_id = data.get('next_keyword_id', 1)
+                    self._keyword_counts_data = data.get('keyword_counts')
+                    self._index_keyword_ids()
                     
                     # Load mappings
                     for map_data in data.get('mappings', []):
@@ -88,7 +199,8 @@ class KeywordBank:
                             ad_group=map_data.get('ad_group', ''),
                             bid_override=map_data.get('bid_override'),
                             notes=map_data.get('notes', ''),
-                            created_at=datetime.fromisoformat(map_data.get('created_at', datetime.now().isoformat()))
+                            created_at=map_data.get('created_at') or now,
+                            keyword_id=map_data.get('keyword_id')
                         )
                         self.mappings.append(mapping)
                     
@@ -103,56 +215,348 @@ class KeywordBank:
                         )
                         self.naming_rules.append(rule)
                     
-                    # Load campaigns (with backward compatibility)
-                    from .models import CampaignType, AutoManual, CampaignGoal
-                    for camp_data in data.get('campaigns', []):
-                        campaign = Campaign(
-                            name=camp_data['name'],
-                            brand=camp_data['brand'],
-                            campaign_id=camp_data.get('campaign_id', ''),
-                            campaign_type=CampaignType(camp_data.get('campaign_type', 'sp')),
-                            auto_manual=AutoManual(camp_data.get('auto_manual', 'manual')),
-                            goal=CampaignGoal(camp_data.get('goal', 'conversion')),
-                            match_type=MatchType(camp_data['match_type']) if camp_data.get('match_type') else None,
-                            date_yyyymmdd=camp_data.get('date_yyyymmdd', ''),
-                            created_at=datetime.fromisoformat(camp_data.get('created_at', datetime.now().isoformat()))
-                        )
-                        for ag_data in camp_data.get('ad_groups', []):
-                            ad_group = AdGroup(name=ag_data['name'], asin=ag_data['asin'])
-                            for kw_data in ag_data.get('keywords', []):
-                                kw = Keyword(
-                                    text=kw_data['text'],
-                                    brand=kw_data['brand'],
-                                    match_type=MatchType(kw_data['match_type']),
-                                    keyword_type=KeywordType(kw_data['keyword_type'])
-                                )
-                                ad_group.add_keyword(kw)
-                            for kw_data in ag_data.get('negative_keywords', []):
-                                kw = Keyword(
-                                    text=kw_data['text'],
-                                    brand=kw_data['brand'],
-                                    match_type=MatchType(kw_data['match_type']),
-                                    keyword_type=KeywordType(kw_data['keyword_type'])
-                                )
-                                ad_group.add_keyword(kw)
-                            campaign.add_ad_group(ad_group)
-                        self.campaigns.append(campaign)
+                    # Campaigns are materialized on first access
+                    if data.get('campaigns'):
+                        self._campaign_data = data['campaigns']
+                        self._campaigns = None
             except Exception as e:
+                # What was read stays available to read-only commands, but
+                # saving it would overwrite the file with partial data
+                self.load_error = e
                 print(f"Error loading data: {e}")
     
+    def _read_storage(self) -> Tuple[dict, Optional[List[Keyword]]]:
+        """
+        Read the storage file in the format given by its extension
+        Returns (data, keywords); keywords are None when they still need to
+        be built from data['keywords']
+        """
+        if is_snapshot_path(self.storage_path):
+            return read_snapshot(self.storage_path)
+        with open(self.storage_path, 'rb') as f:
+            return codec.loads(f.read()), None
+    
+    def reload(self):
+        """Discard the in-memory state and load the bank from storage again"""
+        self.load_error = None
+        self._reset()
+        self._load()
+    
+    def is_stale(self) -> bool:
+        """Check if another process saved the bank since it was loaded"""
+        return file_signature(self.storage_path) != self._signature
+    
+    @contextmanager
+    def locked(self):
+        """
+        Hold the bank's inter-process write lock for a read-modify-write cycle
+        
+        The bank is reloaded first if another process saved it in the
+        meantime. Call save() inside the block to persist changes.
+        """
+        with self._file_lock:
+            if self.is_stale():
+                self.reload()
+            yield self
+    
+    def _index_keyword_ids(self):
+        """Build the ID index, assigning IDs to keywords stored without one"""
+        self._keywords_by_id = {}
+        self._keyword_slots = None
+        self._next_keyword_id = max(
+            [self._next_keyword_id] + [k.keyword_id + 1 for k in self.keywords]
+        )
+        for keyword in self.keywords:
+            if not keyword.keyword_id or keyword.keyword_id in self._keywords_by_id:
+                keyword.keyword_id = self._next_keyword_id
+                self._next_keyword_id += 1
+            self._keywords_by_id[keyword.keyword_id] = keyword
+    
+    @staticmethod
+    def dedupe_key(keyword: Keyword) -> Tuple[str, KeywordType, str]:
+        """Key under which a keyword is considered an exact duplicate"""
+        return (keyword.normalized_text, keyword.keyword_type, keyword.brand)
+    
+    def _get_dedupe_index(self) -> Dict[Tuple[str, KeywordType, str], int]:
+        """
+        Get the dedupe key index, building it from the keywords on first use
+        It is kept up to date as keywords are added and removed, but not
+        persisted: validating a stored copy against the keywords costs as much
+        as building it
+        """
+        if self._dedupe_index is None:
+            instrumentation.count('dedupe_index_built')
+            index = self._dedupe_index = {}
+            shared = self._dedupe_shared = {}
+            for keyword in self.keywords:
+                key = self.dedupe_key(keyword)
+                if key in index:
+                    shared.setdefault(key, []).append(keyword.keyword_id)
+                else:
+                    index[key] = keyword.keyword_id
+        return self._dedupe_index
+    
+    def keyword_counts(self) -> Dict[tuple, int]:
+        """
+        Running keyword counts per (brand, keyword_type, match_type, intent, status)
+        
+        The counts are kept up to date as keywords are added and removed, and
+        are persisted with the bank. Stored counts that don't match the stored
+        keywords (e.g. files written by older versions) are rebuilt.
+        """
+        if self._keyword_counts is None or self._counted_keywords != len(self.keywords):
+            counts = None
+            if self._keyword_counts is None and self._keyword_counts_data is not None:
+                counts = decode_keyword_counts(self._keyword_counts_data)
+                if sum(counts.values()) != len(self.keywords):
+                    counts = None
+            self._keyword_counts_data = None
+            instrumentation.count('keyword_counts_reused' if counts is not None else 'keyword_counts_rebuilt')
+            if counts is None:
+                counts = defaultdict(int)
+                for k in self.keywords:
+                    counts[(k.brand, k.keyword_type, k.match_type, k.intent, k.status)] += 1
+                counts = dict(counts)
+            self._keyword_counts = counts
+            self._counted_keywords = len(self.keywords)
+        return self._keyword_counts
+    
+    def refresh_keyword_counts(self):
+        """Recount keywords, e.g. after changing counted fields of stored keywords"""
+        self._keyword_counts = None
+        self._keyword_counts_data = None
+        self.keyword_counts()
+    
+    def _update_keyword_counts(self, keyword: Keyword, delta: int):
+        counts = self._keyword_counts
+        key = (keyword.brand, keyword.keyword_type, keyword.match_type, keyword.intent, keyword.status)
+        count = counts.get(key, 0) + delta
+        if count:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+        self._counted_keywords += delta
+    
+    def _add_keyword(self, keyword: Keyword):
+        """Store a keyword, assigning it a bank-unique ID"""
+        if not keyword.keyword_id or keyword.keyword_id in self._keywords_by_id:
+            keyword.keyword_id = self._next_keyword_id
+        self._next_keyword_id = max(self._next_keyword_id, keyword.keyword_id + 1)
+        self.keyword_counts()
+        self._keywords_by_id[keyword.keyword_id] = keyword
+        if self._keyword_slots is not None:
+            self._keyword_slots[keyword.keyword_id] = len(self.keywords) + len(self._removed_slots)
+        self.keywords.append(keyword)
+        self._update_keyword_counts(keyword, 1)
+        index = self._get_dedupe_index()
+        key = self.dedupe_key(keyword)
+        if key in index:
+            self._dedupe_shared.setdefault(key, []).append(keyword.keyword_id)
+        else:
+            index[key] = keyword.keyword_id
+    
+    def _keyword_position(self, keyword: Keyword) -> Tuple[int, int]:
+        """(position in self.keywords, slot) of a stored keyword, without scanning the list"""
+        slots = self._keyword_slots
+        if slots is not None:
+            slot = slots.get(keyword.keyword_id)
+            if slot is not None:
+                position = slot - bisect_left(self._removed_slots, slot)
+                if position < len(self.keywords) and self.keywords[position] is keyword:
+                    return position, slot
+        # Not built yet, or the list was changed directly: map it again
+        self._keyword_slots = {k.keyword_id: i for i, k in enumerate(self.keywords)}
+        self._removed_slots = []
+        position = self._keyword_slots[keyword.keyword_id]
+        return position, position
+    
+    def remove_keyword(self, keyword_id: int) -> Optional[Keyword]:
+        """Remove a keyword by ID, returning it if it was stored"""
+        keyword = self._keywords_by_id.pop(keyword_id, None)
+        if keyword is None:
+            return None
+        self.keyword_counts()
+        position, slot = self._keyword_position(keyword)
+        del self.keywords[position]
+        del self._keyword_slots[keyword_id]
+        insort(self._removed_slots, slot)
+        self._update_keyword_counts(keyword, -1)
+        index = self._get_dedupe_index()
+        key = self.dedupe_key(keyword)
+        # Another stored keyword may share the key (added outside import)
+        shared = self._dedupe_shared.get(key)
+        if index.get(key) == keyword_id:
+            if shared:
+                index[key] = shared.pop(0)
+            else:
+                del index[key]
+        elif shared and keyword_id in shared:
+            shared.remove(keyword_id)
+        if shared is not None and not shared:
+            del self._dedupe_shared[key]
+        return keyword
+    
+    def is_duplicate(self, keyword: Keyword) -> bool:
+        """Check if an exact duplicate of the keyword is stored"""
+        return self.dedupe_key(keyword) in self._get_dedupe_index()
+    
+    def get_keyword_by_id(self, keyword_id: int) -> Optional[Keyword]:
+        """Get a keyword by its ID"""
+        return self._keywords_by_id.get(keyword_id)
+    
+    def find_keyword(self, text: str, keyword_type: KeywordType, brand: str) -> Optional[Keyword]:
+        """Find a stored keyword by text, type and brand"""
+        index = self._get_dedupe_index()
+        for normalized in (
+            Keyword._normalize(text),
+            get_profile(self.brand_locale(brand)).normalize(text)
+        ):
+            keyword_id = index.get((normalized, keyword_type, brand))
+            if keyword_id is not None:
+                return self._keywords_by_id.get(keyword_id)
+        return None
+    
+    @property
+    def campaigns(self) -> List[Campaign]:
+        """Campaigns, resolving their keyword references on first access"""
+        if self._campaigns is None:
+            self._campaigns = [
+                self._campaign_from_dict(camp_data)
+                for camp_data in self._campaign_data
+            ]
+            self._campaign_data = []
+        return self._campaigns
+    
+    @campaigns.setter
+    def campaigns(self, campaigns: List[Campaign]):
+        self._campaigns = campaigns
+        self._campaign_data = []
+    
+    def _campaign_from_dict(self, camp_data: dict) -> Campaign:
+        """Build a campaign from storage (with backward compatibility)"""
+        from .models import CampaignType, AutoManual, CampaignGoal
+        campaign = Campaign(
+            name=camp_data['name'],
+            brand=camp_data['brand'],
+            campaign_id=camp_data.get('campaign_id', ''),
+            campaign_type=CampaignType(camp_data.get('campaign_type', 'sp')),
+            auto_manual=AutoManual(camp_data.get('auto_manual', 'manual')),
+            goal=CampaignGoal(camp_data.get('goal', 'conversion')),
+            match_type=MatchType(camp_data['match_type']) if camp_data.get('match_type') else None,
+            date_yyyymmdd=camp_data.get('date_yyyymmdd', ''),
+            created_at=datetime.fromisoformat(camp_data.get('created_at', datetime.now().isoformat()))
+        )
+        
+        unresolved = []
+        
+        def resolve(ref, keyword_type: KeywordType) -> Keyword:
+            if isinstance(ref, list):
+                # [keyword_id, text, match_type]
+                keyword_id, text, match_type = ref
+                keyword = self._keywords_by_id.get(keyword_id) if keyword_id else None
+                if keyword is None:
+                    if keyword_id:
+                        unresolved.append(text)
+                    keyword = Keyword(
+                        text=text,
+                        brand=campaign.brand,
+                        match_type=MatchType(match_type),
+                        keyword_type=keyword_type
+                    )
+                return keyword
+            
+            # Earlier format: keyword ID, or normalized text for keywords not in the bank
+            keyword_id = ref if isinstance(ref, int) else self._get_dedupe_index().get(
+                (ref, keyword_type, campaign.brand))
+            keyword = self._keywords_by_id.get(keyword_id)
+            if keyword is None:
+                # Only the reference is known; text and match type are a best guess
+                unresolved.append(str(ref))
+                keyword = Keyword(
+                    text=str(ref),
+                    brand=campaign.brand,
+                    match_type=campaign.match_type or MatchType.EXACT,
+                    keyword_type=keyword_type
+                )
+            return keyword
+        
+        keyword_sets = [
+            KeywordSet(
+                keywords=[resolve(ref, KeywordType.POSITIVE) for ref in set_data.get('keywords', [])],
+                negative_keywords=[resolve(ref, KeywordType.NEGATIVE) for ref in set_data.get('negative_keywords', [])]
+            ) for set_data in camp_data.get('keyword_sets', [])
+        ]
+        if unresolved:
+            print(f"Warning: campaign '{campaign.name}' references {len(unresolved)} keywords "
+                  f"no longer in the bank: {', '.join(unresolved[:5])}"
+                  f"{', ...' if len(unresolved) > 5 else ''}", file=sys.stderr)
+        
+        for ag_data in camp_data.get('ad_groups', []):
+            if 'keyword_set' in ag_data:
+                ad_group = AdGroup.from_keyword_set(
+                    ag_data['name'], ag_data['asin'], keyword_sets[ag_data['keyword_set']]
+                )
+            else:
+                # Legacy format with full keyword copies per ad group
+                ad_group = AdGroup(name=ag_data['name'], asin=ag_data['asin'])
+                for kw_data in ag_data.get('keywords', []) + ag_data.get('negative_keywords', []):
+                    kw = Keyword(
+                        text=kw_data['text'],
+                        brand=kw_data['brand'],
+                        match_type=MatchType(kw_data['match_type']),
+                        keyword_type=KeywordType(kw_data['keyword_type'])
+                    )
+                    ad_group.add_keyword(kw)
+            campaign.add_ad_group(ad_group)
+        return campaign
+    
     def save(self):
-        """Save keywords to storage"""
-        os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-        data = {
-            'brands': [b.to_dict() for b in self.brands],
-            'products': [p.to_dict() for p in self.products],
-            'keywords': [k.to_dict() for k in self.keywords],
-            'mappings': [m.to_dict() for m in self.mappings],
-            'naming_rules': [r.to_dict() for r in self.naming_rules],
-            'campaigns': [c.to_dict() for c in self.campaigns]
-        }
-        with open(self.storage_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        """
+        Save keywords to storage
+        
+        The file is replaced atomically under the bank's write lock. Raises
+        ConcurrentModificationError if another process saved the bank since
+        it was loaded; use locked() around read-modify-write cycles. Raises
+        StorageLoadError if the file could not be loaded.
+        """
+        with self._file_lock, instrumentation.phase('save'):
+            if self.load_error is not None:
+                raise StorageLoadError(
+                    f"{self.storage_path} could not be loaded ({self.load_error}); not overwriting it"
+                )
+            if self.is_stale():
+                raise ConcurrentModificationError(
+                    f"{self.storage_path} was modified by another process"
+                )
+            self._write(self.storage_path)
+            self._signature = file_signature(self.storage_path)
+    
+    def save_as(self, path: str):
+        """Write the bank to another storage file, in the format given by its extension"""
+        with FileLock(path), instrumentation.phase('save'):
+            self._write(path)
+    
+    def _write(self, path: str):
+        instrumentation.count('keywords_saved', len(self.keywords))
+        with codec.paused_gc():
+            data = {
+                'brands': [b.to_dict() for b in self.brands],
+                'products': [p.to_dict() for p in self.products],
+                'mappings': [m.to_dict() for m in self.mappings],
+                'naming_rules': [r.to_dict() for r in self.naming_rules],
+                'next_keyword_id': self._next_keyword_id,
+                'keyword_counts': encode_keyword_counts(self.keyword_counts()),
+                'campaigns': (
+                    [c.to_dict() for c in self._campaigns]
+                    if self._campaigns is not None else self._campaign_data
+                )
+            }
+            if is_snapshot_path(path):
+                # Keywords are stored as columns
+                write_snapshot(path, data, self.keywords)
+                return
+            data['keywords'] = [k.to_dict() for k in self.keywords]
+        atomic_write_bytes(path, codec.dumps(data))
     
     def import_keywords(self, keywords: List[Keyword]) -> Tuple[int, int]:
         """
@@ -163,18 +567,20 @@ class KeywordBank:
         added = 0
         duplicates = 0
         
-        # Create a set of (normalized_text, keyword_type, brand) tuples for existing keywords
-        existing_normalized = {(k.normalized_text, k.keyword_type, k.brand): k for k in self.keywords}
-        
-        for keyword in keywords:
-            key = (keyword.normalized_text, keyword.keyword_type, keyword.brand)
-            if key in existing_normalized:
-                duplicates += 1
-            else:
-                self.keywords.append(keyword)
-                existing_normalized[key] = keyword
-                added += 1
+        with instrumentation.phase('dedupe'):
+            # Persistent (normalized_text, keyword_type, brand) index of stored keywords
+            existing_normalized = self._get_dedupe_index()
+            
+            for keyword in keywords:
+                key = self.dedupe_key(keyword)
+                if key in existing_normalized:
+                    duplicates += 1
+                else:
+                    self._add_keyword(keyword)
+                    added += 1
         
+        instrumentation.count('exact_duplicates', duplicates)
+        instrumentation.count('keywords_added', added)
         return added, duplicates
     
     def get_keywords_by_brand(self, brand: str) -> List[Keyword]:
@@ -183,13 +589,41 @@ class KeywordBank:
     
     def get_all_brands(self) -> Set[str]:
         """Get all unique brand names"""
-        return {k.brand for k in self.keywords}
+        return {key[0] for key in self.keyword_counts()}
+    
+    def count_keywords(self, *fields: str) -> Dict[tuple, int]:
+        """
+        Number of keywords per combination of the given keyword fields
+        Fields of KEYWORD_COUNT_FIELDS are answered from the running counts
+        without scanning the keywords
+        """
+        counts = defaultdict(int)
+        if set(fields) <= set(KEYWORD_COUNT_FIELDS):
+            positions = [KEYWORD_COUNT_FIELDS.index(f) for f in fields]
+            for key, count in self.keyword_counts().items():
+                counts[tuple(key[i] for i in positions)] += count
+        else:
+            for k in self.keywords:
+                counts[tuple(getattr(k, f) for f in fields)] += 1
+        return dict(counts)
+    
+    @property
+    def keyword_count(self) -> int:
+        return len(self.keywords)
+    
+    @property
+    def campaign_count(self) -> int:
+        """Number of campaigns, without materializing them"""
+        if self._campaigns is not None:
+            return len(self._campaigns)
+        return len(self._campaign_data)
     
     def detect_conflicts(self) -> List[Dict]:
         """
         Detect conflicts between positive and negative keywords
         Returns list of conflicts with details
         """
+        start = time.perf_counter()
         conflicts = []
         
         # Group keywords by brand and type
@@ -218,6 +652,8 @@ class KeywordBank:
                     'negative_keywords': negative_texts
                 })
         
+        instrumentation.add_time('detect_conflicts', time.perf_counter() - start)
+        instrumentation.count('conflicts', len(conflicts))
         return conflicts
     
     def create_campaign(self, name: str, brand: str, ad_groups: List[AdGroup]) -> Campaign:
@@ -254,6 +690,15 @@ class KeywordBank:
                 return brand
         return None
     
+    def brand_locale(self, name: str) -> str:
+        """Default locale of a brand (DEFAULT_LOCALE for unregistered brands)"""
+        brand = self.get_brand_by_name(name)
+        return brand.default_locale if brand else DEFAULT_LOCALE
+    
+    def _brand_profiles(self) -> Dict[str, NormalizationProfile]:
+        """Normalization profile of each registered brand's default locale, by brand name"""
+        return {brand.name: get_profile(brand.default_locale) for brand in self.brands}
+    
     def get_all_brands_list(self) -> List[Brand]:
         """Get all brands"""
         return self.brands
@@ -279,7 +724,18 @@ class KeywordBank:
     
     # Mapping management methods
     def add_mapping(self, mapping: Mapping) -> bool:
-        """Add a new keyword-ASIN mapping"""
+        """
+        Add a new keyword-ASIN mapping
+        Links the mapping to the keyword ID when the keyword is stored
+        as a positive keyword of the product's brand
+        """
+        if mapping.keyword_id is None:
+            product = self.get_product_by_asin(mapping.asin)
+            brand = self.get_brand_by_id(product.brand_id) if product else None
+            if brand:
+                keyword = self.find_keyword(mapping.keyword, KeywordType.POSITIVE, brand.name)
+                if keyword:
+                    mapping.keyword_id = keyword.keyword_id
         self.mappings.append(mapping)
         return True
     
@@ -291,6 +747,10 @@ class KeywordBank:
         """Get all mappings for a keyword"""
         return [m for m in self.mappings if m.keyword == keyword]
     
+    def get_mappings_by_keyword_id(self, keyword_id: int) -> List[Mapping]:
+        """Get all mappings for a keyword ID"""
+        return [m for m in self.mappings if m.keyword_id == keyword_id]
+    
     # Naming rule management methods
     def add_naming_rule(self, rule: NamingRule) -> bool:
         """Add a new naming rule"""
@@ -314,19 +774,34 @@ class KeywordBank:
         Find exact duplicates based on normalized text
         Returns dict mapping normalized text to list of duplicate keywords
         """
+        return dict(self.iter_exact_duplicates(brand))
+    
+    def iter_exact_duplicates(
+        self,
+        brand: str = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> Iterator[Tuple[str, List[Keyword]]]:
+        """
+        Exact duplicate groups of find_exact_duplicates(), as (normalized text, keywords)
+        Groups are yielded after the scan, which calls progress(keywords scanned, total)
+        """
         keywords = self.keywords if not brand else self.get_keywords_by_brand(brand)
         
         duplicates = defaultdict(list)
-        for kw in keywords:
+        for kw in _report_progress(keywords, progress):
             duplicates[kw.normalized_text].append(kw)
         
         # Only return entries with more than one keyword
-        return {k: v for k, v in duplicates.items() if len(v) > 1}
+        for normalized, group in duplicates.items():
+            if len(group) > 1:
+                yield normalized, group
     
     def find_fuzzy_duplicates(
         self,
         brand: str = None,
-        threshold: float = 0.92
+        threshold: float = 0.92,
+        algorithm: str = 'jaro_winkler',
+        recall: float = DEFAULT_RECALL
     ) -> List[Dict]:
         """
         Find fuzzy duplicates using similarity comparison
@@ -334,58 +809,436 @@ class KeywordBank:
         Args:
             brand: Filter by brand
             threshold: Similarity threshold (0.0-1.0), default 0.92
+            algorithm: Similarity algorithm (see similarity_index.ALGORITHMS);
+                token-based algorithms only score keywords found through
+                their index instead of every pair, and minhash uses the
+                stored signatures with banded LSH
+            recall: Target LSH recall at the threshold (minhash only)
         
         Returns:
             List of dictionaries with fuzzy duplicate pairs and confidence scores
         """
+        return list(self.iter_fuzzy_duplicates(brand, threshold, algorithm, recall))
+    
+    def iter_fuzzy_duplicates(
+        self,
+        brand: str = None,
+        threshold: float = 0.92,
+        algorithm: str = 'jaro_winkler',
+        recall: float = DEFAULT_RECALL,
+        progress: Optional[ProgressCallback] = None,
+        resume_from: int = 0,
+        reported: Iterable[Dict] = ()
+    ) -> Iterator[Dict]:
+        """
+        Pairs of find_fuzzy_duplicates(), in the same order, as they are found
+        
+        Each pair is reported under its earlier keyword. The exhaustive
+        comparison yields a keyword's pairs once it has been compared with
+        the later ones; indexed algorithms score every candidate first.
+        
+        Args:
+            progress: Called with (keywords done, total keywords) once every
+                pair of the first keywords done has been yielded
+            resume_from: Continue an interrupted run after this many keywords done
+            reported: Pairs the interrupted run yielded for those keywords
+        """
+        start = time.perf_counter()
+        similarity_function(algorithm)  # raises ValueError for unknown algorithms
         keywords = self.keywords if not brand else self.get_keywords_by_brand(brand)
         
-        fuzzy_dupes = []
-        checked_pairs = set()
-        
-        for i, kw1 in enumerate(keywords):
-            for kw2 in keywords[i+1:]:
-                # Skip if different types or already checked
-                if kw1.keyword_type != kw2.keyword_type:
-                    continue
-                
-                pair = tuple(sorted([kw1.text, kw2.text]))
-                if pair in checked_pairs:
-                    continue
-                
-                checked_pairs.add(pair)
-                
-                # Check similarity
-                similarity = SimilarityChecker.jaro_winkler_similarity(
-                    kw1.normalized_text,
-                    kw2.normalized_text
-                )
-                
-                if similarity >= threshold:
-                    fuzzy_dupes.append({
-                        'keyword1': kw1.text,
-                        'keyword2': kw2.text,
-                        'similarity': similarity,
-                        'brand': kw1.brand,
-                        'type': kw1.keyword_type.value
-                    })
+        stats = {'comparisons': 0}
+        candidate_pairs = None
+        if algorithm == 'minhash':
+            candidate_pairs, stats['comparisons'] = self._minhash_fuzzy_pairs(keywords, threshold, recall)
         
-        return fuzzy_dupes
+        try:
+            yield from self._iter_compare(keywords, threshold, algorithm, candidate_pairs,
+                                          progress, resume_from, reported, stats)
+        finally:
+            instrumentation.add_time('fuzzy_dedupe', time.perf_counter() - start)
+            instrumentation.count('fuzzy_comparisons', stats['comparisons'])
     
-    def find_variant_duplicates(self, brand: str = None) -> Dict[str, List[Keyword]]:
+    def find_fuzzy_duplicates_by_brand(
+        self,
+        threshold: float = 0.92,
+        algorithm: str = 'jaro_winkler',
+        recall: float = DEFAULT_RECALL,
+        workers: int = 0
+    ) -> List[Dict]:
+        """
+        Find fuzzy duplicates within each brand, for every brand
+        
+        Unlike find_fuzzy_duplicates() without a brand, keywords are only
+        compared with keywords of the same brand and type. The (brand,
+        keyword_type) partitions run in parallel worker processes, largest
+        first so that a big brand doesn't start last; minhash partitions run
+        in this process, which holds the signature store.
+        
+        Args:
+            threshold: Similarity threshold (0.0-1.0)
+            algorithm: Similarity algorithm (see similarity_index.ALGORITHMS)
+            recall: Target LSH recall at the threshold (minhash only)
+            workers: Worker processes (default: CPU count; 1 runs in this process)
+        
+        Returns:
+            Pairs of each partition in the order of find_fuzzy_duplicates(),
+            partitions in order of their first keyword
+        """
+        return list(self.iter_fuzzy_duplicates_by_brand(threshold, algorithm, recall, workers))
+    
+    def iter_fuzzy_duplicates_by_brand(
+        self,
+        threshold: float = 0.92,
+        algorithm: str = 'jaro_winkler',
+        recall: float = DEFAULT_RECALL,
+        workers: int = 0,
+        progress: Optional[ProgressCallback] = None,
+        resume_from: int = 0
+    ) -> Iterator[Dict]:
+        """
+        Pairs of find_fuzzy_duplicates_by_brand(), one partition at a time
+        
+        Args:
+            progress: Called with (partitions done, total partitions) once
+                every pair of the first partitions done has been yielded
+            resume_from: Continue an interrupted run after this many partitions done
+        """
+        start = time.perf_counter()
+        similarity_function(algorithm)  # raises ValueError for unknown algorithms
+        partitions: Dict[Tuple[str, KeywordType], List[Keyword]] = defaultdict(list)
+        for kw in self.keywords:
+            partitions[(kw.brand, kw.keyword_type)].append(kw)
+        jobs = list(partitions.values())
+        
+        if algorithm == 'minhash':
+            store = self.minhash_signatures()
+            
+            def compare(keywords: List[Keyword]) -> Tuple[List[Dict], int]:
+                candidate_pairs, comparisons = self._minhash_fuzzy_pairs(keywords, threshold, recall, store)
+                return self._compare_keywords(keywords, threshold, algorithm, candidate_pairs)[0], comparisons
+            
+            results = map(compare, jobs[resume_from:])
+        else:
+            results = _compare_partitions(jobs[resume_from:], threshold, algorithm, workers)
+        
+        comparisons = 0
+        try:
+            for done, (dupes, partition_comparisons) in enumerate(results, resume_from + 1):
+                comparisons += partition_comparisons
+                yield from dupes
+                if progress:
+                    progress(done, len(jobs))
+        finally:
+            if hasattr(results, 'close'):
+                results.close()
+            instrumentation.add_time('fuzzy_dedupe', time.perf_counter() - start)
+            instrumentation.count('fuzzy_comparisons', comparisons)
+    
+    @staticmethod
+    def _compare_keywords(
+        keywords: List[Keyword],
+        threshold: float,
+        algorithm: str,
+        candidate_pairs: Optional[List[Tuple[int, int, float]]] = None
+    ) -> Tuple[List[Dict], int]:
+        """
+        Fuzzy duplicate pairs among keywords of the same type
+        
+        Returns:
+            (duplicate pairs, comparisons made)
+        """
+        stats = {'comparisons': 0}
+        fuzzy_dupes = list(KeywordBank._iter_compare(keywords, threshold, algorithm, candidate_pairs, stats=stats))
+        return fuzzy_dupes, stats['comparisons']
+    
+    @staticmethod
+    def _iter_compare(
+        keywords: List[Keyword],
+        threshold: float,
+        algorithm: str,
+        candidate_pairs: Optional[List[Tuple[int, int, float]]] = None,
+        progress: Optional[ProgressCallback] = None,
+        resume_from: int = 0,
+        reported: Iterable[Dict] = (),
+        stats: Optional[Dict[str, int]] = None
+    ) -> Iterator[Dict]:
+        """
+        Fuzzy duplicate pairs among keywords of the same type, as they are found
+        
+        Args:
+            candidate_pairs: Pairs already scored (minhash); by default
+                indexed algorithms look them up and others compare every pair
+            progress, resume_from, reported: See iter_fuzzy_duplicates()
+            stats: Its 'comparisons' count is increased by the comparisons made
+        """
+        similarity = similarity_function(algorithm)
+        comparisons = 0
+        total = len(keywords)
+        # Pairs reported before resuming are not reported again under another keyword
+        checked_pairs = {tuple(sorted([dupe['keyword1'], dupe['keyword2']])) for dupe in reported}
+        
+        def make_pair(kw1: Keyword, kw2: Keyword, score: float) -> Dict:
+            return {
+                'keyword1': kw1.text,
+                'keyword2': kw2.text,
+                'similarity': score,
+                'brand': kw1.brand,
+                'type': kw1.keyword_type.value
+            }
+        
+        try:
+            if candidate_pairs is None and algorithm in INDEXED_ALGORITHMS:
+                candidate_pairs, comparisons = KeywordBank._indexed_fuzzy_pairs(keywords, threshold, algorithm)
+            
+            if candidate_pairs is not None:
+                # Same pairs, in the same order, as the exhaustive comparison below
+                done = resume_from
+                for i, j, score in sorted(candidate_pairs):
+                    if i < resume_from:
+                        continue
+                    if progress and i > done:
+                        done = i
+                        progress(done, total)
+                    kw1, kw2 = keywords[i], keywords[j]
+                    pair = tuple(sorted([kw1.text, kw2.text]))
+                    if pair not in checked_pairs:
+                        checked_pairs.add(pair)
+                        yield make_pair(kw1, kw2, score)
+                if progress:
+                    progress(total, total)
+            else:
+                for i in range(resume_from, total):
+                    kw1 = keywords[i]
+                    for kw2 in keywords[i+1:]:
+                        # Skip if different types or already checked
+                        if kw1.keyword_type != kw2.keyword_type:
+                            continue
+                        
+                        pair = tuple(sorted([kw1.text, kw2.text]))
+                        if pair in checked_pairs:
+                            continue
+                        
+                        checked_pairs.add(pair)
+                        comparisons += 1
+                        
+                        # Check similarity
+                        score = similarity(kw1.normalized_text, kw2.normalized_text)
+                        
+                        if score >= threshold:
+                            yield make_pair(kw1, kw2, score)
+                    if progress:
+                        progress(i + 1, total)
+        finally:
+            if stats is not None:
+                stats['comparisons'] += comparisons
+    
+    @staticmethod
+    def _indexed_fuzzy_pairs(
+        keywords: List[Keyword],
+        threshold: float,
+        algorithm: str
+    ) -> Tuple[List[Tuple[int, int, float]], int]:
+        """
+        Similar keyword pairs of the same type via a similarity index
+        
+        Returns:
+            ([(earlier position, later position, similarity), ...], candidates scored)
+        """
+        indexes: Dict[KeywordType, SimilarityIndex] = {}
+        pairs = []
+        comparisons = 0
+        for j, kw in enumerate(keywords):
+            index = indexes.get(kw.keyword_type)
+            if index is None:
+                index = indexes[kw.keyword_type] = SimilarityIndex(algorithm, threshold)
+            matches, scored = index.match(kw.normalized_text)
+            comparisons += scored
+            pairs.extend((i, j, score) for i, score in matches)
+            index.add(j, kw.normalized_text)
+        return pairs, comparisons
+    
+    def _minhash_fuzzy_pairs(
+        self,
+        keywords: List[Keyword],
+        threshold: float,
+        recall: float,
+        store: Optional[MinHashStore] = None
+    ) -> Tuple[List[Tuple[int, int, float]], int]:
+        """
+        Similar keyword pairs of the same type via MinHash-LSH
+        
+        Keywords repeating the type and text of an earlier one are only
+        paired with it: the exhaustive comparison reports every other pair of
+        theirs under the earlier keyword's text.
+        
+        Returns:
+            ([(earlier position, later position, similarity), ...], LSH candidates)
+        """
+        unique, pairs = [], []
+        first: Dict[Tuple[KeywordType, str], int] = {}
+        for j, kw in enumerate(keywords):
+            i = first.setdefault((kw.keyword_type, kw.text), j)
+            if i == j:
+                unique.append(j)
+            else:
+                pairs.append((i, j, 1.0))
+        lsh, _, _, lsh_pairs = self._minhash_lsh([keywords[i] for i in unique], threshold, recall, store)
+        pairs.extend((unique[i], unique[j], score) for i, j, score in lsh_pairs)
+        return pairs, lsh.candidates
+    
+    def _minhash_lsh(self, keywords: List[Keyword], threshold: float, recall: float,
+                     store: Optional[MinHashStore] = None):
+        """LSH over the keywords' stored signatures, pairing keywords of the same type"""
+        signatures = self._minhash_rows(keywords, store)
+        type_numbers: Dict[KeywordType, int] = {}
+        groups = [type_numbers.setdefault(kw.keyword_type, len(type_numbers)) for kw in keywords]
+        lsh = MinHashLSH(threshold, recall=recall)
+        return lsh, signatures, groups, lsh.pairs(signatures, groups)
+    
+    def measure_minhash_recall(
+        self,
+        brand: str = None,
+        threshold: float = 0.92,
+        recall: float = DEFAULT_RECALL,
+        sample_size: int = 200
+    ) -> Dict:
+        """
+        Recall of find_fuzzy_duplicates(algorithm='minhash') on this bank
+        
+        Runs LSH over the keywords and compares its pairs with a brute-force
+        comparison of sample_size random keywords against all the others.
+        
+        Returns:
+            Dict with sample, pairs, found, recall, bands and rows
+        """
+        keywords = self.keywords if not brand else self.get_keywords_by_brand(brand)
+        lsh, signatures, groups, lsh_pairs = self._minhash_lsh(keywords, threshold, recall)
+        result = measure_recall(signatures, lsh_pairs, threshold, sample_size, groups)
+        result.update(bands=lsh.bands, rows=lsh.rows)
+        return result
+    
+    def minhash_signatures(self) -> MinHashStore:
+        """
+        MinHash signatures of all keywords, in keyword order
+        
+        Signatures are kept in a sidecar file next to the storage file and
+        only computed for keywords added or edited since it was written.
+        """
+        store = self._minhash_store
+        if store is None:
+            store = self._minhash_store = MinHashStore(sidecar_path(self.storage_path))
+        store.sync([(kw.keyword_id, kw.normalized_text) for kw in self.keywords])
+        if store.dirty:
+            try:
+                store.save()
+            except OSError:
+                # Read-only data directory: signatures are recomputed next time
+                pass
+        return store
+    
+    def _minhash_rows(self, keywords: List[Keyword], store: Optional[MinHashStore] = None):
+        """
+        Stored signatures of some of the bank's keywords, in their order
+        Pass a store already synced by minhash_signatures() to skip syncing
+        """
+        store = store or self.minhash_signatures()
+        rows = store.row_index()
+        return store.signatures.take([rows[kw.keyword_id] for kw in keywords])
+    
+    def find_variant_duplicates(
+        self,
+        brand: str = None,
+        threshold: Optional[float] = None,
+        recall: float = DEFAULT_RECALL
+    ) -> Dict[str, List[Keyword]]:
         """
         Find variant duplicates using stemming
         Groups keywords with the same stemmed form
+        
+        Args:
+            brand: Filter by brand
+            threshold: Also merge groups containing keywords whose MinHash
+                similarity reaches this threshold (found with banded LSH)
+            recall: Target LSH recall at the threshold
+        """
+        return dict(self.iter_variant_duplicates(brand, threshold, recall))
+    
+    def iter_variant_duplicates(
+        self,
+        brand: str = None,
+        threshold: Optional[float] = None,
+        recall: float = DEFAULT_RECALL,
+        progress: Optional[ProgressCallback] = None
+    ) -> Iterator[Tuple[str, List[Keyword]]]:
+        """
+        Variant groups of find_variant_duplicates(), as (stem, keywords)
+        Groups are yielded after stemming, which calls progress(keywords stemmed, total)
         """
         keywords = self.keywords if not brand else self.get_keywords_by_brand(brand)
         
+        # Keywords are stemmed in their brand's language
+        profiles = self._brand_profiles()
+        default_profile = get_profile()
         variants = defaultdict(list)
-        for kw in keywords:
-            stemmed = TextNormalizer.stem_text(kw.normalized_text)
+        for kw in _report_progress(keywords, progress):
+            stemmed = profiles.get(kw.brand, default_profile).stem_text(kw.normalized_text)
             variants[stemmed].append(kw)
         
+        if threshold is not None and keywords:
+            variants = self._merge_similar_variants(variants, threshold, recall)
+        
         # Only return entries with more than one keyword
-        return {k: v for k, v in variants.items() if len(v) > 1}
+        for stem, group in variants.items():
+            if len(group) > 1:
+                yield stem, group
+    
+    def _merge_similar_variants(
+        self,
+        variants: Dict[str, List[Keyword]],
+        threshold: float,
+        recall: float
+    ) -> Dict[str, List[Keyword]]:
+        """Union stem groups linked by an LSH pair, keyed by the first group's stem"""
+        stems = list(variants)
+        # One signature per distinct text of each group
+        members = []
+        representatives = []
+        for number, stem in enumerate(stems):
+            seen = set()
+            for kw in variants[stem]:
+                if kw.normalized_text not in seen:
+                    seen.add(kw.normalized_text)
+                    members.append(number)
+                    representatives.append(kw)
+        
+        parent = list(range(len(stems)))
+        
+        def find(number: int) -> int:
+            while parent[number] != number:
+                parent[number] = parent[parent[number]]
+                number = parent[number]
+            return number
+        
+        signatures = self._minhash_rows(representatives)
+        for i, j, _ in MinHashLSH(threshold, recall=recall).pairs(signatures):
+            root_i, root_j = find(members[i]), find(members[j])
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+        
+        merged: Dict[str, List[Keyword]] = defaultdict(list)
+        for number, stem in enumerate(stems):
+            merged[stems[find(number)]].extend(variants[stem])
+        return merged
+    
+    def _fuzzy_index(self, scope: Tuple[str, KeywordType], algorithm: str, threshold: float) -> SimilarityIndex:
+        """Similarity index of the keywords of one (brand, keyword_type)"""
+        index = SimilarityIndex(algorithm, threshold)
+        brand, keyword_type = scope
+        for kw in self.keywords:
+            if kw.brand == brand and kw.keyword_type == keyword_type:
+                index.add(kw.keyword_id, kw.normalized_text)
+        return index
     
     def enhance_keyword_metadata(self, keyword: Keyword) -> Keyword:
         """
@@ -409,11 +1262,28 @@ class KeywordBank:
         
         return keyword
     
+    def _normalize_by_locale(self, keywords: List[Keyword]):
+        """
+        Set the keywords' normalized_text with their brand's locale profile
+        Keywords are grouped by language and each group normalized in one pass
+        """
+        profiles = self._brand_profiles()
+        default_profile = get_profile()
+        groups: Dict[str, List[Keyword]] = defaultdict(list)
+        for keyword in keywords:
+            groups[profiles.get(keyword.brand, default_profile).language].append(keyword)
+        for language, group in groups.items():
+            normalized = get_profile(language).normalize_many([keyword.text for keyword in group])
+            for keyword, text in zip(group, normalized):
+                keyword.normalized_text = text
+    
     def import_keywords_enhanced(
         self,
         keywords: List[Keyword],
         auto_enhance: bool = True,
-        normalization_mode: str = 'enhanced'
+        normalization_mode: str = 'enhanced',
+        fuzzy_algorithm: str = 'jaro_winkler',
+        fuzzy_threshold: float = 0.92
     ) -> Tuple[int, int, Dict]:
         """
         Import keywords with enhanced processing
@@ -422,6 +1292,9 @@ class KeywordBank:
             keywords: List of keywords to import
             auto_enhance: Auto-detect intent and suggest bids
             normalization_mode: 'basic' or 'enhanced'
+            fuzzy_algorithm: Similarity algorithm for the fuzzy duplicate check
+                (token-based algorithms use an index per brand and type)
+            fuzzy_threshold: Similarity at which a keyword is a fuzzy duplicate
         
         Returns:
             (added_count, duplicate_count, stats_dict)
@@ -434,40 +1307,64 @@ class KeywordBank:
             'intents_detected': defaultdict(int)
         }
         
-        # Create a set of existing normalized keywords
-        existing_normalized = {
-            (k.normalized_text, k.keyword_type, k.brand): k 
-            for k in self.keywords
-        }
+        # Time per phase, accumulated locally and recorded once
+        normalize_s = dedupe_s = enhance_s = store_s = 0.0
+        comparisons = 0
+        clock = time.perf_counter
+        
+        # Persistent index of existing normalized keywords
+        existing_normalized = self._get_dedupe_index()
+        
+        similarity = similarity_function(fuzzy_algorithm)
+        # (brand, keyword_type) -> similarity index, built on first use
+        fuzzy_indexes: Dict[Tuple[str, KeywordType], SimilarityIndex] = {}
+        # (brand, keyword_type) -> normalized texts, for unindexed algorithms
+        scope_texts: Dict[Tuple[str, KeywordType], List[str]] = {}
+        use_index = fuzzy_algorithm in INDEXED_ALGORITHMS
+        
+        # Apply enhanced normalization if requested
+        if normalization_mode == 'enhanced':
+            start = clock()
+            self._normalize_by_locale(keywords)
+            normalize_s = clock() - start
         
         for keyword in keywords:
-            # Apply enhanced normalization if requested
-            if normalization_mode == 'enhanced':
-                keyword.normalized_text = TextNormalizer.normalize_enhanced(
-                    keyword.text,
-                    remove_diacritics=True,
-                    remove_punctuation=True,
-                    remove_stop_words=False
-                )
+            start = clock()
             
             # Check for exact duplicates
-            key = (keyword.normalized_text, keyword.keyword_type, keyword.brand)
+            key = self.dedupe_key(keyword)
             if key in existing_normalized:
                 duplicates += 1
+                dedupe_s += clock() - start
                 continue
             
             # Check for fuzzy duplicates among existing
             is_fuzzy_dupe = False
-            for existing_kw in self.keywords:
-                if (existing_kw.brand == keyword.brand and 
-                    existing_kw.keyword_type == keyword.keyword_type):
-                    if SimilarityChecker.are_fuzzy_duplicates(
-                        keyword.normalized_text,
-                        existing_kw.normalized_text
-                    ):
+            scope = (keyword.brand, keyword.keyword_type)
+            if use_index:
+                index = fuzzy_indexes.get(scope)
+                if index is None:
+                    index = fuzzy_indexes[scope] = self._fuzzy_index(scope, fuzzy_algorithm, fuzzy_threshold)
+                matches, scored = index.match(keyword.normalized_text)
+                comparisons += scored
+                if matches:
+                    is_fuzzy_dupe = True
+                    stats['fuzzy_duplicates'] += 1
+            else:
+                texts = scope_texts.get(scope)
+                if texts is None:
+                    texts = scope_texts[scope] = [
+                        kw.normalized_text for kw in self.keywords
+                        if kw.brand == keyword.brand and kw.keyword_type == keyword.keyword_type
+                    ]
+                for existing_text in texts:
+                    comparisons += 1
+                    if similarity(keyword.normalized_text, existing_text) >= fuzzy_threshold:
                         is_fuzzy_dupe = True
                         stats['fuzzy_duplicates'] += 1
                         break
+            deduped_at = clock()
+            dedupe_s += deduped_at - start
             
             if is_fuzzy_dupe:
                 duplicates += 1
@@ -478,10 +1375,25 @@ class KeywordBank:
                 keyword = self.enhance_keyword_metadata(keyword)
                 stats['enhanced'] += 1
                 stats['intents_detected'][keyword.intent.value] += 1
+            enhanced_at = clock()
+            enhance_s += enhanced_at - deduped_at
             
             # Add keyword
-            self.keywords.append(keyword)
-            existing_normalized[key] = keyword
+            self._add_keyword(keyword)
+            if use_index:
+                index.add(keyword.keyword_id, keyword.normalized_text)
+            else:
+                texts.append(keyword.normalized_text)
             added += 1
+            store_s += clock() - enhanced_at
         
+        calls = len(keywords)
+        instrumentation.add_time('normalize', normalize_s, calls)
+        instrumentation.add_time('dedupe', dedupe_s, calls)
+        instrumentation.add_time('enhance', enhance_s, calls)
+        instrumentation.add_time('store', store_s, calls)
+        instrumentation.count('fuzzy_comparisons', comparisons)
+        instrumentation.count('exact_duplicates', duplicates - stats['fuzzy_duplicates'])
+        instrumentation.count('fuzzy_duplicates', stats['fuzzy_duplicates'])
+        instrumentation.count('keywords_added', added)
         return added, duplicates, stats
@@ -0,0 +1,525 @@
+"""
+MinHash-LSH engine for near-duplicate detection in large banks
+
+Signatures are MinHashes of a keyword's character 3-shingles. Each shingle
+is folded into an integer below PRIME and hashed with multiply-shift
+hashing, ((a * x + b) mod 2**64) >> 32, which only needs 64-bit integer
+arithmetic, so signatures are computed with NumPy in batches when it is
+installed (pip install kwbank[lsh]) and in pure Python otherwise, with
+identical results. KWBANK_NUMPY=0 forces the pure-Python path.
+
+Banded LSH then finds candidate pairs without comparing every pair: keywords
+whose signatures agree on all rows of some band share a bucket. Bands and
+rows are derived from the threshold and a target recall (the probability
+that a pair exactly at the threshold becomes a candidate); measure_recall()
+checks the achieved recall against brute force for a sample of keywords.
+
+A bank's signatures are kept in a sidecar file next to it (see
+MinHashStore) and only recomputed for new or changed keywords.
+"""
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .storage import atomic_write_bytes
+from . import instrumentation
+
+# Largest prime below 2**32: shingle codes fit in uint32
+PRIME = 4294967291
+DEFAULT_NUM_PERM = 64
+# Probability that a pair exactly at the threshold lands in a shared LSH bucket
+DEFAULT_RECALL = 0.95
+BATCH_SIZE = 50_000
+SIDECAR_SUFFIX = '.minhash'
+
+# Base for folding characters into a shingle code (one above the largest code point)
+_CODE_BASE = 0x110000
+_MASK64 = (1 << 64) - 1
+# Value of every signature component of a text without shingles
+_EMPTY = (1 << 32) - 1
+_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+_MAGIC = b'KWMH'
+_VERSION = 1
+# magic, version, num_perm, seed, count
+_HEADER = struct.Struct('<4sHHIQ')
+# Candidate pairs scored per NumPy chunk (bounds the temporary signature copies)
+_SCORE_CHUNK = 250_000
+
+
+def numpy_module():
+    """NumPy if it is installed and not disabled with KWBANK_NUMPY=0, else None"""
+    if os.environ.get('KWBANK_NUMPY') == '0':
+        return None
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def shingle_codes(text: str) -> Set[int]:
+    """Character 3-shingles (the whole text if shorter) folded into integers below PRIME"""
+    if len(text) <= 3:
+        if not text:
+            return set()
+        code = 0
+        for char in text:
+            code = (code * _CODE_BASE + ord(char)) % PRIME
+        return {code}
+    codes = [ord(char) for char in text]
+    base = _CODE_BASE
+    return {
+        ((c0 * base + c1) % PRIME * base + c2) % PRIME
+        for c0, c1, c2 in zip(codes, codes[1:], codes[2:])
+    }
+
+
+def lsh_params(threshold: float, num_perm: int = DEFAULT_NUM_PERM,
+               recall: float = DEFAULT_RECALL) -> Tuple[int, int]:
+    """
+    LSH (bands, rows) for a similarity threshold
+
+    Picks the most rows per band (fewest false candidates) for which a pair
+    with Jaccard similarity equal to the threshold still shares a bucket with
+    probability `recall`: 1 - (1 - threshold**rows)**bands >= recall.
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class Signatures:
+    """
+    Signature matrix: one row of num_perm unsigned 32-bit values per text,
+    stored flat in an array (viewed as a 2-D NumPy array without copying)
+    """
+
+    def __init__(self, num_perm: int, values: Optional[array] = None):
+        self.num_perm = num_perm
+        self.values = values if values is not None else array(_TYPECODE)
+
+    def __len__(self) -> int:
+        return len(self.values) // self.num_perm
+
+    def row(self, index: int) -> Tuple[int, ...]:
+        start = index * self.num_perm
+        return tuple(self.values[start:start + self.num_perm])
+
+    def matrix(self, np):
+        return np.frombuffer(self.values, dtype=np.uint32).reshape(-1, self.num_perm)
+
+    def take(self, rows: Sequence[int]) -> 'Signatures':
+        """Signatures of the given rows, in that order"""
+        np = numpy_module()
+        if np is not None:
+            selected = self.matrix(np)[np.asarray(rows, dtype=np.int64)]
+            return Signatures(self.num_perm, array(_TYPECODE, selected.tobytes()))
+        values = array(_TYPECODE)
+        num_perm = self.num_perm
+        for row in rows:
+            values.extend(self.values[row * num_perm:(row + 1) * num_perm])
+        return Signatures(num_perm, values)
+
+
+class MinHasher:
+    """
+    MinHash signatures of character shingle sets
+
+    Args:
+        num_perm: Number of hash permutations (signature length)
+        seed: Seed of the permutation coefficients
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        self.num_perm = num_perm
+        self.seed = seed
+        rng = random.Random(seed)
+        # Odd multipliers and offsets of the multiply-shift hash functions
+        self.permutations = [
+            (rng.getrandbits(64) | 1, rng.getrandbits(64))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        codes = shingle_codes(text)
+        if not codes:
+            return (_EMPTY,) * self.num_perm
+        return tuple(
+            min([((a * code + b) & _MASK64) >> 32 for code in codes])
+            for a, b in self.permutations
+        )
+
+    @staticmethod
+    def similarity(signature1: Sequence[int], signature2: Sequence[int]) -> float:
+        """Estimated Jaccard similarity: share of equal signature components"""
+        equal = sum(1 for x, y in zip(signature1, signature2) if x == y)
+        return equal / len(signature1)
+
+    def signatures(self, texts: Sequence[str], batch_size: int = BATCH_SIZE) -> Signatures:
+        """Signatures of many texts, computed in NumPy batches when available"""
+        start = time.perf_counter()
+        np = numpy_module()
+        values = array(_TYPECODE)
+        if np is None:
+            for text in texts:
+                values.extend(self.signature(text))
+        else:
+            for offset in range(0, len(texts), batch_size):
+                batch = self._numpy_signatures(np, texts[offset:offset + batch_size])
+                values.frombytes(batch.tobytes())
+        instrumentation.add_time('minhash_signatures', time.perf_counter() - start)
+        instrumentation.count('minhash_signatures', len(texts))
+        return Signatures(self.num_perm, values)
+
+    def _numpy_signatures(self, np, texts: Sequence[str]):
+        """Signature matrix (len(texts) x num_perm, uint32) of one batch"""
+        count = len(texts)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=count)
+        chars = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        starts = np.zeros(count, dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        prime = np.uint64(PRIME)
+        base = np.uint64(_CODE_BASE)
+
+        # Shingles per text: len - 2 trigrams, or the whole text when it has 1-2 chars
+        long = lengths >= 3
+        shingle_counts = np.where(long, lengths - 2, np.minimum(lengths, 1))
+        shingle_starts = np.zeros(count, dtype=np.int64)
+        np.cumsum(shingle_counts[:-1], out=shingle_starts[1:])
+        codes = np.empty(int(shingle_counts.sum()), dtype=np.uint64)
+
+        if long.any():
+            counts = shingle_counts[long]
+            offsets = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+            source = np.repeat(starts[long], counts) + offsets
+            trigrams = (chars[source] * base + chars[source + 1]) % prime
+            codes[np.repeat(shingle_starts[long], counts) + offsets] = (trigrams * base + chars[source + 2]) % prime
+        for index in np.flatnonzero(~long & (lengths > 0)):
+            codes[shingle_starts[index]] = next(iter(shingle_codes(texts[index])))
+
+        signatures = np.full((count, self.num_perm), _EMPTY, dtype=np.uint32)
+        present = shingle_counts > 0
+        if codes.size:
+            segments = shingle_starts[present]
+            shift = np.uint64(32)
+            hashed = np.empty_like(codes)
+            for column, (a, b) in enumerate(self.permutations):
+                # uint64 arithmetic wraps around, i.e. is mod 2**64
+                np.multiply(codes, np.uint64(a), out=hashed)
+                np.add(hashed, np.uint64(b), out=hashed)
+                np.right_shift(hashed, shift, out=hashed)
+                signatures[present, column] = np.minimum.reduceat(hashed, segments)
+        return signatures
+
+
+class MinHashLSH:
+    """
+    Banded LSH over a signature matrix
+
+    Args:
+        threshold: Estimated similarity a pair must reach
+        num_perm: Signature length
+        recall: Target probability that a pair at the threshold is a candidate
+    """
+
+    def __init__(self, threshold: float, num_perm: int = DEFAULT_NUM_PERM,
+                 recall: float = DEFAULT_RECALL):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_params(threshold, num_perm, recall)
+        # Candidate pairs of the last pairs() call, counted once per shared band
+        self.candidates = 0
+
+    def pairs(self, signatures: Signatures,
+              groups: Optional[Sequence[int]] = None) -> List[Tuple[int, int, float]]:
+        """
+        Rows sharing a bucket whose estimated similarity reaches the threshold
+
+        Args:
+            signatures: Signature matrix
+            groups: Optional group number per row; only rows of the same
+                group are paired
+
+        Returns:
+            [(row i, row j, similarity), ...] with i < j, sorted
+        """
+        start = time.perf_counter()
+        np = numpy_module()
+        if np is None:
+            found = self._python_pairs(signatures, groups)
+        else:
+            found = self._numpy_pairs(np, signatures, groups)
+        instrumentation.add_time('lsh', time.perf_counter() - start)
+        instrumentation.count('lsh_candidates', self.candidates)
+        return found
+
+    def _python_pairs(self, signatures: Signatures, groups: Optional[Sequence[int]]):
+        values = signatures.values
+        num_perm, rows = signatures.num_perm, self.rows
+        candidates: Set[Tuple[int, int]] = set()
+        self.candidates = 0
+        for band in range(self.bands):
+            buckets: Dict[tuple, List[int]] = defaultdict(list)
+            offset = band * rows
+            for index in range(len(signatures)):
+                start = index * num_perm + offset
+                group = groups[index] if groups is not None else 0
+                buckets[(group, values[start:start + rows].tobytes())].append(index)
+            for members in buckets.values():
+                self.candidates += len(members) * (len(members) - 1) // 2
+                for x in range(len(members)):
+                    for y in range(x + 1, len(members)):
+                        candidates.add((members[x], members[y]))
+        found = []
+        for i, j in sorted(candidates):
+            score = MinHasher.similarity(signatures.row(i), signatures.row(j))
+            if score >= self.threshold:
+                found.append((i, j, score))
+        return found
+
+    def _numpy_pairs(self, np, signatures: Signatures, groups: Optional[Sequence[int]]):
+        matrix = signatures.matrix(np)
+        count, num_perm = matrix.shape
+        self.candidates = 0
+        if count < 2:
+            return []
+        group_values = np.asarray(groups, dtype=np.uint64) if groups is not None else None
+        multiplier = np.uint64(1000003)
+        threshold = self.threshold
+        low_bytes = (matrix & 0xFF).astype(np.uint8)
+        keys, equal = [], []
+        for band in range(self.bands):
+            # Hash each row's band into one 64-bit key (collisions only add candidates)
+            bucket = np.full(count, band + 1, dtype=np.uint64)
+            for column in range(band * self.rows, (band + 1) * self.rows):
+                bucket = bucket * multiplier ^ matrix[:, column]
+            if group_values is not None:
+                bucket = bucket * multiplier ^ group_values
+            order = np.argsort(bucket, kind='stable')
+            ordered = bucket[order]
+            same = ordered[1:] == ordered[:-1]
+            # Pair sorted positions k and k + distance while they stay in one
+            # bucket, scoring candidates right away so only matches are kept.
+            # Low bytes in bucket order are compared first: they match
+            # wherever the full values do, and rows next to each other in
+            # the sort are read sequentially
+            ordered_low = low_bytes[order]
+            positions = np.flatnonzero(same)
+            distance = 1
+            while positions.size:
+                self.candidates += int(positions.size)
+                for offset in range(0, positions.size, _SCORE_CHUNK):
+                    chunk = positions[offset:offset + _SCORE_CHUNK]
+                    matching = np.count_nonzero(ordered_low[chunk] == ordered_low[chunk + distance], axis=1)
+                    chunk = chunk[matching / num_perm >= threshold]
+                    if not chunk.size:
+                        continue
+                    first, second = order[chunk], order[chunk + distance]
+                    matching = np.count_nonzero(matrix[first] == matrix[second], axis=1)
+                    keep = matching / num_perm >= threshold
+                    if keep.any():
+                        first, second = first[keep], second[keep]
+                        keys.append(np.minimum(first, second) * count + np.maximum(first, second))
+                        equal.append(matching[keep])
+                positions = positions[positions + distance < count - 1]
+                positions = positions[same[positions + distance]]
+                distance += 1
+        if not keys:
+            return []
+        keys, equal = np.concatenate(keys), np.concatenate(equal)
+        order = np.argsort(keys, kind='stable')
+        keys, equal = keys[order], equal[order]
+        # Drop pairs found in several bands
+        first_seen = np.concatenate(([True], keys[1:] != keys[:-1]))
+        keys, scores = keys[first_seen], equal[first_seen] / num_perm
+        return list(zip((keys // count).tolist(), (keys % count).tolist(), scores.tolist()))
+
+
+def measure_recall(signatures: Signatures, pairs: Sequence[Tuple[int, int, float]], threshold: float,
+                   sample_size: int = 200, groups: Optional[Sequence[int]] = None,
+                   seed: int = 0) -> Dict[str, float]:
+    """
+    Recall of LSH pairs against brute force for a random sample of rows
+
+    Each sampled row is compared with every other row (of its group); recall
+    is the share of the pairs reaching the threshold that LSH found.
+
+    Args:
+        signatures: Signature matrix LSH ran on
+        pairs: Result of MinHashLSH.pairs() on it
+        threshold: Similarity threshold LSH ran with
+        sample_size: Number of rows to check
+        groups: Groups LSH ran with, if any
+
+    Returns:
+        Dict with sample, pairs (brute force), found and recall
+    """
+    count = len(signatures)
+    sample = sorted(random.Random(seed).sample(range(count), min(sample_size, count)))
+    sampled = set(sample)
+    found = {(i, j) for i, j, _ in pairs if i in sampled or j in sampled}
+
+    expected: Set[Tuple[int, int]] = set()
+    np = numpy_module()
+    if np is not None:
+        matrix = signatures.matrix(np)
+        low_bytes = (matrix & 0xFF).astype(np.uint8)
+        group_values = np.asarray(groups) if groups is not None else None
+        for row in sample:
+            # Low bytes match wherever the full values do
+            others = np.flatnonzero(
+                np.count_nonzero(low_bytes == low_bytes[row], axis=1) / signatures.num_perm >= threshold)
+            others = others[np.count_nonzero(matrix[others] == matrix[row], axis=1) / signatures.num_perm >= threshold]
+            if group_values is not None:
+                others = others[group_values[others] == group_values[row]]
+            expected.update((min(row, other), max(row, other)) for other in others.tolist() if other != row)
+    else:
+        rows = [signatures.row(index) for index in range(count)]
+        for row in sample:
+            for other in range(count):
+                if other == row or (groups is not None and groups[other] != groups[row]):
+                    continue
+                if MinHasher.similarity(rows[row], rows[other]) >= threshold:
+                    expected.add((min(row, other), max(row, other)))
+    return {
+        'sample': len(sample),
+        'pairs': len(expected),
+        'found': len(found & expected),
+        'recall': len(found & expected) / len(expected) if expected else 1.0,
+    }
+
+
+def sidecar_path(storage_path: str) -> str:
+    """MinHash sidecar file of a bank storage file"""
+    return storage_path + SIDECAR_SUFFIX
+
+
+class MinHashStore:
+    """
+    MinHash signatures of a bank's keywords, persisted in a sidecar file
+
+    Rows follow the keyword order of the last sync(). Each row records the
+    keyword ID and a CRC32 of the normalized text, so only new or edited
+    keywords are hashed again. A sidecar written with other parameters, or
+    unreadable, is ignored and rebuilt.
+
+    File layout: header, keyword IDs (int64), text checksums (uint32),
+    signatures (uint32, count x num_perm), all little-endian.
+    """
+
+    def __init__(self, path: str, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        self.path = path
+        self.hasher = MinHasher(num_perm, seed)
+        self.ids = array('q')
+        self.checksums = array(_TYPECODE)
+        self.signatures = Signatures(num_perm)
+        self.dirty = False
+        self._row_index: Optional[Dict[int, int]] = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_index(self) -> Dict[int, int]:
+        """Row of each keyword ID"""
+        if self._row_index is None:
+            self._row_index = {keyword_id: row for row, keyword_id in enumerate(self.ids)}
+        return self._row_index
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                magic, version, num_perm, seed, count = _HEADER.unpack(header)
+                if (magic, version, num_perm, seed) != (_MAGIC, _VERSION, self.hasher.num_perm, self.hasher.seed):
+                    return
+                ids, checksums, values = array('q'), array(_TYPECODE), array(_TYPECODE)
+                ids.fromfile(f, count)
+                checksums.fromfile(f, count)
+                values.fromfile(f, count * num_perm)
+        except (FileNotFoundError, EOFError):
+            return
+        if sys.byteorder != 'little':
+            for column in (ids, checksums, values):
+                column.byteswap()
+        self.ids, self.checksums = ids, checksums
+        self.signatures = Signatures(num_perm, values)
+
+    def sync(self, items: Sequence[Tuple[int, str]]) -> int:
+        """
+        Align the rows with (keyword_id, normalized_text) items
+
+        Returns:
+            Number of signatures computed
+        """
+        ids = array('q', [keyword_id for keyword_id, _ in items])
+        checksums = array(_TYPECODE, [zlib.crc32(text.encode('utf-8')) for _, text in items])
+        if ids == self.ids and checksums == self.checksums:
+            return 0
+
+        old_count = len(self.ids)
+        if ids[:old_count] == self.ids and checksums[:old_count] == self.checksums:
+            # Keywords were only appended
+            missing = list(range(old_count, len(items)))
+            computed = self.hasher.signatures([items[row][1] for row in missing])
+            self.signatures.values.extend(computed.values)
+        else:
+            old_rows = self.row_index()
+            source = []
+            missing = []
+            for row, (keyword_id, checksum) in enumerate(zip(ids, checksums)):
+                old_row = old_rows.get(keyword_id)
+                if old_row is not None and self.checksums[old_row] == checksum:
+                    source.append(old_row)
+                else:
+                    source.append(-1)
+                    missing.append(row)
+            computed = self.hasher.signatures([items[row][1] for row in missing])
+            self.signatures = self._assemble(source, missing, computed)
+        self.ids, self.checksums = ids, checksums
+        self._row_index = None
+        self.dirty = True
+        return len(missing)
+
+    def _assemble(self, source: List[int], missing: List[int], computed: Signatures) -> Signatures:
+        """Rows taken from the current signatures (source >= 0) or from computed ones"""
+        num_perm = self.hasher.num_perm
+        np = numpy_module()
+        if np is not None:
+            matrix = np.empty((len(source), num_perm), dtype=np.uint32)
+            rows = np.asarray(source, dtype=np.int64)
+            kept = rows >= 0
+            matrix[kept] = self.signatures.matrix(np)[rows[kept]]
+            matrix[np.asarray(missing, dtype=np.int64)] = computed.matrix(np)
+            return Signatures(num_perm, array(_TYPECODE, matrix.tobytes()))
+        values = array(_TYPECODE)
+        old, new = self.signatures.values, computed.values
+        next_computed = 0
+        for row in source:
+            if row >= 0:
+                values.extend(old[row * num_perm:(row + 1) * num_perm])
+            else:
+                values.extend(new[next_computed * num_perm:(next_computed + 1) * num_perm])
+                next_computed += 1
+        return Signatures(num_perm, values)
+
+    def save(self):
+        """Write the sidecar atomically"""
+        columns = [self.ids, self.checksums, self.signatures.values]
+        if sys.byteorder != 'little':
+            columns = [array(column.typecode, column) for column in columns]
+            for column in columns:
+                column.byteswap()
+        header = _HEADER.pack(_MAGIC, _VERSION, self.hasher.num_perm, self.hasher.seed, len(self.ids))
+        atomic_write_bytes(self.path, [header] + columns)
+        self.dirty = False
@@ -56,6 +56,34 @@ class AutoManual(Enum):
     MANUAL = "manual"
 
 
+class LazyDatetime:
+    """
+    Datetime attribute that may hold an ISO string until it is first read
+    
+    Loaders can pass stored timestamps through unparsed, so loading a large
+    bank only parses the timestamps that are actually used.
+    """
+    
+    def __init__(self, name: str):
+        self.slot = f"_{name}"
+    
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = obj.__dict__[self.slot]
+        if isinstance(value, str):
+            value = obj.__dict__[self.slot] = datetime.fromisoformat(value)
+        return value
+    
+    def __set__(self, obj, value):
+        obj.__dict__[self.slot] = value
+    
+    def isoformat(self, obj) -> str:
+        """ISO string of the value, without parsing a still-raw string"""
+        value = obj.__dict__[self.slot]
+        return value if isinstance(value, str) else value.isoformat()
+
+
 @dataclass
 class Brand:
     """Represents a brand"""
@@ -120,6 +148,7 @@ class Keyword:
     status: KeywordStatus = KeywordStatus.ACTIVE
     source: str = ""
     created_at: datetime = field(default_factory=datetime.now)
+    keyword_id: int = 0  # Assigned by KeywordBank, 0 until stored
     
     def __post_init__(self):
         if not self.normalized_text:
@@ -145,10 +174,53 @@ class Keyword:
             "owner": self.owner,
             "status": self.status.value,
             "source": self.source,
-            "created_at": self.created_at.isoformat()
+            "created_at": Keyword.created_at.isoformat(self),
+            "keyword_id": self.keyword_id
         }
 
 
+Keyword.created_at = LazyDatetime("created_at")
+
+# Keyword fields the bank keeps running counts for
+KEYWORD_COUNT_FIELDS = ('brand', 'keyword_type', 'match_type', 'intent', 'status')
+
+
+def encode_keyword_counts(counts: Dict[tuple, int]) -> List[list]:
+    """Convert keyword counts to storable [brand, type, match, intent, status, count] rows"""
+    return [
+        [brand, keyword_type.value, match_type.value, intent.value, status.value, count]
+        for (brand, keyword_type, match_type, intent, status), count in counts.items()
+    ]
+
+
+def decode_keyword_counts(rows: List[list]) -> Dict[tuple, int]:
+    """Convert stored keyword count rows back to a counts dict"""
+    return {
+        (brand, KeywordType(keyword_type), MatchType(match_type),
+         KeywordIntent(intent), KeywordStatus(status)): count
+        for brand, keyword_type, match_type, intent, status, count in rows
+    }
+
+
+@dataclass
+class KeywordSet:
+    """
+    Positive and negative keywords shared by several ad groups of a campaign
+    
+    Ad groups created from the same set share its keyword lists, so adding a
+    keyword to the set (or to any of those ad groups) adds it to all of them.
+    """
+    keywords: List[Keyword] = field(default_factory=list)
+    negative_keywords: List[Keyword] = field(default_factory=list)
+    
+    def add_keyword(self, keyword: Keyword):
+        """Add a keyword to the set"""
+        if keyword.keyword_type == KeywordType.POSITIVE:
+            self.keywords.append(keyword)
+        else:
+            self.negative_keywords.append(keyword)
+
+
 @dataclass
 class AdGroup:
     """Represents an Amazon Ad Group"""
@@ -157,6 +229,16 @@ class AdGroup:
     keywords: List[Keyword] = field(default_factory=list)
     negative_keywords: List[Keyword] = field(default_factory=list)
     
+    @classmethod
+    def from_keyword_set(cls, name: str, asin: str, keyword_set: KeywordSet) -> 'AdGroup':
+        """Create an ad group that shares the keyword lists of a keyword set"""
+        return cls(
+            name=name,
+            asin=asin,
+            keywords=keyword_set.keywords,
+            negative_keywords=keyword_set.negative_keywords
+        )
+    
     def add_keyword(self, keyword: Keyword):
         """Add a keyword to the ad group"""
         if keyword.keyword_type == KeywordType.POSITIVE:
@@ -197,11 +279,42 @@ class Campaign:
         self.ad_groups.append(ad_group)
     
     def to_dict(self):
-        """Convert to dictionary"""
+        """
+        Convert to dictionary
+        
+        Keywords are stored once per distinct keyword set as references
+        [keyword_id, text, match_type] (ID 0 for keywords not stored in the
+        bank), so a keyword removed from the bank later can still be
+        restored; ad groups point at their set by index instead of
+        repeating full keyword dicts.
+        """
+        keyword_sets = []
+        set_index = {}
+        by_lists = {}
+        ad_groups = []
+        for ag in self.ad_groups:
+            lists_key = (id(ag.keywords), id(ag.negative_keywords))
+            index = by_lists.get(lists_key)
+            if index is None:
+                refs = (
+                    tuple((k.keyword_id, k.text, k.match_type.value) for k in ag.keywords),
+                    tuple((k.keyword_id, k.text, k.match_type.value) for k in ag.negative_keywords)
+                )
+                index = set_index.get(refs)
+                if index is None:
+                    index = set_index[refs] = len(keyword_sets)
+                    keyword_sets.append({
+                        "keywords": [list(ref) for ref in refs[0]],
+                        "negative_keywords": [list(ref) for ref in refs[1]]
+                    })
+                by_lists[lists_key] = index
+            ad_groups.append({"name": ag.name, "asin": ag.asin, "keyword_set": index})
+        
         return {
             "name": self.name,
             "brand": self.brand,
-            "ad_groups": [ag.to_dict() for ag in self.ad_groups],
+            "keyword_sets": keyword_sets,
+            "ad_groups": ad_groups,
             "campaign_id": self.campaign_id,
             "campaign_type": self.campaign_type.value,
             "auto_manual": self.auto_manual.value,
@@ -222,20 +335,25 @@ class Mapping:
     bid_override: Optional[float] = None
     notes: str = ""
     created_at: datetime = field(default_factory=datetime.now)
+    keyword_id: Optional[int] = None
     
     def to_dict(self):
         """Convert to dictionary"""
         return {
             "asin": self.asin,
             "keyword": self.keyword,
+            "keyword_id": self.keyword_id,
             "campaign_id": self.campaign_id,
             "ad_group": self.ad_group,
             "bid_override": self.bid_override,
             "notes": self.notes,
-            "created_at": self.created_at.isoformat()
+            "created_at": Mapping.created_at.isoformat(self)
         }
 
 
+Mapping.created_at = LazyDatetime("created_at")
+
+
 @dataclass
 class NamingRule:
     """Represents a campaign naming rule with pattern tokens"""
@@ -0,0 +1,129 @@
+"""
+Locale-aware keyword normalization
+
+A NormalizationProfile holds the rules of one marketplace language: stop
+words, what happens to diacritics, whether words are segmented by script,
+and the stemmer used for variant grouping. Profiles are built once per
+language, with their patterns and stop word sets compiled, and shared
+through get_profile().
+
+    en, de, fr, es  accents stripped ('café' -> 'cafe'), as
+                    TextNormalizer.normalize_enhanced() does
+    ja, zh          NFKC first (full-width 'ＮＩＫＥ' -> 'nike'), marks kept
+                    (stripping them turns 'ガ' into 'カ'), and runs of
+                    kanji, kana and Latin text split into words
+    ko              NFKC, marks kept
+    others          accents stripped, no stop words or stemming
+"""
+import re
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from .stemming import Stemmer, get_stemmer, language_of
+from .text_utils import TextNormalizer
+
+DEFAULT_LOCALE = 'en_US'
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+# Runs of one script: kanji, hiragana, katakana, hangul, anything else
+_CJK = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af'
+_SCRIPT_RUNS = re.compile(
+    r'[\u3400-\u4dbf\u4e00-\u9fff]+|[\u3040-\u309f]+|[\u30a0-\u30ff]+|[\uac00-\ud7af]+|[^\s' + _CJK + r']+'
+)
+
+STOP_WORDS: Dict[str, FrozenSet[str]] = {
+    'en': frozenset(TextNormalizer.STOP_WORDS),
+    'de': frozenset({
+        'der', 'die', 'das', 'den', 'dem', 'des', 'ein', 'eine', 'einen', 'einem', 'einer',
+        'und', 'oder', 'mit', 'für', 'von', 'vom', 'zu', 'zum', 'zur', 'im', 'in', 'am', 'an',
+        'auf', 'aus', 'bei', 'ist',
+    }),
+    'fr': frozenset({
+        'le', 'la', 'les', 'l', 'un', 'une', 'des', 'du', 'de', 'd', 'et', 'ou', 'pour', 'avec',
+        'en', 'au', 'aux', 'à', 'sur', 'par', 'sans',
+    }),
+    'es': frozenset({
+        'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'de', 'del', 'y', 'o', 'para',
+        'con', 'en', 'al', 'por', 'sin',
+    }),
+    'ja': frozenset({'の', 'と', 'や', 'を', 'に', 'は', 'が', 'で', 'へ', 'も', 'な'}),
+    'zh': frozenset({'的', '和', '与', '及'}),
+}
+
+
+class NormalizationProfile:
+    """
+    Normalization rules of one language
+
+    Args:
+        language: Language code
+        stop_words: Words dropped with remove_stop_words, written as in the
+            language (they are normalized with the profile's own rules)
+        strip_diacritics: Remove accents and other combining marks
+        unicode_form: Unicode normalization applied first (e.g. 'NFKC'), or None
+        segment_scripts: Split text at script changes, for languages written
+            without spaces between words
+    """
+
+    def __init__(self, language: str, stop_words: Iterable[str] = (), strip_diacritics: bool = True,
+                 unicode_form: Optional[str] = None, segment_scripts: bool = False):
+        self.language = language
+        self.strip_diacritics = strip_diacritics
+        self.unicode_form = unicode_form
+        self.segment_scripts = segment_scripts
+        self.stemmer: Stemmer = get_stemmer(language)
+        self.stop_words = frozenset(word for stop_word in stop_words
+                                    for word in self.normalize(stop_word).split())
+
+    def normalize(self, text: str, remove_stop_words: bool = False) -> str:
+        """
+        Lowercase, fold, strip punctuation and collapse spaces per the profile
+        For accent-stripping profiles this is TextNormalizer.normalize_enhanced()
+        """
+        if self.unicode_form:
+            text = unicodedata.normalize(self.unicode_form, text)
+        result = text.lower().strip()
+        if self.strip_diacritics:
+            result = TextNormalizer.remove_diacritics(result)
+        result = _PUNCTUATION.sub(' ', result)
+        words = _SCRIPT_RUNS.findall(result) if self.segment_scripts else result.split()
+        if remove_stop_words:
+            words = [word for word in words if word not in self.stop_words]
+        return ' '.join(words)
+
+    def normalize_many(self, texts: Iterable[str], remove_stop_words: bool = False) -> List[str]:
+        """normalize() of each text, repeated texts normalized once"""
+        normalized: Dict[str, str] = {}
+        normalize = self.normalize
+        results = []
+        for text in texts:
+            result = normalized.get(text)
+            if result is None:
+                result = normalized[text] = normalize(text, remove_stop_words)
+            results.append(result)
+        return results
+
+    def stem_text(self, normalized: str) -> str:
+        """Stemmed form of a normalized text, the key of variant grouping"""
+        return self.stemmer.stem_text(normalized)
+
+
+_CJK_OPTIONS = {'strip_diacritics': False, 'unicode_form': 'NFKC'}
+PROFILE_OPTIONS: Dict[str, dict] = {
+    'ja': dict(_CJK_OPTIONS, segment_scripts=True),
+    'zh': dict(_CJK_OPTIONS, segment_scripts=True),
+    'ko': _CJK_OPTIONS,
+}
+
+_profiles: Dict[str, NormalizationProfile] = {}
+
+
+def get_profile(locale: str = DEFAULT_LOCALE) -> NormalizationProfile:
+    """Shared profile of a locale's language (e.g. 'de_DE' -> German)"""
+    language = language_of(locale) or language_of(DEFAULT_LOCALE)
+    profile = _profiles.get(language)
+    if profile is None:
+        profile = _profiles[language] = NormalizationProfile(
+            language, STOP_WORDS.get(language, ()), **PROFILE_OPTIONS.get(language, {})
+        )
+    return profile
@@ -0,0 +1,196 @@
+"""
+Similarity algorithms and candidate indexes for fuzzy deduplication
+
+Character-level algorithms (jaro_winkler, levenshtein) compare every pair
+of keywords. The token-based ones are backed by an index so that only
+keywords sharing words, shingles or MinHash bands are scored:
+
+    token_set     edit similarity of sorted word sets (word order ignored);
+                  keywords sharing a word or a word's first 4 letters
+    jaccard       Jaccard similarity of word sets; prefix-filtered inverted
+                  word index (exact: no pair above the threshold is missed)
+    jaccard_char  Jaccard similarity of character 3-shingles; prefix-filtered
+                  inverted shingle index (exact)
+    minhash       MinHash estimate of the character 3-shingle Jaccard
+                  similarity; banded LSH buckets (approximate)
+
+Whole-bank minhash deduplication goes through the batch engine in
+kwbank.minhash instead of this incremental index.
+"""
+import math
+from collections import defaultdict
+from functools import lru_cache
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from .minhash import DEFAULT_NUM_PERM, DEFAULT_RECALL, MinHasher, lsh_params
+from .text_utils import SimilarityChecker
+
+ALGORITHMS = ('jaro_winkler', 'levenshtein', 'token_set', 'jaccard', 'jaccard_char', 'minhash')
+INDEXED_ALGORITHMS = ('token_set', 'jaccard', 'jaccard_char', 'minhash')
+
+SIMILARITY_FUNCTIONS: Dict[str, Callable[[str, str], float]] = {
+    'jaro_winkler': SimilarityChecker.jaro_winkler_similarity,
+    'levenshtein': SimilarityChecker.similarity_ratio,
+    'token_set': SimilarityChecker.token_set_ratio,
+    'jaccard': SimilarityChecker.jaccard_similarity,
+    'jaccard_char': SimilarityChecker.char_jaccard_similarity,
+}
+
+
+def _joined_length(words: Set[str]) -> int:
+    """Length of the words joined with spaces"""
+    return sum(map(len, words)) + len(words) - 1 if words else 0
+
+
+_default_hasher = MinHasher()
+
+
+@lru_cache(maxsize=65536)
+def _cached_signature(text: str) -> Tuple[int, ...]:
+    return _default_hasher.signature(text)
+
+
+def _minhash_similarity(s1: str, s2: str) -> float:
+    return MinHasher.similarity(_cached_signature(s1), _cached_signature(s2))
+
+
+SIMILARITY_FUNCTIONS['minhash'] = _minhash_similarity
+
+
+def similarity_function(algorithm: str) -> Callable[[str, str], float]:
+    """Pairwise similarity function of an algorithm"""
+    try:
+        return SIMILARITY_FUNCTIONS[algorithm]
+    except KeyError:
+        raise ValueError(f"Unknown similarity algorithm: {algorithm} (choose from {', '.join(ALGORITHMS)})")
+
+
+class SimilarityIndex:
+    """
+    Candidate index over keywords for one of the INDEXED_ALGORITHMS
+
+    Keywords are added one at a time; match() scores a text only against the
+    added keywords found through the index.
+
+    Args:
+        algorithm: One of INDEXED_ALGORITHMS
+        threshold: Similarity a match must reach
+        num_perm: MinHash signature length (minhash only)
+        recall: Target LSH recall at the threshold (minhash only)
+    """
+
+    def __init__(self, algorithm: str, threshold: float, num_perm: int = DEFAULT_NUM_PERM,
+                 recall: float = DEFAULT_RECALL):
+        if algorithm not in INDEXED_ALGORITHMS:
+            raise ValueError(f"Algorithm {algorithm} has no index (indexed: {', '.join(INDEXED_ALGORITHMS)})")
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self._texts: Dict[Hashable, str] = {}
+        # Word or shingle sets, or MinHash signatures
+        self._features: Dict[Hashable, object] = {}
+        self._postings: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._buckets: Dict[int, List[Hashable]] = defaultdict(list)
+        if algorithm == 'minhash':
+            self._hasher = _default_hasher if num_perm == DEFAULT_NUM_PERM else MinHasher(num_perm)
+            self.bands, self.rows = lsh_params(threshold, num_perm, recall)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def _features_of(self, text: str):
+        if self.algorithm == 'jaccard_char':
+            return SimilarityChecker.char_shingles(text)
+        if self.algorithm == 'minhash':
+            if self._hasher is _default_hasher:
+                return _cached_signature(text)
+            return self._hasher.signature(text)
+        return set(text.split())
+
+    def _index_tokens(self, features: Set[str]) -> Set[str]:
+        """Index entries of a word or shingle set"""
+        if self.algorithm == 'token_set':
+            # Word prefixes let 'shoe' find 'shoes' without sharing a word
+            return features | {word[:4] + '*' for word in features if len(word) > 4}
+        return features
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[int]:
+        rows = self.rows
+        return [hash((band, signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def add(self, key: Hashable, text: str):
+        """Index a keyword under a key (keys must be unique)"""
+        features = self._features_of(text)
+        self._texts[key] = text
+        self._features[key] = features
+        if self.algorithm == 'minhash':
+            for band_key in self._band_keys(features):
+                self._buckets[band_key].append(key)
+        else:
+            for token in self._index_tokens(features):
+                self._postings[token].add(key)
+
+    def _candidates(self, features) -> Set[Hashable]:
+        if self.algorithm == 'minhash':
+            found: Set[Hashable] = set()
+            for band_key in self._band_keys(features):
+                bucket = self._buckets.get(band_key)
+                if bucket:
+                    found.update(bucket)
+            return found
+
+        postings = sorted((self._postings.get(token, ()) for token in self._index_tokens(features)), key=len)
+        if self.algorithm == 'token_set':
+            probe = len(postings)
+        else:
+            # Jaccard >= t needs t * |features| shared tokens, so every match
+            # shares one of the rarest |features| - ceil(t * |features|) + 1
+            required = max(1, math.ceil(self.threshold * len(features) - 1e-9))
+            probe = len(postings) - required + 1
+        found = set()
+        for keys in postings[:probe]:
+            found.update(keys)
+        return found
+
+    def candidates(self, text: str) -> Set[Hashable]:
+        """Keys of the keywords that will be scored against a text"""
+        return self._candidates(self._features_of(text))
+
+    def match(self, text: str, exclude: Optional[Hashable] = None) -> Tuple[List[Tuple[Hashable, float]], int]:
+        """
+        Indexed keywords whose similarity to text reaches the threshold
+
+        Returns:
+            ([(key, similarity), ...], number of candidates scored)
+        """
+        features = self._features_of(text)
+        candidates = self._candidates(features)
+        candidates.discard(exclude)
+        threshold = self.threshold
+        if self.algorithm == 'token_set':
+            # The compared strings are the joined word sets, and an edit
+            # similarity >= t needs |L1 - L2| <= (1 - t) * max(L1, L2)
+            score = SimilarityChecker.token_set_ratio
+            length = _joined_length(features)
+            slack = 1 - threshold
+            texts = self._texts
+            stored = self._features
+            scored = []
+            for key in candidates:
+                other_length = _joined_length(stored[key])
+                if abs(length - other_length) <= slack * max(length, other_length) + 1e-9:
+                    scored.append((key, score(text, texts[key])))
+        elif self.algorithm == 'minhash':
+            scored = [(key, MinHasher.similarity(features, self._features[key])) for key in candidates]
+        else:
+            # Jaccard >= t also needs t * |A| <= |B| <= |A| / t
+            size = len(features)
+            low, high = threshold * size - 1e-9, size / threshold + 1e-9 if threshold > 0 else float('inf')
+            stored = self._features
+            scored = []
+            for key in candidates:
+                other = stored[key]
+                other_size = len(other)
+                if low <= other_size <= high:
+                    shared = len(features & other)
+                    scored.append((key, shared / (size + other_size - shared)))
+        return [(key, similarity) for key, similarity in scored if similarity >= threshold], len(scored)
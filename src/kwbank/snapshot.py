@@ -0,0 +1,334 @@
+"""
+Columnar binary snapshot format for the keyword bank (.kwb files)
+
+Keywords are stored column by column: repeated values (brand, match type,
+keyword type, intent, status, ...) are dictionary encoded as small integer
+codes, free text columns as one UTF-8 blob with an offsets array, and
+numbers as packed arrays. Everything except keywords (brands, products,
+mappings, campaigns, ...) is kept as JSON in the header.
+
+Layout:
+    MAGIC (8 bytes) | header length (8 bytes, little endian) | JSON header
+    | padding to 8 bytes | column data (each column 8-byte aligned)
+
+The file is memory mapped on read. Columns are decoded in bulk, so no
+per-record parsing happens, or read value by value without decoding the rest.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from . import codec
+from .models import Keyword, KeywordType, MatchType, KeywordIntent, KeywordStatus
+from .storage import atomic_write_bytes
+
+MAGIC = b'KWBSNAP1'
+FORMAT_VERSION = 1
+SNAPSHOT_EXTENSION = '.kwb'
+
+# Keyword columns: name -> kind
+#   dict:  dictionary encoded values (codes array + distinct values in the header)
+#   str:   UTF-8 blob, values separated by NUL, plus start offsets
+#   float: float64, NaN for None
+#   int:   int64
+#   list:  JSON-encoded lists stored as a str column ('' for empty)
+COLUMNS = {
+    'text': 'str',
+    'brand': 'dict',
+    'match_type': 'dict',
+    'keyword_type': 'dict',
+    'normalized_text': 'str',
+    'intent': 'dict',
+    'suggested_bid': 'float',
+    'tags': 'list',
+    'notes': 'dict',
+    'owner': 'dict',
+    'status': 'dict',
+    'source': 'dict',
+    'created_at': 'str',
+    'keyword_id': 'int',
+}
+
+# Columns holding enum values, decoded to members on read
+ENUM_COLUMNS = {
+    'match_type': MatchType,
+    'keyword_type': KeywordType,
+    'intent': KeywordIntent,
+    'status': KeywordStatus,
+}
+
+_NAN = float('nan')
+
+
+def is_snapshot_path(path: str) -> bool:
+    """Check if a storage path uses the snapshot format"""
+    return path.endswith(SNAPSHOT_EXTENSION)
+
+
+def _code_typecode(size: int) -> str:
+    if size <= 0xFF:
+        return 'B'
+    if size <= 0xFFFF:
+        return 'H'
+    return 'I'
+
+
+def _encode_str(values: List[str]) -> Tuple[bytes, bytes]:
+    """Encode strings as (blob, start offsets)"""
+    joined = '\x00'.join(values)
+    if joined.count('\x00') != max(len(values) - 1, 0):
+        raise ValueError("Snapshot strings can't contain NUL characters")
+    blob = joined.encode('utf-8')
+    if len(blob) == len(joined):
+        lengths = [len(v) + 1 for v in values]
+    else:
+        lengths = [len(v.encode('utf-8')) + 1 for v in values]
+    starts = array('Q', [0])
+    position = 0
+    for length in lengths:
+        position += length
+        starts.append(position)
+    return blob, starts.tobytes()
+
+
+def _keyword_columns(keywords: List[Keyword]) -> Dict[str, list]:
+    """Split keywords into raw column values"""
+    columns = {name: [] for name in COLUMNS}
+    text, brand, match_type, keyword_type = (columns['text'], columns['brand'],
+                                             columns['match_type'], columns['keyword_type'])
+    normalized, intent, bid, tags = (columns['normalized_text'], columns['intent'],
+                                     columns['suggested_bid'], columns['tags'])
+    notes, owner, status, source = (columns['notes'], columns['owner'],
+                                    columns['status'], columns['source'])
+    created_at, keyword_id = columns['created_at'], columns['keyword_id']
+    isoformat = Keyword.created_at.isoformat
+    for k in keywords:
+        text.append(k.text)
+        brand.append(k.brand)
+        match_type.append(k.match_type.value)
+        keyword_type.append(k.keyword_type.value)
+        normalized.append(k.normalized_text)
+        intent.append(k.intent.value)
+        bid.append(_NAN if k.suggested_bid is None else k.suggested_bid)
+        tags.append(codec.dumps(k.tags).decode('utf-8') if k.tags else '')
+        notes.append(k.notes)
+        owner.append(k.owner)
+        status.append(k.status.value)
+        source.append(k.source)
+        created_at.append(isoformat(k))
+        keyword_id.append(k.keyword_id)
+    return columns
+
+
+def write_snapshot(path: str, meta: Dict[str, Any], keywords: List[Keyword]):
+    """Atomically write keywords and the other bank data to a snapshot file"""
+    write_columns(path, meta, _keyword_columns(keywords), len(keywords))
+
+
+def write_columns(path: str, meta: Dict[str, Any], columns: Dict[str, list], rows: int):
+    """
+    Atomically write a snapshot from raw column values
+
+    columns maps every name of COLUMNS to a list of `rows` values as stored:
+    enum values as strings, NaN for missing bids, JSON text for tags and
+    ISO strings for created_at.
+    """
+    chunks: List[bytes] = []
+    position = 0
+
+    def add(payload: bytes) -> Tuple[int, int]:
+        nonlocal position
+        offset = position
+        padding = -len(payload) % 8
+        chunks.append(payload + b'\x00' * padding)
+        position += len(payload) + padding
+        return offset, len(payload)
+
+    column_specs = {}
+    for name, kind in COLUMNS.items():
+        values = columns[name]
+        spec: Dict[str, Any] = {'kind': kind}
+        if kind == 'dict':
+            distinct: Dict[Any, int] = {}
+            codes = [distinct.setdefault(v, len(distinct)) for v in values]
+            spec['values'] = list(distinct)
+            spec['typecode'] = _code_typecode(len(distinct))
+            spec['offset'], spec['length'] = add(array(spec['typecode'], codes).tobytes())
+        elif kind in ('str', 'list'):
+            blob, starts = _encode_str(values)
+            spec['offset'], spec['length'] = add(blob)
+            spec['starts_offset'], spec['starts_length'] = add(starts)
+        elif kind == 'float':
+            spec['typecode'] = 'd'
+            spec['offset'], spec['length'] = add(array('d', values).tobytes())
+        else:
+            spec['typecode'] = 'q'
+            spec['offset'], spec['length'] = add(array('q', values).tobytes())
+        column_specs[name] = spec
+
+    header = codec.dumps({
+        'version': FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'rows': rows,
+        'columns': column_specs,
+        'meta': meta,
+    })
+    prefix = MAGIC + struct.pack('<Q', len(header)) + header
+    prefix += b'\x00' * (-len(prefix) % 8)
+    atomic_write_bytes(path, b''.join([prefix] + chunks))
+
+
+class KeywordSnapshot:
+    """
+    Read-only, memory-mapped snapshot file
+
+    Args:
+        path: Snapshot file to open
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a keyword bank snapshot")
+        header_length = struct.unpack_from('<Q', self._mmap, len(MAGIC))[0]
+        header_start = len(MAGIC) + 8
+        header = codec.loads(self._mmap[header_start:header_start + header_length])
+        if header.get('version') != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"Unsupported snapshot version: {header.get('version')}")
+        self._data_start = header_start + header_length + (-(header_start + header_length) % 8)
+        self._swap = header['byteorder'] != sys.byteorder
+        self.rows: int = header['rows']
+        self.columns: Dict[str, dict] = header['columns']
+        self.meta: Dict[str, Any] = header['meta']
+        self._arrays: Dict[str, Any] = {}
+        self._dictionaries: Dict[str, list] = {}
+
+    def _array(self, offset: int, length: int, typecode: str):
+        """Packed numbers of a column (zero-copy unless byte order differs)"""
+        start = self._data_start + offset
+        view = memoryview(self._mmap)[start:start + length]
+        if not self._swap:
+            return view.cast(typecode)
+        values = array(typecode)
+        values.frombytes(view)
+        values.byteswap()
+        return values
+
+    def _cached_array(self, key: str, offset: int, length: int, typecode: str):
+        values = self._arrays.get(key)
+        if values is None:
+            values = self._arrays[key] = self._array(offset, length, typecode)
+        return values
+
+    def _strings(self, spec: dict) -> List[str]:
+        if not self.rows:
+            return []
+        start = self._data_start + spec['offset']
+        blob = self._mmap[start:start + spec['length']]
+        return blob.decode('utf-8').split('\x00')
+
+    def codes(self, name: str):
+        """Integer codes of a dictionary encoded column, indexed by row"""
+        spec = self.columns[name]
+        return self._cached_array(name, spec['offset'], spec['length'], spec['typecode'])
+
+    def dictionary(self, name: str) -> list:
+        """Distinct values of a dictionary encoded column, indexed by code"""
+        values = self._dictionaries.get(name)
+        if values is None:
+            values = self.columns[name]['values']
+            enum_cls = ENUM_COLUMNS.get(name)
+            if enum_cls is not None:
+                members = codec.enum_values(enum_cls)
+                values = [members[v] for v in values]
+            self._dictionaries[name] = values
+        return values
+
+    def value(self, name: str, index: int) -> Any:
+        """Decode a single value of a keyword column"""
+        spec = self.columns[name]
+        kind = spec['kind']
+        if kind == 'dict':
+            return self.dictionary(name)[self.codes(name)[index]]
+        if kind in ('str', 'list'):
+            starts = self._cached_array(
+                f"{name}.starts", spec['starts_offset'], spec['starts_length'], 'Q'
+            )
+            start = self._data_start + spec['offset']
+            text = self._mmap[start + starts[index]:start + starts[index + 1] - 1].decode('utf-8')
+            if kind == 'list':
+                return codec.loads(text) if text else []
+            return text
+        number = self._cached_array(name, spec['offset'], spec['length'], spec['typecode'])[index]
+        if kind == 'float' and number != number:
+            return None
+        return number
+
+    def count(self, name: str) -> Dict[Any, int]:
+        """Number of rows per value of a dictionary encoded column"""
+        codes = self.codes(name)
+        values = self.dictionary(name)
+        if self.columns[name]['typecode'] == 'B' and isinstance(codes, memoryview):
+            # Byte codes: count each code with a C-level scan
+            raw = codes.tobytes()
+            counts = {values[c]: raw.count(c.to_bytes(1, 'little')) for c in range(len(values))}
+        else:
+            counter = Counter(codes)
+            counts = {values[c]: counter.get(c, 0) for c in range(len(values))}
+        return {value: n for value, n in counts.items() if n}
+
+    def column(self, name: str) -> list:
+        """Decode a whole keyword column to Python values"""
+        spec = self.columns[name]
+        kind = spec['kind']
+        if kind == 'dict':
+            values = self.dictionary(name)
+            return [values[c] for c in self.codes(name)]
+        if kind == 'str':
+            return self._strings(spec)
+        if kind == 'list':
+            return [codec.loads(v) if v else [] for v in self._strings(spec)]
+        values = self._cached_array(name, spec['offset'], spec['length'], spec['typecode']).tolist()
+        if kind == 'float':
+            return [None if v != v else v for v in values]
+        return values
+
+    def keywords(self) -> List[Keyword]:
+        """Materialize all keywords"""
+        names = list(COLUMNS)
+        columns = [self.column(name) for name in names]
+        # Field names as stored in Keyword.__dict__ (created_at is lazy)
+        fields = ['_created_at' if n == 'created_at' else n for n in names]
+        new = object.__new__
+        keywords = []
+        for row in zip(*columns):
+            keyword = new(Keyword)
+            keyword.__dict__.update(zip(fields, row))
+            keywords.append(keyword)
+        return keywords
+
+    def close(self):
+        for values in self._arrays.values():
+            if isinstance(values, memoryview):
+                values.release()
+        self._arrays.clear()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_snapshot(path: str) -> Tuple[Dict[str, Any], List[Keyword]]:
+    """Read a snapshot file, returning (meta, keywords)"""
+    with KeywordSnapshot(path) as snapshot:
+        return snapshot.meta, snapshot.keywords()
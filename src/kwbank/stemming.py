@@ -0,0 +1,284 @@
+"""
+Stemmers for variant deduplication
+
+    en          Porter algorithm (M. F. Porter, 1980, with the revisions of
+                his reference implementation: 'bli' -> 'ble', 'logi' -> 'log')
+    de, es      light stemmers after J. Savoy: plural, gender and common
+                inflection endings; accents are folded
+    fr          light stemmer: plural, feminine and final -e; accents folded
+    others      words are returned unchanged (ja, zh, ... don't inflect
+                with suffixes)
+
+Suffix rules are compiled once into tables keyed by the suffix's last
+letter, longest suffix first, so a word is only checked against the
+suffixes that can match it. Stemmers memoize words: a bank's vocabulary is
+small next to its keyword count, so most words cost one dict lookup.
+"""
+import re
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# (suffix, replacement, minimum word length exclusive) rules by last letter
+_Table = Dict[str, Tuple[Tuple[str, str, int], ...]]
+
+
+def _compile(rules: Iterable[Sequence]) -> _Table:
+    """Group suffix rules by their suffix's last letter, longest suffix first"""
+    table: Dict[str, list] = {}
+    for rule in rules:
+        suffix, replacement = rule[0], rule[1]
+        min_length = rule[2] if len(rule) > 2 else 0
+        table.setdefault(suffix[-1], []).append((suffix, replacement, min_length))
+    return {letter: tuple(sorted(entries, key=lambda entry: -len(entry[0])))
+            for letter, entries in table.items()}
+
+
+def _strip_suffix(word: str, table: _Table) -> str:
+    """Apply the longest rule whose suffix matches and whose length condition holds"""
+    for suffix, replacement, min_length in table.get(word[-1:], ()):
+        if len(word) > min_length and word.endswith(suffix):
+            return word[:len(word) - len(suffix)] + replacement
+    return word
+
+
+# Porter
+
+def _is_consonant(word: str, i: int) -> bool:
+    char = word[i]
+    if char in 'aeiou':
+        return False
+    if char == 'y':
+        return i == 0 or not _is_consonant(word, i - 1)
+    return True
+
+
+def _measure(stem: str) -> int:
+    """m in [C](VC)^m[V]: the number of vowel-consonant sequences"""
+    m = 0
+    previous_vowel = False
+    for i in range(len(stem)):
+        vowel = not _is_consonant(stem, i)
+        if previous_vowel and not vowel:
+            m += 1
+        previous_vowel = vowel
+    return m
+
+
+def _has_vowel(stem: str) -> bool:
+    return any(not _is_consonant(stem, i) for i in range(len(stem)))
+
+
+def _ends_double_consonant(word: str) -> bool:
+    return len(word) >= 2 and word[-1] == word[-2] and _is_consonant(word, len(word) - 1)
+
+
+def _ends_cvc(word: str) -> bool:
+    """Consonant-vowel-consonant ending, the last consonant not w, x or y ('hop', not 'how')"""
+    n = len(word)
+    return (n >= 3 and _is_consonant(word, n - 1) and not _is_consonant(word, n - 2)
+            and _is_consonant(word, n - 3) and word[-1] not in 'wxy')
+
+
+_PORTER_STEP2 = _compile([
+    ('ational', 'ate'), ('tional', 'tion'), ('enci', 'ence'), ('anci', 'ance'), ('izer', 'ize'),
+    ('bli', 'ble'), ('alli', 'al'), ('entli', 'ent'), ('eli', 'e'), ('ousli', 'ous'),
+    ('ization', 'ize'), ('ation', 'ate'), ('ator', 'ate'), ('alism', 'al'), ('iveness', 'ive'),
+    ('fulness', 'ful'), ('ousness', 'ous'), ('aliti', 'al'), ('iviti', 'ive'), ('biliti', 'ble'),
+    ('logi', 'log'),
+])
+_PORTER_STEP3 = _compile([
+    ('icate', 'ic'), ('ative', ''), ('alize', 'al'), ('iciti', 'ic'), ('ical', 'ic'),
+    ('ful', ''), ('ness', ''),
+])
+_PORTER_STEP4 = _compile([
+    (suffix, '') for suffix in (
+        'al', 'ance', 'ence', 'er', 'ic', 'able', 'ible', 'ant', 'ement', 'ment', 'ent',
+        'ion', 'ou', 'ism', 'ate', 'iti', 'ous', 'ive', 'ize',
+    )
+])
+
+
+def _porter_replace(word: str, table: _Table, min_measure: int) -> str:
+    """Replace the longest matching suffix if the stem's measure exceeds min_measure"""
+    for suffix, replacement, _ in table.get(word[-1], ()):
+        if word.endswith(suffix):
+            stem = word[:len(word) - len(suffix)]
+            if suffix == 'ion' and not stem.endswith(('s', 't')):
+                return word
+            return stem + replacement if _measure(stem) > min_measure else word
+    return word
+
+
+def porter_stem(word: str) -> str:
+    """Porter stem of a lowercase English word"""
+    if len(word) <= 2:
+        return word
+
+    # Step 1a: plurals
+    if word.endswith('s'):
+        if word.endswith(('sses', 'ies')):
+            word = word[:-2]
+        elif not word.endswith('ss'):
+            word = word[:-1]
+
+    # Step 1b: -eed, -ed, -ing
+    if word.endswith('eed'):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    else:
+        for suffix in ('ed', 'ing'):
+            if word.endswith(suffix) and _has_vowel(word[:-len(suffix)]):
+                word = word[:-len(suffix)]
+                if word.endswith(('at', 'bl', 'iz')):
+                    word += 'e'
+                elif _ends_double_consonant(word):
+                    if word[-1] not in 'lsz':
+                        word = word[:-1]
+                elif _measure(word) == 1 and _ends_cvc(word):
+                    word += 'e'
+                break
+
+    if len(word) <= 1:
+        return word
+
+    # Step 1c: -y -> -i after a vowel in the stem
+    if word.endswith('y') and _has_vowel(word[:-1]):
+        word = word[:-1] + 'i'
+
+    # Steps 2-4: derivational suffixes
+    word = _porter_replace(word, _PORTER_STEP2, 0)
+    word = _porter_replace(word, _PORTER_STEP3, 0)
+    word = _porter_replace(word, _PORTER_STEP4, 1)
+
+    # Step 5: final -e and -ll
+    if word.endswith('e'):
+        m = _measure(word[:-1])
+        if m > 1 or (m == 1 and not _ends_cvc(word[:-1])):
+            word = word[:-1]
+    if word.endswith('ll') and _measure(word) > 1:
+        word = word[:-1]
+    return word
+
+
+# Light stemmers
+
+_ACCENTS = {
+    'a': 'àáâãä', 'c': 'ç', 'e': 'èéêë', 'i': 'ìíîï', 'o': 'òóôõö', 'u': 'ùúûü',
+}
+_FOLD_ACCENTS = str.maketrans({accented: plain for plain, chars in _ACCENTS.items() for accented in chars})
+
+# Letters after which German -s and -st are inflection endings
+_GERMAN_ST_ENDINGS = 'bdfghklmnt'
+_GERMAN_STEP1 = _compile(
+    [('ern', '', 5), ('em', '', 4), ('en', '', 4), ('er', '', 4), ('es', '', 4), ('e', '', 3)]
+    + [(letter + 's', letter, 3) for letter in _GERMAN_ST_ENDINGS]
+)
+_GERMAN_STEP2 = _compile(
+    [('est', '', 5), ('er', '', 4), ('en', '', 4)]
+    + [(letter + 'st', letter, 4) for letter in _GERMAN_ST_ENDINGS]
+)
+
+
+def german_stem(word: str) -> str:
+    """Light stem of a lowercase German word ('schuhe' -> 'schuh')"""
+    word = word.translate(_FOLD_ACCENTS)
+    return _strip_suffix(_strip_suffix(word, _GERMAN_STEP1), _GERMAN_STEP2)
+
+
+_SPANISH_RULES = _compile([
+    ('o', '', 4), ('a', '', 4), ('e', '', 4),
+    ('eses', 'es', 4), ('ces', 'z', 4), ('os', '', 4), ('as', '', 4), ('es', '', 4),
+])
+
+
+def spanish_stem(word: str) -> str:
+    """Light stem of a lowercase Spanish word ('zapatillas' -> 'zapatill')"""
+    return _strip_suffix(word.translate(_FOLD_ACCENTS), _SPANISH_RULES)
+
+
+_FRENCH_PLURALS = _compile([('eaux', 'eau', 4), ('aux', 'al', 4), ('x', '', 4), ('ss', 'ss', 3), ('s', '', 3)])
+_FRENCH_FEMININE = _compile([
+    ('euse', 'eu', 6), ('ive', 'if', 5), ('iere', 'ier', 6), ('ere', 'er', 5), ('elle', 'el', 4),
+    ('enne', 'en', 4), ('onne', 'on', 4), ('ette', 'et', 4), ('ee', 'e', 4),
+])
+_FRENCH_FINAL = _compile([('e', '', 4)])
+
+
+def french_stem(word: str) -> str:
+    """Light stem of a lowercase French word ('chaussures' -> 'chaussur')"""
+    word = _strip_suffix(word.translate(_FOLD_ACCENTS), _FRENCH_PLURALS)
+    return _strip_suffix(_strip_suffix(word, _FRENCH_FEMININE), _FRENCH_FINAL)
+
+
+def _unchanged(word: str) -> str:
+    return word
+
+
+LANGUAGE_STEMMERS: Dict[str, Callable[[str], str]] = {
+    'en': porter_stem,
+    'de': german_stem,
+    'es': spanish_stem,
+    'fr': french_stem,
+}
+
+
+def language_of(locale: str) -> str:
+    """Language code of a locale ('de_DE' -> 'de', 'en-US' -> 'en')"""
+    return re.split(r'[-_]', locale or '', maxsplit=1)[0].lower()
+
+
+class Stemmer:
+    """
+    Memoizing stemmer of one language
+
+    Args:
+        language: Language code; languages without rules leave words unchanged
+        cache_size: Words remembered before the cache starts over
+    """
+
+    def __init__(self, language: str = 'en', cache_size: int = 200_000):
+        self.language = language
+        self._rules = LANGUAGE_STEMMERS.get(language, _unchanged)
+        self._cache: Dict[str, str] = {}
+        self.cache_size = cache_size
+
+    def stem(self, word: str) -> str:
+        """Stem of a word (lowercased first)"""
+        try:
+            return self._cache[word]
+        except KeyError:
+            pass
+        stem = self._rules(word.lower())
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[word] = stem
+        return stem
+
+    def stem_many(self, words: Iterable[str]) -> List[str]:
+        """Stems of words, in order"""
+        cached = self._cache.get
+        stem = self.stem
+        return [cached(word) or stem(word) for word in words]
+
+    def stem_text(self, text: str) -> str:
+        """Text with each word stemmed ('running shoes' -> 'run shoe' in English)"""
+        return ' '.join(self.stem_many(text.lower().split()))
+
+    def clear_cache(self):
+        self._cache.clear()
+
+
+_stemmers: Dict[str, Stemmer] = {}
+
+
+def get_stemmer(locale: str = 'en') -> Stemmer:
+    """Shared stemmer of a locale's language"""
+    language = language_of(locale)
+    stemmer = _stemmers.get(language)
+    if stemmer is None:
+        stemmer = _stemmers[language] = Stemmer(language)
+    return stemmer
+
+
+def stem_many(words: Iterable[str], locale: str = 'en') -> List[str]:
+    """Stems of words in a locale's language"""
+    return get_stemmer(locale).stem_many(words)
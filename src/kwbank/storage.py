@@ -0,0 +1,135 @@
+"""
+File persistence helpers: atomic writes and inter-process locking
+"""
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Iterable, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
+
+
+DEFAULT_STORAGE_PATH = "data/keyword_bank.json"
+
+
+def default_storage_path() -> str:
+    """
+    Storage file used when none is given: $KWBANK_STORAGE or the JSON default
+    Paths ending in .kwb use the columnar snapshot format
+    """
+    return os.environ.get('KWBANK_STORAGE') or DEFAULT_STORAGE_PATH
+
+
+class ConcurrentModificationError(RuntimeError):
+    """Raised when a file was rewritten by another process since it was loaded"""
+
+
+class StorageLoadError(RuntimeError):
+    """Raised when saving over a file that could not be loaded completely"""
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Identify the current version of a file (None when it doesn't exist)
+    Atomic replaces give every saved version a new inode
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def atomic_write_bytes(path: str, payload: Union[bytes, Iterable[bytes]]):
+    """
+    Write to a temporary file next to the target and rename it over the
+    target, so readers never see a partially written file
+
+    payload may also be a sequence of buffers, written one after another
+    without joining them in memory.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory
+    )
+    try:
+        # mkstemp creates 0600 files; keep the target's permissions
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, 'wb') as f:
+            if isinstance(payload, (bytes, bytearray, memoryview)):
+                f.write(payload)
+            else:
+                for chunk in payload:
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = 2,
+                      separators: Optional[Tuple[str, str]] = None):
+    """Atomically write data as JSON"""
+    atomic_write_bytes(path, json.dumps(data, indent=indent, separators=separators).encode('utf-8'))
+
+
+class FileLock:
+    """
+    Reentrant exclusive lock on ``<path>.lock`` shared by all processes
+
+    Nested acquisitions from the same object (e.g. a save inside a locked
+    read-modify-write cycle) only take the OS lock once.
+    """
+
+    def __init__(self, path: str):
+        self.lock_path = f"{path}.lock"
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._depth > 0
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+                self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            # Closing the descriptor drops the flock
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -5,6 +5,8 @@ import re
 import unicodedata
 from typing import Set
 
+from .stemming import get_stemmer
+
 
 class TextNormalizer:
     """Advanced text normalization for keywords"""
@@ -98,30 +100,18 @@ class TextNormalizer:
     @staticmethod
     def stem_simple(word: str) -> str:
         """
-        Simple stemming algorithm (removes common suffixes)
-        This is a lightweight alternative to Porter Stemmer
+        English stem of a word (Porter algorithm, see kwbank.stemming)
+        Example: 'running' -> 'run'
         """
-        # Common suffix rules (simplified)
-        suffixes = ['ing', 'ed', 'es', 's', 'ly', 'er', 'est']
-        
-        word = word.lower()
-        
-        # Try to remove suffixes (longest first)
-        for suffix in suffixes:
-            if word.endswith(suffix) and len(word) > len(suffix) + 2:
-                return word[:-len(suffix)]
-        
-        return word
+        return get_stemmer('en').stem(word)
     
     @staticmethod
-    def stem_text(text: str) -> str:
+    def stem_text(text: str, locale: str = 'en') -> str:
         """
-        Apply simple stemming to all words in text
+        Stem all words in text with the stemmer of a locale's language
         Example: 'running shoes' -> 'run shoe'
         """
-        words = text.lower().split()
-        stemmed = [TextNormalizer.stem_simple(w) for w in words]
-        return ' '.join(stemmed)
+        return get_stemmer(locale).stem_text(text)
 
 
 class SimilarityChecker:
@@ -227,6 +217,54 @@ class SimilarityChecker:
         
         return jaro + (prefix * 0.1 * (1.0 - jaro))
     
+    @staticmethod
+    def char_shingles(text: str, k: int = 3) -> Set[str]:
+        """
+        Character k-shingles of a text (the text itself if shorter than k)
+        Example: 'shoes' -> {'sho', 'hoe', 'oes'}
+        """
+        if len(text) <= k:
+            return {text} if text else set()
+        return {text[i:i + k] for i in range(len(text) - k + 1)}
+    
+    @staticmethod
+    def jaccard(set1: Set[str], set2: Set[str]) -> float:
+        """Jaccard similarity of two sets (1.0 if both are empty)"""
+        if not set1 and not set2:
+            return 1.0
+        intersection = len(set1 & set2)
+        return intersection / (len(set1) + len(set2) - intersection)
+    
+    @staticmethod
+    def jaccard_similarity(s1: str, s2: str) -> float:
+        """
+        Jaccard similarity of the word sets of two strings
+        Word order is ignored: 'men running shoes' == 'shoes running men'
+        """
+        return SimilarityChecker.jaccard(set(s1.split()), set(s2.split()))
+    
+    @staticmethod
+    def char_jaccard_similarity(s1: str, s2: str, k: int = 3) -> float:
+        """Jaccard similarity of the character k-shingles of two strings"""
+        return SimilarityChecker.jaccard(
+            SimilarityChecker.char_shingles(s1, k),
+            SimilarityChecker.char_shingles(s2, k)
+        )
+    
+    @staticmethod
+    def token_set_ratio(s1: str, s2: str) -> float:
+        """
+        Edit-distance similarity of the strings with their words de-duplicated
+        and sorted, shared words first
+        Reordered keywords score 1.0 ('shoes running men' vs 'men running shoes'),
+        and typos within words are still tolerated
+        """
+        tokens1, tokens2 = set(s1.split()), set(s2.split())
+        shared = sorted(tokens1 & tokens2)
+        sorted1 = ' '.join(shared + sorted(tokens1 - tokens2))
+        sorted2 = ' '.join(shared + sorted(tokens2 - tokens1))
+        return SimilarityChecker.similarity_ratio(sorted1, sorted2)
+    
     @staticmethod
     def are_fuzzy_duplicates(s1: str, s2: str, threshold: float = 0.92) -> bool:
         """